@@ -14,6 +14,7 @@ Usage:
 import click
 import json
 import sys
+from contextlib import nullcontext
 from datetime import datetime
 from pathlib import Path
 from typing import Dict, Optional
@@ -593,23 +594,165 @@ def bridge():
 
 
 @bridge.command(name='encode')
-@click.argument('text')
-@click.option('--threshold', type=float, default=0.05,
-              help='Amplitude floor for including a family/principle\'s equations.')
-def bridge_encode(text: str, threshold: float):
+@click.argument('text', required=False)
+@click.option('--threshold', multiple=True, default=['0.05'],
+              help='Amplitude floor for including a family/principle\'s equations. '
+                   'Accepts a list (0.05,0.1,0.2 or repeated) to sweep thresholds from one scan.')
+@click.option('--jsonl', 'jsonl_path', type=click.Path(dir_okay=False, allow_dash=True),
+              help='Encode every payload in a JSONL file (- for stdin) instead of TEXT; one line out per payload.')
+@click.option('--no-service', is_flag=True,
+              help='Encode in-process even when an encode service ("bridge serve") is running.')
+@click.option('--profile', is_flag=True,
+              help='Encode in-process and print a per-stage timing breakdown to stderr.')
+def bridge_encode(text: str, threshold: tuple, jsonl_path: str, no_service: bool, profile: bool):
     """
     Encode a text payload into a PolyhedralEncoding (JSON to stdout).
 
+    With several thresholds the output is a list with one encoding per
+    threshold, all from a single keyword scan. A single TEXT goes to the
+    encode service when one is listening, skipping the ontology load.
+
     Example: poly bridge encode "a hexagonal mesh under tidal load"
+             poly bridge encode --threshold 0.05,0.1,0.2 --jsonl corpus.jsonl
+             poly bridge encode --profile --jsonl corpus.jsonl > /dev/null
     """
+    if text is not None and not jsonl_path and not no_service and not profile and len(threshold) == 1 and ',' not in threshold[0]:
+        # Ask a running service first, before paying for the bridge import and ontology load.
+        try:
+            from bridge_service import encode_via_service
+            out = encode_via_service(text, threshold=float(threshold[0]))
+        except (ImportError, OSError, ValueError):
+            out = None
+        if out is not None:
+            click.echo(json.dumps(out, ensure_ascii=False, indent=2))
+            return
     try:
-        from polyhedral_bridge import encode
+        from polyhedral_bridge import encode, encode_jsonl, encode_thresholds, parse_thresholds, profiled
     except ImportError as e:
         click.echo(f"{Colors.ERROR}✗{Colors.RESET} polyhedral_bridge not importable: {e}",
                    err=True)
         sys.exit(1)
-    enc = encode(text, threshold=threshold)
-    click.echo(json.dumps(enc.to_json(), ensure_ascii=False, indent=2))
+    try:
+        thresholds = parse_thresholds(threshold)
+    except ValueError as e:
+        raise click.BadParameter(str(e), param_hint='--threshold')
+    if not thresholds:
+        raise click.BadParameter('at least one threshold is required', param_hint='--threshold')
+    sweep = thresholds if len(thresholds) > 1 else thresholds[0]
+    if text is None and not jsonl_path:
+        raise click.UsageError('give TEXT or --jsonl PATH')
+
+    # Stage timings cover encode(); a threshold sweep only reports the load.
+    with (profiled() if profile else nullcontext()) as prof:
+        if jsonl_path:
+            with click.open_file(jsonl_path, 'r', encoding='utf-8') as src:
+                try:
+                    encode_jsonl(src, sys.stdout, threshold=sweep)
+                except ValueError as e:
+                    click.echo(f"{Colors.ERROR}✗{Colors.RESET} {jsonl_path}: {e}", err=True)
+                    sys.exit(1)
+        else:
+            if len(thresholds) > 1:
+                out = [enc.to_json() for enc in encode_thresholds(text, thresholds)]
+            else:
+                out = encode(text, threshold=thresholds[0]).to_json()
+            click.echo(json.dumps(out, ensure_ascii=False, indent=2))
+    if prof is not None:
+        click.echo(prof.report(), err=True)
+
+
+@bridge.command(name='serve')
+@click.option('--socket', 'socket_path', type=click.Path(dir_okay=False),
+              help='Unix socket to listen on (default: $POLYHEDRAL_BRIDGE_SOCKET or a per-user temp path).')
+@click.option('--port', type=int, help='Listen on 127.0.0.1:PORT instead of a unix socket.')
+@click.option('--window-ms', type=float, default=2.0, help='Micro-batch collection window.')
+@click.option('--max-batch', type=int, default=256, help='Largest batch handed to the batch encoder.')
+@click.option('--metrics', is_flag=True, help='Print the running service\'s latency/queue metrics and exit.')
+def bridge_serve(socket_path: str, port: int, window_ms: float, max_batch: int, metrics: bool):
+    """
+    Keep a warm encoder behind a local socket; "bridge encode" uses it automatically.
+
+    Example: poly bridge serve &
+             poly bridge serve --metrics
+    """
+    try:
+        import bridge_service
+    except ImportError as e:
+        click.echo(f"{Colors.ERROR}✗{Colors.RESET} bridge_service not importable: {e}", err=True)
+        sys.exit(1)
+    argv = ['--window-ms', str(window_ms), '--max-batch', str(max_batch)]
+    if socket_path:
+        argv += ['--socket', socket_path]
+    if port is not None:
+        argv += ['--port', str(port)]
+    if metrics:
+        argv.append('--metrics')
+    sys.exit(bridge_service.main(argv))
+
+
+@bridge.command(name='nearest')
+@click.argument('text')
+@click.option('-k', 'k', type=int, default=5, help='Number of matches to return.')
+@click.option('--metric', type=click.Choice(['cosine', 'l1']), default='cosine')
+@click.option('--index', 'index_dir', type=click.Path(file_okay=False),
+              help='Saved index directory (see "bridge index"); default: atlas entries + rosetta seeds.')
+@click.option('--approximate', is_flag=True, help='Probe IVF lists instead of scanning every row.')
+@click.option('--nprobe', type=int, default=8, help='IVF lists probed with --approximate.')
+@click.option('--json', 'as_json', is_flag=True, help='Print matches as JSON.')
+def bridge_nearest(text: str, k: int, metric: str, index_dir: str, approximate: bool, nprobe: int, as_json: bool):
+    """
+    Find the atlas entries / seeds whose amplitude vectors resonate most with TEXT.
+
+    Example: poly bridge nearest "a hexagonal mesh under tidal load" -k 3
+    """
+    try:
+        from bridge_index import VectorIndex, nearest
+    except ImportError as e:
+        click.echo(f"{Colors.ERROR}✗{Colors.RESET} bridge_index not importable: {e}", err=True)
+        sys.exit(1)
+    try:
+        index = VectorIndex.load(index_dir) if index_dir else None
+        hits = nearest(text, k=k, metric=metric, index=index, approximate=approximate, nprobe=nprobe)
+    except (ImportError, OSError, ValueError) as e:
+        click.echo(f"{Colors.ERROR}✗{Colors.RESET} {e}", err=True)
+        sys.exit(1)
+    if as_json:
+        click.echo(json.dumps(hits, ensure_ascii=False, indent=2))
+        return
+    unit = 'similarity' if metric == 'cosine' else 'L1 distance'
+    click.echo(f"\n{Colors.BOLD}Nearest to:{Colors.RESET} {text}  ({unit})\n")
+    for rank, hit in enumerate(hits, 1):
+        click.echo(f"  {rank:>2}. {hit['score']:.4f}  {Colors.INFO}{hit['kind']:<5}{Colors.RESET} "
+                   f"{hit['id']}  {hit['label']}")
+    click.echo()
+
+
+@bridge.command(name='index')
+@click.argument('directory', type=click.Path(file_okay=False))
+@click.option('--archive', 'archive_path', type=click.Path(dir_okay=False, exists=True),
+              help='Index an encoding archive (rows by number) instead of the atlas.')
+@click.option('--ivf', 'nlist', type=int, default=None,
+              help='Also build N inverted lists for --approximate search (0 = sqrt of rows).')
+def bridge_index(directory: str, archive_path: str, nlist: int):
+    """
+    Build and save a nearest-neighbour index for "bridge nearest --index".
+
+    Example: poly bridge index .atlas-index --ivf 0
+    """
+    try:
+        from bridge_index import VectorIndex, atlas_items
+    except ImportError as e:
+        click.echo(f"{Colors.ERROR}✗{Colors.RESET} bridge_index not importable: {e}", err=True)
+        sys.exit(1)
+    try:
+        index = VectorIndex.from_archive(archive_path) if archive_path else VectorIndex.from_items(atlas_items())
+        if nlist is not None:
+            index.build_ivf(nlist or None)
+        index.save(directory)
+    except (ImportError, OSError, ValueError) as e:
+        click.echo(f"{Colors.ERROR}✗{Colors.RESET} {e}", err=True)
+        sys.exit(1)
+    click.echo(f"{Colors.SUCCESS}✓{Colors.RESET} Indexed {len(index)} items into {directory}/")
 
 
 # ============================================================================
@@ -0,0 +1,276 @@
+#!/usr/bin/env python3
+# SPDX-License-Identifier: CC0-1.0
+"""Binary encoding archive: PolyhedralEncodings as fixed-width records.
+
+One little-endian record per encoding, readable in place through mmap
+(stdlib) or numpy.memmap:
+
+  header   magic, version, n_fam, n_prin, count width, n_rows and the
+           offsets/sizes of the three sections below
+  records  n_rows × (float32 amplitudes[W], uint16|uint32 counts[W],
+           u32 glyph string id, u32 equation-set id,
+           u32 provenance string id), W = n_fam + n_prin
+  strings  u64 offsets[n+1] + UTF-8 blob; ids 0..W-1 are the family
+           then principle ids; glyphs, hashes and provenance JSON follow,
+           each stored once
+  eq sets  u32 offsets[n+1] + u32 string ids; one entry per distinct
+           equation_hashes list
+
+Amplitudes are stored as float32 for similarity work; row() recomputes
+the float64 L1 amplitudes from the exact counts, so archive -> JSONL
+reproduces the original to_json() output.
+
+CLI: python polyhedral_bridge.py --to-archive IN.jsonl OUT / --from-archive IN [OUT.jsonl]
+"""
+
+from __future__ import annotations
+
+import json
+import mmap
+import os
+import struct
+from array import array
+from pathlib import Path
+from typing import Iterator, TextIO
+
+from polyhedral_bridge import PolyhedralEncoding, _require_numpy
+
+ARCHIVE_MAGIC = b"PBARCH\x00\x01"
+_ARCHIVE_VERSION = 1
+_ARCHIVE_HEADER = struct.Struct("<8sHHHHQQQQQQ")
+_COUNT_CODES = {"uint16": ("H", 2), "uint32": ("I", 4)}
+
+
+def _record_struct(width: int, count_bytes: int) -> struct.Struct:
+    count_code = "H" if count_bytes == 2 else "I"
+    return struct.Struct(f"<{width}f{width}{count_code}III")
+
+
+class EncodingArchiveWriter:
+    """Append PolyhedralEncodings to a binary archive (see the format above).
+
+    Rows stream straight to disk; the string and equation-set tables are
+    written and the header patched on close(). The file appears under its
+    final name only once it is complete. count_dtype "uint16" (default)
+    keeps records at 204 bytes; a raw count that does not fit raises
+    ValueError, and "uint32" lifts the limit.
+    """
+
+    def __init__(self, path: str | Path, count_dtype: str = "uint16") -> None:
+        if count_dtype not in _COUNT_CODES:
+            raise ValueError(f"count_dtype must be one of {sorted(_COUNT_CODES)}, got {count_dtype!r}")
+        self.path = Path(path)
+        self._count_code, self._count_bytes = _COUNT_CODES[count_dtype]
+        self._count_max = (1 << (8 * self._count_bytes)) - 1
+        self._tmp = self.path.with_name(f"{self.path.name}.{os.getpid()}.tmp")
+        self._f = self._tmp.open("wb")
+        self._f.write(b"\0" * _ARCHIVE_HEADER.size)
+        self._order: tuple[tuple[str, ...], tuple[str, ...]] | None = None
+        self._record: struct.Struct | None = None
+        self._strings: dict[str, int] = {}
+        self._eq_sets: dict[tuple[str, ...], int] = {}
+        self._prov_ids: dict[str, int] = {}
+        self.rows = 0
+
+    def _string_id(self, s: str) -> int:
+        sid = self._strings.get(s)
+        if sid is None:
+            sid = self._strings[s] = len(self._strings)
+        return sid
+
+    def write(self, enc: PolyhedralEncoding) -> None:
+        if self._order is None:
+            self._order = (tuple(enc.family_order), tuple(enc.principle_order))
+            for nid in self._order[0] + self._order[1]:
+                self._string_id(nid)
+            self._record = _record_struct(len(self._strings), self._count_bytes)
+        elif (enc.family_order, enc.principle_order) != self._order:
+            raise ValueError(f"row {self.rows}: family/principle order differs from the first row")
+        counts = enc.counts
+        if counts and max(counts) > self._count_max:
+            raise ValueError(f"row {self.rows}: raw count {max(counts)} does not fit {self._count_code!r}; use count_dtype='uint32'")
+
+        hashes = tuple(enc.equation_hashes)
+        eq_id = self._eq_sets.get(hashes)
+        if eq_id is None:
+            eq_id = self._eq_sets[hashes] = len(self._eq_sets)
+            for h in hashes:
+                self._string_id(h)
+        prov = json.dumps(enc.provenance, ensure_ascii=False)
+        prov_id = self._prov_ids.get(prov)
+        if prov_id is None:
+            prov_id = self._prov_ids[prov] = self._string_id(prov)
+        self._f.write(self._record.pack(
+            *enc.amplitudes, *counts, self._string_id(enc.glyph_signature), eq_id, prov_id,
+        ))
+        self.rows += 1
+
+    def close(self) -> int:
+        """Finish the archive and return the row count."""
+        if self._f.closed:
+            return self.rows
+        f = self._f
+        fam, prin = self._order or ((), ())
+        records_off = _ARCHIVE_HEADER.size
+
+        strings_off = f.tell()
+        blobs = [s.encode("utf-8") for s in self._strings]
+        offsets = [0]
+        for b in blobs:
+            offsets.append(offsets[-1] + len(b))
+        f.write(struct.pack(f"<{len(offsets)}Q", *offsets))
+        f.write(b"".join(blobs))
+
+        eq_off = f.tell()
+        members = [self._strings[h] for hashes in self._eq_sets for h in hashes]
+        eq_offsets = [0]
+        for hashes in self._eq_sets:
+            eq_offsets.append(eq_offsets[-1] + len(hashes))
+        f.write(struct.pack(f"<{len(eq_offsets)}I", *eq_offsets))
+        f.write(struct.pack(f"<{len(members)}I", *members))
+
+        f.seek(0)
+        f.write(_ARCHIVE_HEADER.pack(
+            ARCHIVE_MAGIC, _ARCHIVE_VERSION, len(fam), len(prin), self._count_bytes,
+            self.rows, records_off, strings_off, len(self._strings), eq_off, len(self._eq_sets),
+        ))
+        f.close()
+        os.replace(self._tmp, self.path)
+        return self.rows
+
+    def __enter__(self) -> EncodingArchiveWriter:
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self._f.close()
+            self._tmp.unlink(missing_ok=True)
+
+
+class EncodingArchive:
+    """Read-only, memory-mapped view of an archive written by EncodingArchiveWriter.
+
+    archive[i] decodes one row into a PolyhedralEncoding without touching
+    the others; amplitudes()/counts() return zero-copy N×W numpy views
+    (numpy.memmap) for vectorized work.
+    """
+
+    def __init__(self, path: str | Path) -> None:
+        self.path = Path(path)
+        with self.path.open("rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        (magic, version, n_fam, n_prin, count_bytes, self._n, self._records_off,
+         self._strings_off, n_strings, self._eq_off, n_eq_sets) = _ARCHIVE_HEADER.unpack_from(self._mm, 0)
+        if magic != ARCHIVE_MAGIC or version != _ARCHIVE_VERSION:
+            self._mm.close()
+            raise ValueError(f"{self.path}: not a polyhedral encoding archive (v{_ARCHIVE_VERSION})")
+        self.width = n_fam + n_prin
+        self._count_bytes = count_bytes
+        self._record = _record_struct(self.width, count_bytes)
+        self._blob_off = self._strings_off + 8 * (n_strings + 1)
+        self._eq_members_off = self._eq_off + 4 * (n_eq_sets + 1)
+        self._string_cache: dict[int, str] = {}
+        self._prov_cache: dict[int, dict] = {}
+        ids = tuple(self._string(i) for i in range(self.width))
+        self.family_order, self.principle_order = ids[:n_fam], ids[n_fam:]
+
+    def __len__(self) -> int:
+        return self._n
+
+    def _string(self, sid: int) -> str:
+        s = self._string_cache.get(sid)
+        if s is None:
+            start, end = struct.unpack_from("<QQ", self._mm, self._strings_off + 8 * sid)
+            s = self._string_cache[sid] = self._mm[self._blob_off + start:self._blob_off + end].decode("utf-8")
+        return s
+
+    def _equation_set(self, eq_id: int) -> list[str]:
+        start, end = struct.unpack_from("<II", self._mm, self._eq_off + 4 * eq_id)
+        sids = struct.unpack_from(f"<{end - start}I", self._mm, self._eq_members_off + 4 * start)
+        return [self._string(sid) for sid in sids]
+
+    def __getitem__(self, i: int) -> PolyhedralEncoding:
+        if i < 0:
+            i += self._n
+        if not 0 <= i < self._n:
+            raise IndexError(f"archive row {i} out of range")
+        w = self.width
+        fields = self._record.unpack_from(self._mm, self._records_off + i * self._record.size)
+        counts = array("i", fields[w:2 * w])
+        glyph_id, eq_id, prov_id = fields[2 * w:]
+        prov = self._prov_cache.get(prov_id)
+        if prov is None:
+            prov = self._prov_cache[prov_id] = json.loads(self._string(prov_id))
+        n_fam = len(self.family_order)
+        fam_total, prin_total = sum(counts[:n_fam]), sum(counts[n_fam:])
+        amplitudes = array(
+            "d",
+            [c / fam_total if fam_total else 0.0 for c in counts[:n_fam]]
+            + [c / prin_total if prin_total else 0.0 for c in counts[n_fam:]],
+        )
+        return PolyhedralEncoding.from_arrays(
+            self.family_order, self.principle_order, counts, amplitudes,
+            self._equation_set(eq_id), self._string(glyph_id), dict(prov),
+        )
+
+    def __iter__(self) -> Iterator[PolyhedralEncoding]:
+        for i in range(self._n):
+            yield self[i]
+
+    def glyph_signature(self, i: int) -> str:
+        return self._string(self._record.unpack_from(self._mm, self._records_off + i * self._record.size)[-3])
+
+    def _records(self):
+        np = _require_numpy()
+        count_dtype = "<u2" if self._count_bytes == 2 else "<u4"
+        dtype = np.dtype([
+            ("amplitudes", "<f4", (self.width,)),
+            ("counts", count_dtype, (self.width,)),
+            ("glyph", "<u4"),
+            ("equations", "<u4"),
+            ("provenance", "<u4"),
+        ])
+        if self._n == 0:
+            return np.zeros(0, dtype=dtype)
+        return np.memmap(self.path, dtype=dtype, mode="r", offset=self._records_off, shape=(self._n,))
+
+    def amplitudes(self):
+        """N×W float32 amplitudes (families then principles), memory-mapped (needs numpy)."""
+        return self._records()["amplitudes"]
+
+    def counts(self):
+        """N×W raw counts, memory-mapped (needs numpy)."""
+        return self._records()["counts"]
+
+    def close(self) -> None:
+        self._mm.close()
+
+    def __enter__(self) -> EncodingArchive:
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+
+def jsonl_to_archive(src: TextIO, path: str | Path, count_dtype: str = "uint16") -> int:
+    """Convert PolyhedralEncoding.to_json() JSONL into an archive; return the row count."""
+    with EncodingArchiveWriter(path, count_dtype=count_dtype) as writer:
+        for lineno, line in enumerate(src, 1):
+            if not line.strip():
+                continue
+            try:
+                writer.write(PolyhedralEncoding(**json.loads(line)))
+            except (ValueError, TypeError) as e:
+                raise ValueError(f"line {lineno}: {e}") from e
+    return writer.rows
+
+
+def archive_to_jsonl(path: str | Path, dst: TextIO) -> int:
+    """Write every archive row back out as to_json() JSONL; return the row count."""
+    with EncodingArchive(path) as archive:
+        for enc in archive:
+            dst.write(json.dumps(enc.to_json(), ensure_ascii=False))
+            dst.write("\n")
+        return len(archive)
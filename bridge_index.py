@@ -0,0 +1,353 @@
+#!/usr/bin/env python3
+# SPDX-License-Identifier: CC0-1.0
+"""Nearest-neighbour search over PolyhedralEncoding amplitude vectors.
+
+Vectors are the 32-dim family then principle L1 amplitudes. Exact search
+streams the index through a blocked matrix product and merges per-block
+top-k; approximate search probes the nearest inverted lists of a
+spherical k-means (IVF) and re-ranks those rows exactly. nearest()
+searches the atlas (entries/*.json plus the rosetta seed catalog) by
+default. Needs numpy.
+"""
+
+from __future__ import annotations
+
+import json
+from pathlib import Path
+from time import perf_counter_ns
+from typing import Any, Iterable
+
+from bridge_archive import EncodingArchive
+from polyhedral_bridge import ROOT, PolyhedralEncoder, _chunked, _require_numpy, get_default_encoder
+
+ENTRIES_DIR = ROOT / "entries"
+SEED_CATALOG_PATH = ROOT / "atlas" / "remote" / "rosetta" / "seed-catalog.json"
+_METRICS = ("cosine", "l1")
+
+
+def _entry_text(entry: dict) -> str:
+    """Searchable text of an atlas entry: title, intent, insight, flags and NIP reframes, glyphs."""
+    parts = [entry.get("title", ""), entry.get("intent", ""), entry.get("insight", "")]
+    for sweep in ("resonance_sweep", "principle_sweep"):
+        parts.extend(entry.get(sweep, {}).get("flags", []))
+    parts.extend(entry.get("noise_to_insight", {}).values())
+    parts.append(entry.get("refined_glyph") or entry.get("seed_glyph", ""))
+    return " ".join(str(p) for p in parts if p)
+
+
+def _seed_text(seed: dict) -> str:
+    """Searchable text of a rosetta seed: geometry, field, traits, bridges and notes."""
+    geometry, field_, traits = seed.get("geometry", {}), seed.get("field", {}), seed.get("traits", {})
+    parts = [
+        geometry.get("type", ""), geometry.get("material", ""),
+        field_.get("property", ""), *field_.get("actions", []),
+        *traits.get("families", []), traits.get("element", ""), traits.get("polyhedral_map", ""),
+        *seed.get("bridges", {}).get("sensors", []), *seed.get("animals", []),
+        seed.get("importance", ""), seed.get("notes", ""),
+    ]
+    return " ".join(str(p) for p in parts if p)
+
+
+def atlas_items(
+    entries_dir: Path | None = None,
+    seed_catalog: Path | None = None,
+) -> list[dict]:
+    """Atlas entries and rosetta seeds as {"id", "label", "kind", "payload"} index items."""
+    items = []
+    for path in sorted(Path(entries_dir or ENTRIES_DIR).glob("*.json")):
+        with path.open("r", encoding="utf-8") as f:
+            entry = json.load(f)
+        items.append({
+            "id": f"entry:{entry.get('id', path.stem)}",
+            "label": entry.get("title", path.stem),
+            "kind": "entry",
+            "payload": _entry_text(entry),
+        })
+    catalog = Path(seed_catalog or SEED_CATALOG_PATH)
+    if catalog.exists():
+        with catalog.open("r", encoding="utf-8") as f:
+            seeds = json.load(f).get("seeds", [])
+        for seed in seeds:
+            items.append({
+                "id": f"seed:{seed['id']}",
+                "label": seed.get("shape_id", seed["id"]),
+                "kind": "seed",
+                "payload": _seed_text(seed),
+            })
+    return items
+
+
+class VectorIndex:
+    """Persistable N×32 float32 amplitude index with exact and IVF search.
+
+    vectors rows are family amplitudes then principle amplitudes, as in
+    PolyhedralEncoding.amplitudes. ids/labels/kinds describe each row.
+    save()/load() use a directory: vectors.npy (memory-mapped on load),
+    meta.json, and ivf.npz once build_ivf() has run.
+    """
+
+    block_rows = 1 << 16
+
+    def __init__(
+        self,
+        vectors: Any,
+        ids: list[str],
+        labels: list[str] | None = None,
+        kinds: list[str] | None = None,
+        fingerprint: str | None = None,
+    ) -> None:
+        np = _require_numpy()
+        self.vectors = vectors if isinstance(vectors, np.memmap) else np.ascontiguousarray(vectors, dtype=np.float32)
+        if self.vectors.ndim != 2 or self.vectors.shape[0] != len(ids):
+            raise ValueError(f"vectors shape {self.vectors.shape} does not match {len(ids)} ids")
+        self.ids = list(ids)
+        self.labels = list(labels) if labels is not None else list(self.ids)
+        self.kinds = list(kinds) if kinds is not None else [""] * len(self.ids)
+        self.fingerprint = fingerprint
+        self._norms = None
+        self.centroids = None
+        self._ivf_rows = None
+        self._ivf_offsets = None
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @classmethod
+    def from_payloads(
+        cls,
+        ids: list[str],
+        payloads: Iterable[Any],
+        labels: list[str] | None = None,
+        kinds: list[str] | None = None,
+        encoder: PolyhedralEncoder | None = None,
+        batch_size: int = 1 << 16,
+    ) -> VectorIndex:
+        """Encode payloads with encode_batch, batch_size at a time, into a new index."""
+        np = _require_numpy()
+        enc = encoder or get_default_encoder()
+        blocks = []
+        for chunk in _chunked(payloads, batch_size):
+            batch = enc.encode_batch(chunk)
+            blocks.append(np.hstack([batch.family_amplitudes_l1, batch.principle_amplitudes_l1]).astype(np.float32))
+        width = len(enc.fam_order) + len(enc.prin_order)
+        vectors = np.vstack(blocks) if blocks else np.zeros((0, width), dtype=np.float32)
+        return cls(vectors, ids, labels, kinds, fingerprint=enc.fingerprint)
+
+    @classmethod
+    def from_items(cls, items: list[dict], encoder: PolyhedralEncoder | None = None) -> VectorIndex:
+        """Index {"id", "label", "kind", "payload"} dicts, e.g. from atlas_items()."""
+        return cls.from_payloads(
+            [it["id"] for it in items],
+            (it["payload"] for it in items),
+            labels=[it.get("label", it["id"]) for it in items],
+            kinds=[it.get("kind", "") for it in items],
+            encoder=encoder,
+        )
+
+    @classmethod
+    def from_archive(cls, path: str | Path, ids: list[str] | None = None) -> VectorIndex:
+        """Index the float32 amplitudes of an EncodingArchive in place; ids default to row numbers."""
+        with EncodingArchive(path) as archive:
+            vectors = archive.amplitudes()  # a numpy.memmap of its own, so it outlives the archive
+        return cls(vectors, ids if ids is not None else [str(i) for i in range(len(vectors))])
+
+    # -- persistence ---------------------------------------------------
+    def save(self, directory: str | Path) -> None:
+        np = _require_numpy()
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        np.save(directory / "vectors.npy", np.asarray(self.vectors))
+        meta = {"ids": self.ids, "labels": self.labels, "kinds": self.kinds, "fingerprint": self.fingerprint}
+        (directory / "meta.json").write_text(json.dumps(meta, ensure_ascii=False), encoding="utf-8")
+        ivf = directory / "ivf.npz"
+        if self.centroids is not None:
+            np.savez(ivf, centroids=self.centroids, rows=self._ivf_rows, offsets=self._ivf_offsets)
+        elif ivf.exists():
+            ivf.unlink()
+
+    @classmethod
+    def load(cls, directory: str | Path, mmap: bool = True) -> VectorIndex:
+        np = _require_numpy()
+        directory = Path(directory)
+        vectors = np.load(directory / "vectors.npy", mmap_mode="r" if mmap else None)
+        meta = json.loads((directory / "meta.json").read_text(encoding="utf-8"))
+        index = cls(vectors, meta["ids"], meta.get("labels"), meta.get("kinds"), meta.get("fingerprint"))
+        ivf = directory / "ivf.npz"
+        if ivf.exists():
+            with np.load(ivf) as z:
+                index.centroids, index._ivf_rows, index._ivf_offsets = z["centroids"], z["rows"], z["offsets"]
+        return index
+
+    # -- search --------------------------------------------------------
+    def norms(self):
+        """Row L2 norms (computed once, blockwise)."""
+        if self._norms is None:
+            np = _require_numpy()
+            out = np.empty(len(self), dtype=np.float32)
+            for start in range(0, len(self), self.block_rows):
+                block = np.asarray(self.vectors[start:start + self.block_rows])
+                out[start:start + len(block)] = np.sqrt(np.einsum("ij,ij->i", block, block))
+            self._norms = out
+        return self._norms
+
+    def _scores(self, np, queries, rows_or_slice, metric):
+        """Higher-is-better scores of queries (m×W) against a block of rows."""
+        block = np.asarray(self.vectors[rows_or_slice])
+        if metric == "cosine":
+            norms = self.norms()[rows_or_slice]
+            sims = queries @ block.T
+            np.divide(sims, norms, out=sims, where=norms > 0)
+            sims[:, norms == 0] = 0.0
+            return sims
+        return -np.abs(queries[:, None, :] - block[None, :, :]).sum(axis=2)
+
+    def search(
+        self,
+        queries: Any,
+        k: int = 5,
+        metric: str = "cosine",
+        approximate: bool = False,
+        nprobe: int = 8,
+    ) -> list[list[tuple[int, float]]]:
+        """Top-k (row, score) per query row, best first.
+
+        cosine scores are similarities (higher is closer); l1 scores are
+        distances (lower is closer). approximate=True needs build_ivf()
+        and scans only the nprobe inverted lists nearest each query.
+        """
+        np = _require_numpy()
+        if metric not in _METRICS:
+            raise ValueError(f"metric must be one of {_METRICS}, got {metric!r}")
+        q = np.atleast_2d(np.asarray(queries, dtype=np.float32))
+        if metric == "cosine":
+            qn = np.linalg.norm(q, axis=1, keepdims=True)
+            q = np.divide(q, qn, out=np.zeros_like(q), where=qn > 0)
+        k = min(k, len(self))
+        if k <= 0:
+            return [[] for _ in range(len(q))]
+        if approximate:
+            if self.centroids is None:
+                raise ValueError("approximate search needs build_ivf() first")
+            return [self._search_ivf(np, q[i:i + 1], k, metric, nprobe) for i in range(len(q))]
+
+        # L1 broadcasts m×block×W, so keep the query block small there.
+        q_block = len(q) if metric == "cosine" else 16
+        sign = 1.0 if metric == "cosine" else -1.0
+        results = []
+        for qs in range(0, len(q), q_block):
+            qb = q[qs:qs + q_block]
+            best = [_empty_top(np)] * len(qb)
+            for start in range(0, len(self), self.block_rows):
+                s = self._scores(np, qb, slice(start, start + self.block_rows), metric)
+                rows = np.arange(start, start + s.shape[1])
+                best = [_merge_top_k(np, b, rows, s[r], k) for r, b in enumerate(best)]
+            results.extend([(int(r), float(sign * v)) for r, v in zip(*b)] for b in best)
+        return results
+
+    def build_ivf(self, nlist: int | None = None, iters: int = 10, sample: int = 1 << 16, seed: int = 0) -> None:
+        """Cluster the unit vectors into nlist inverted lists (spherical k-means)."""
+        np = _require_numpy()
+        n = len(self)
+        if n == 0:
+            raise ValueError("cannot build an IVF over an empty index")
+        nlist = max(1, min(nlist or int(n ** 0.5), n))
+        rng = np.random.default_rng(seed)
+        norms = self.norms()
+        pick = rng.choice(n, size=min(n, max(sample, nlist)), replace=False)
+        train = np.asarray(self.vectors[np.sort(pick)]) / np.maximum(norms[np.sort(pick)], 1e-12)[:, None]
+        centroids = train[rng.choice(len(train), size=nlist, replace=False)]
+        for _ in range(iters):
+            assign = np.argmax(train @ centroids.T, axis=1)
+            sums = np.stack([np.bincount(assign, weights=col, minlength=nlist) for col in train.T], axis=1)
+            sums = sums.astype(np.float32)
+            lengths = np.linalg.norm(sums, axis=1, keepdims=True)
+            centroids = np.where(lengths > 0, sums / np.maximum(lengths, 1e-12), centroids)
+        assign = np.empty(n, dtype=np.int64)
+        for start in range(0, n, self.block_rows):
+            block = np.asarray(self.vectors[start:start + self.block_rows])
+            assign[start:start + len(block)] = np.argmax(block @ centroids.T, axis=1)
+        self.centroids = centroids.astype(np.float32)
+        self._ivf_rows = np.argsort(assign, kind="stable")
+        self._ivf_offsets = np.concatenate([[0], np.cumsum(np.bincount(assign, minlength=nlist))])
+
+    def _search_ivf(self, np, q, k, metric, nprobe):
+        probe = np.argsort(-(q @ self.centroids.T)[0], kind="stable")[:nprobe]
+        rows = np.sort(np.concatenate([self._ivf_rows[self._ivf_offsets[c]:self._ivf_offsets[c + 1]] for c in probe]))
+        top_rows, top_scores = _merge_top_k(np, _empty_top(np), rows, self._scores(np, q, rows, metric)[0], k)
+        sign = 1.0 if metric == "cosine" else -1.0
+        return [(int(r), float(sign * v)) for r, v in zip(top_rows, top_scores)]
+
+
+def _empty_top(np):
+    return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+
+
+def _merge_top_k(np, best, rows, scores, k):
+    """Merge one block's (rows, scores) into a running top-k, best first.
+
+    Every row scoring at least the block's k-th best survives the cut, so
+    ties always resolve to the lowest row whatever the block boundaries.
+    """
+    if len(scores) > k:
+        kth = -np.partition(-scores, k - 1)[k - 1]
+        keep = np.flatnonzero(scores >= kth)
+        rows, scores = rows[keep], scores[keep]
+    rows = np.concatenate([best[0], rows])
+    scores = np.concatenate([best[1], scores])
+    order = np.lexsort((rows, -scores))[:k]
+    return rows[order], scores[order]
+
+
+_ATLAS_INDEX: tuple[tuple, VectorIndex] | None = None
+_ATLAS_CHECKED_NS = 0
+ATLAS_RECHECK_SECONDS = 2.0  # how long nearest() trusts the atlas index before re-stat'ing its sources
+
+
+def _atlas_sources_key(encoder: PolyhedralEncoder) -> tuple:
+    paths = sorted(ENTRIES_DIR.glob("*.json")) + [SEED_CATALOG_PATH]
+    stamps = tuple((str(p), p.stat().st_mtime_ns) for p in paths if p.exists())
+    return (encoder.fingerprint, stamps)
+
+
+def get_atlas_index(encoder: PolyhedralEncoder | None = None, refresh: bool = False) -> VectorIndex:
+    """Index over entries/*.json and the rosetta seed catalog, rebuilt when any of them changes.
+
+    The sources are stat'ed at most once per ATLAS_RECHECK_SECONDS, and
+    never when the encoder has check_mtime off; refresh=True checks now.
+    """
+    global _ATLAS_INDEX, _ATLAS_CHECKED_NS
+    enc = encoder or get_default_encoder()
+    enc._ensure_fresh()
+    now = perf_counter_ns()
+    if _ATLAS_INDEX is not None and not refresh and _ATLAS_INDEX[0][0] == enc.fingerprint:
+        if not enc.check_mtime or now - _ATLAS_CHECKED_NS < ATLAS_RECHECK_SECONDS * 1e9:
+            return _ATLAS_INDEX[1]
+    key = _atlas_sources_key(enc)
+    _ATLAS_CHECKED_NS = now
+    if _ATLAS_INDEX is None or _ATLAS_INDEX[0] != key:
+        _ATLAS_INDEX = (key, VectorIndex.from_items(atlas_items(), encoder=enc))
+    return _ATLAS_INDEX[1]
+
+
+def nearest(
+    payload: Any,
+    k: int = 5,
+    metric: str = "cosine",
+    index: VectorIndex | None = None,
+    approximate: bool = False,
+    nprobe: int = 8,
+    encoder: PolyhedralEncoder | None = None,
+) -> list[dict]:
+    """The k indexed items whose amplitude vectors best match payload's.
+
+    Defaults to the atlas index (entries + rosetta seeds). Each hit is
+    {"id", "label", "kind", "score"}, best first.
+    """
+    enc = encoder or get_default_encoder()
+    idx = index if index is not None else get_atlas_index(enc)
+    query = _require_numpy().frombuffer(enc.encode(payload).amplitudes, dtype="float64")
+    hits = idx.search(query, k=k, metric=metric, approximate=approximate, nprobe=nprobe)[0]
+    return [
+        {"id": idx.ids[row], "label": idx.labels[row], "kind": idx.kinds[row], "score": score}
+        for row, score in hits
+    ]
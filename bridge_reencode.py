@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+# SPDX-License-Identifier: CC0-1.0
+"""Incremental re-encoding of stored PolyhedralEncodings after a table edit.
+
+Each encoding's provenance carries the fingerprints of the keyword maps,
+ontology and equation index it was made with; a SnapshotStore keeps the
+tables behind every fingerprint. plan_reencode diffs a record's tables
+against the encoder's and picks the cheapest action that reproduces a
+fresh encode():
+
+  keep      fingerprints already current
+  restamp   tables changed, but nothing this record depends on
+  derive    glyphs or equation lists changed for ids the record uses;
+            recompute them from the stored counts, no rescan
+  full      a changed keyword occurs in the text, the id layout moved,
+            or the old tables are unknown; encode the payload again
+
+CLI: python polyhedral_bridge.py --reencode PAYLOADS ENCODINGS [OUT] --snapshots DIR
+"""
+
+from __future__ import annotations
+
+import json
+import os
+from array import array
+from collections import Counter
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Iterable, Iterator
+
+from polyhedral_bridge import (
+    PolyhedralEncoder,
+    PolyhedralEncoding,
+    _clone,
+    _columns_above,
+    _payload_to_text_and_tags,
+    get_default_encoder,
+)
+
+REENCODE_ACTIONS = ("keep", "restamp", "derive", "full")
+
+
+class SnapshotStore:
+    """Directory of encoder tables, one JSON file per component fingerprint.
+
+    save(encoder) writes <directory>/<component>/<digest>.json for the
+    keyword, ontology and index tables (skipping ones already stored);
+    load(component, fingerprint) reads one back, or None when unknown.
+    """
+
+    def __init__(self, directory: str | Path) -> None:
+        self.directory = Path(directory)
+        self._loaded: dict[tuple[str, str], Any] = {}
+
+    def _path(self, component: str, fingerprint: str) -> Path:
+        return self.directory / component / f"{fingerprint.split(':', 1)[-1]}.json"
+
+    def save(self, encoder: PolyhedralEncoder) -> None:
+        tables = encoder.snapshot()
+        for component, fingerprint in encoder.fingerprints.items():
+            if fingerprint is None:
+                continue
+            path = self._path(component, fingerprint)
+            if path.exists():
+                continue
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+            tmp.write_text(json.dumps(tables[component], ensure_ascii=False), encoding="utf-8")
+            os.replace(tmp, path)
+
+    def load(self, component: str, fingerprint: str | None) -> Any:
+        if fingerprint is None:
+            return None
+        key = (component, fingerprint)
+        if key not in self._loaded:
+            try:
+                self._loaded[key] = json.loads(self._path(component, fingerprint).read_text(encoding="utf-8"))
+            except (OSError, ValueError):
+                self._loaded[key] = None
+        return self._loaded[key]
+
+
+def _node_hashes(ontology: dict, index: dict[str, str] | None) -> dict[str, tuple[str, ...]]:
+    """id -> deduplicated equation hashes, as _compile_columns resolves them."""
+    index = index or {}
+    return {
+        nid: tuple(dict.fromkeys(index[e] for e in eq_ids if index.get(e)))
+        for nid, eq_ids in ontology["equation_ids"].items()
+    }
+
+
+@dataclass
+class _TableDiff:
+    """What changed between a record's tables and the encoder's (see plan_reencode)."""
+
+    reason: str | None = None  # set when every record needs a full re-encode
+    keywords: tuple[str, ...] = ()  # added or removed keyword strings
+    equation_cols: int = 0  # column mask whose equation lists changed
+    glyph_cols: int = 0  # column mask whose glyphs changed
+
+
+def _diff_tables(old: dict[str, Any], stored: dict[str, str | None], encoder: PolyhedralEncoder) -> _TableDiff:
+    new = encoder.snapshot()
+    # Only the index may legitimately be absent (no index file when encoded).
+    missing = [c for c, table in old.items() if table is None and (c != "index" or stored.get(c) is not None)]
+    if missing:
+        return _TableDiff(reason=f"{', '.join(missing)} tables for these fingerprints are not in the snapshot store")
+    onto_old, onto_new = old["ontology"], new["ontology"]
+    if (onto_old["family_order"], onto_old["principle_order"]) != (onto_new["family_order"], onto_new["principle_order"]):
+        return _TableDiff(reason="family/principle ids changed")
+    kw_old, kw_new = old["keywords"], new["keywords"]
+    scan_old = list(kw_old["family"]) + list(kw_old["principle"])
+    scan_new = list(kw_new["family"]) + list(kw_new["principle"])
+    if scan_old != scan_new:
+        return _TableDiff(reason="keyword map ids changed")
+
+    diff = _TableDiff()
+    changed: dict[str, None] = {}
+    for which in ("family", "principle"):
+        for nid in kw_new[which]:
+            # A keyword listed twice counts twice, so compare multiplicities.
+            before, after = Counter(kw_old[which][nid]), Counter(kw_new[which][nid])
+            changed.update(dict.fromkeys(sorted((before - after) | (after - before))))
+    diff.keywords = tuple(changed)
+
+    hashes_old = _node_hashes(onto_old, old["index"])
+    hashes_new = _node_hashes(onto_new, new["index"])
+    for c, nid in enumerate(onto_new["family_order"] + onto_new["principle_order"]):
+        if hashes_old.get(nid, ()) != hashes_new.get(nid, ()):
+            diff.equation_cols |= 1 << c
+        if onto_old["glyphs"].get(nid) != onto_new["glyphs"].get(nid):
+            diff.glyph_cols |= 1 << c
+    return diff
+
+
+@dataclass
+class ReencodePlan:
+    """Per-record re-encode actions (see REENCODE_ACTIONS), in record order."""
+
+    actions: list[str]
+    reasons: list[str | None]
+
+    def summary(self) -> dict[str, int]:
+        """Number of records per action."""
+        totals = dict.fromkeys(REENCODE_ACTIONS, 0)
+        for action in self.actions:
+            totals[action] += 1
+        return totals
+
+
+def _record_threshold(record: PolyhedralEncoding) -> float:
+    return record.provenance.get("threshold", 0.05)
+
+
+def plan_reencode(
+    payloads: Iterable[Any],
+    records: Iterable[PolyhedralEncoding],
+    snapshots: SnapshotStore,
+    encoder: PolyhedralEncoder | None = None,
+) -> ReencodePlan:
+    """Decide, record by record, the least work that brings records up to encoder's tables.
+
+    payloads[i] is the input records[i] was encoded from. Diffs are made
+    once per distinct set of stored fingerprints; the payload text is only
+    searched, for the changed keywords, when keywords changed.
+    """
+    enc = encoder or get_default_encoder()
+    enc._ensure_fresh()
+    current = enc.fingerprints
+    diffs: dict[tuple, _TableDiff] = {}
+    actions: list[str] = []
+    reasons: list[str | None] = []
+    for payload, record in zip(payloads, records, strict=True):
+        prov = record.provenance
+        stored = prov.get("fingerprints")
+        if stored == current:
+            actions.append("keep")
+            reasons.append(None)
+            continue
+        if stored is None:
+            actions.append("full")
+            reasons.append("no fingerprints in provenance")
+            continue
+        key = tuple(stored.get(c) for c in current)
+        diff = diffs.get(key)
+        if diff is None:
+            old = {c: snapshots.load(c, stored.get(c)) for c in current}
+            diff = diffs[key] = _diff_tables(old, stored, enc)
+        action, reason = _plan_record(diff, payload, record, enc)
+        actions.append(action)
+        reasons.append(reason)
+    return ReencodePlan(actions, reasons)
+
+
+def _plan_record(
+    diff: _TableDiff, payload: Any, record: PolyhedralEncoding, enc: PolyhedralEncoder
+) -> tuple[str, str | None]:
+    if diff.reason is not None:
+        return "full", diff.reason
+    if diff.keywords:
+        # Edits touch a few keywords; direct substring tests beat tokenizing.
+        text_l = _payload_to_text_and_tags(payload)[0].lower()
+        for kw in diff.keywords:
+            if kw in text_l:
+                return "full", f"text contains changed keyword {kw!r}"
+    if not diff.equation_cols and not diff.glyph_cols:
+        return "restamp", None
+    threshold = _record_threshold(record)
+    above = 0
+    present = 0
+    for c, (amp, count) in enumerate(zip(record.amplitudes, record.counts)):
+        if amp > threshold:
+            above |= 1 << c
+        if count:
+            present |= 1 << c
+    order = enc.fam_order + enc.prin_order
+    if above & diff.equation_cols:
+        nid = order[(above & diff.equation_cols).bit_length() - 1]
+        return "derive", f"equation list changed for {nid}"
+    if present & diff.glyph_cols:
+        nid = order[(present & diff.glyph_cols).bit_length() - 1]
+        return "derive", f"glyph changed for {nid}"
+    return "restamp", None
+
+
+def reencode(
+    payloads: Iterable[Any],
+    records: Iterable[PolyhedralEncoding],
+    plan: ReencodePlan,
+    encoder: PolyhedralEncoder | None = None,
+) -> Iterator[PolyhedralEncoding]:
+    """Apply plan: yield each record brought up to the encoder's tables, in order.
+
+    keep yields the record unchanged; restamp updates only
+    provenance["fingerprints"]; derive recomputes glyph and equations from
+    the stored counts; full re-encodes the payload. Each result equals a
+    fresh encode() at the record's threshold, up to the timestamp.
+    """
+    enc = encoder or get_default_encoder()
+    enc._ensure_fresh()
+    n_fam = len(enc.fam_order)
+    for payload, record, action in zip(payloads, records, plan.actions, strict=True):
+        if action == "keep":
+            yield record
+        elif action == "restamp":
+            prov = dict(record.provenance)
+            prov["fingerprints"] = dict(enc.fingerprints)
+            yield _clone(record, prov)
+        elif action == "derive":
+            counts = record.counts.tolist()
+            derived, amplitudes, glyph_signature = enc._derive(
+                dict(zip(enc.fam_order, counts[:n_fam])), dict(zip(enc.prin_order, counts[n_fam:]))
+            )
+            threshold = _record_threshold(record)
+            above = _columns_above(amplitudes, threshold)
+            yield PolyhedralEncoding.from_arrays(
+                enc._fam_ids,
+                enc._prin_ids,
+                derived,
+                array("d", amplitudes),
+                list(enc._resolve_equations(above)),
+                glyph_signature,
+                enc._provenance_args(_payload_to_text_and_tags(payload)[2], threshold),
+            )
+        else:
+            yield enc.encode(payload, threshold=_record_threshold(record))
@@ -0,0 +1,366 @@
+#!/usr/bin/env python3
+# SPDX-License-Identifier: CC0-1.0
+"""Long-running encode service: a warm PolyhedralEncoder behind a local socket.
+
+Running `python polyhedral_bridge.py "<text>"` per request pays for an
+interpreter start, the imports and the ontology parse every time. The
+service pays once, then answers newline-delimited JSON requests on a
+unix socket (or a 127.0.0.1 TCP port):
+
+    {"id": 1, "op": "encode", "payload": "tidal mesh", "threshold": 0.05}
+    -> {"id": 1, "encoding": {... PolyhedralEncoding.to_json() ...}}
+    {"id": 2, "op": "metrics"}
+    -> {"id": 2, "metrics": {"requests": ..., "latency_ms": {"p50": ...}, ...}}
+
+Concurrent requests are gathered into micro-batches: the first queued
+request opens a window of window_ms, and everything that arrives before
+it closes (up to max_batch) goes through one encode_batch() call per
+threshold on a single encoder thread. Requests that arrive while a batch
+is encoding queue up and form the next one, so batches grow with load.
+Encodings equal encode() output (provenance source included).
+
+The client half (request / encode_via_service) is stdlib-only and never
+imports the bridge; it returns None when no service is listening, which
+is how `poly bridge encode` decides whether to use one.
+
+Run:
+    python bridge_service.py [--socket PATH | --port N] [--window-ms 2] [--max-batch 256]
+    python bridge_service.py --metrics [--socket PATH | --port N]
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import socket
+import sys
+import tempfile
+import time
+from collections import deque
+from typing import Any
+
+# The server half imports the bridge on first use, so a client-only
+# import does not pay for the ontology parse.
+
+ENCODING_SOURCE = "polyhedral_bridge.encode"
+
+# Longest request line the service reads; asyncio's own default is 64 KiB.
+MAX_LINE = 64 << 20
+
+
+def default_socket_path() -> str:
+    """$POLYHEDRAL_BRIDGE_SOCKET, else a per-user socket in the temp directory."""
+    path = os.environ.get("POLYHEDRAL_BRIDGE_SOCKET")
+    if path:
+        return path
+    uid = os.getuid() if hasattr(os, "getuid") else os.getpid()
+    return os.path.join(tempfile.gettempdir(), f"polyhedral-bridge-{uid}.sock")
+
+
+def _percentile(ordered: list[float], q: float) -> float | None:
+    """Nearest-rank percentile of an ascending list."""
+    if not ordered:
+        return None
+    rank = max(1, -(-len(ordered) * q // 100))
+    return ordered[int(rank) - 1]
+
+
+class EncodeService:
+    """Micro-batching front end to one warm PolyhedralEncoder.
+
+    submit() queues a payload and resolves to its to_json() dict; the
+    batcher task drains the queue into batches (see module docstring).
+    metrics() reports request/batch counts, queue depth and latency
+    percentiles over the last latency_window requests. Request lines
+    longer than max_line bytes get an {"error": ...} reply.
+    """
+
+    latency_window = 10_000
+
+    def __init__(
+        self, encoder: Any = None, window_ms: float = 2.0, max_batch: int = 256, max_line: int = MAX_LINE
+    ) -> None:
+        if encoder is None:
+            from polyhedral_bridge import PolyhedralEncoder
+
+            encoder = PolyhedralEncoder()
+        from concurrent.futures import ThreadPoolExecutor
+
+        self.encoder = encoder
+        self.window = window_ms / 1000.0
+        self.max_batch = max_batch
+        self.max_line = max_line
+        self._queue: asyncio.Queue | None = None
+        # One thread: the encoder's memo tables are not thread-safe.
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="bridge-encode")
+        self._latencies: deque[float] = deque(maxlen=self.latency_window)
+        self.started = time.time()
+        self.requests = 0
+        self.errors = 0
+        self.batches = 0
+        self.batched_items = 0
+        self.max_batch_seen = 0
+        self.max_queue_depth = 0
+        self.in_flight = 0
+
+    async def submit(self, payload: Any, threshold: float = 0.05) -> dict:
+        if self._queue is None:
+            self._queue = asyncio.Queue()
+        fut = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((payload, float(threshold), fut, time.perf_counter()))
+        self.max_queue_depth = max(self.max_queue_depth, self._queue.qsize())
+        return await fut
+
+    async def run_batcher(self) -> None:
+        """Collect and dispatch batches until cancelled."""
+        if self._queue is None:
+            self._queue = asyncio.Queue()
+        queue = self._queue
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await queue.get()]
+            deadline = loop.time() + self.window
+            while len(batch) < self.max_batch:
+                if queue.empty():
+                    timeout = deadline - loop.time()
+                    if timeout <= 0:
+                        break
+                    try:
+                        batch.append(await asyncio.wait_for(queue.get(), timeout))
+                    except asyncio.TimeoutError:
+                        break
+                else:
+                    batch.append(queue.get_nowait())
+            self.in_flight = len(batch)
+            results = await loop.run_in_executor(self._executor, self._encode_items, batch)
+            self.in_flight = 0
+            self.batches += 1
+            self.batched_items += len(batch)
+            self.max_batch_seen = max(self.max_batch_seen, len(batch))
+            done = time.perf_counter()
+            for (_payload, _threshold, fut, t0), (ok, value) in zip(batch, results):
+                self.requests += 1
+                self._latencies.append(done - t0)
+                if fut.done():  # client went away
+                    continue
+                if ok:
+                    fut.set_result(value)
+                else:
+                    self.errors += 1
+                    fut.set_exception(ValueError(value))
+
+    def _encode_items(self, batch: list[tuple]) -> list[tuple[bool, Any]]:
+        """Encoder thread: one encode_batch() per distinct threshold, results in batch order."""
+        results: list[tuple[bool, Any]] = [(False, "not encoded")] * len(batch)
+        groups: dict[float, list[int]] = {}
+        for i, (_payload, threshold, _fut, _t0) in enumerate(batch):
+            groups.setdefault(threshold, []).append(i)
+        for threshold, rows in groups.items():
+            payloads = [batch[i][0] for i in rows]
+            try:
+                encoded = self.encoder.encode_batch(payloads, threshold=threshold)
+                docs = [encoded.row(j, source=ENCODING_SOURCE).to_json() for j in range(len(rows))]
+                for i, doc in zip(rows, docs):
+                    results[i] = (True, doc)
+            except Exception:  # numpy missing or one bad payload: fall back row by row
+                for i, payload in zip(rows, payloads):
+                    try:
+                        results[i] = (True, self.encoder.encode(payload, threshold=threshold).to_json())
+                    except Exception as e:
+                        results[i] = (False, f"{type(e).__name__}: {e}")
+        return results
+
+    def metrics(self) -> dict[str, Any]:
+        ordered = [t * 1000 for t in sorted(self._latencies)]
+        ms = {f"p{q}": _percentile(ordered, q) for q in (50, 95, 99)}
+        return {
+            "uptime_s": time.time() - self.started,
+            "requests": self.requests,
+            "errors": self.errors,
+            "batches": self.batches,
+            "mean_batch": self.batched_items / self.batches if self.batches else 0.0,
+            "max_batch": self.max_batch_seen,
+            "queue_depth": self._queue.qsize() if self._queue is not None else 0,
+            "max_queue_depth": self.max_queue_depth,
+            "in_flight": self.in_flight,
+            "window_ms": self.window * 1000,
+            "latency_ms": ms,
+        }
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """Serve one connection; requests may be pipelined, replies carry the request id."""
+        pending: set[asyncio.Task] = set()
+        try:
+            while True:
+                try:
+                    line = await reader.readuntil(b"\n")
+                except asyncio.IncompleteReadError as e:
+                    line = e.partial  # last request without a newline, or EOF
+                except asyncio.LimitOverrunError:
+                    await self._skip_line(reader)
+                    line = None
+                if line is None or line.strip():
+                    task = asyncio.create_task(self._reply(line, writer))
+                    pending.add(task)
+                    task.add_done_callback(pending.discard)
+                elif not line:
+                    break
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+        finally:
+            writer.close()
+
+    @staticmethod
+    async def _skip_line(reader: asyncio.StreamReader) -> None:
+        """Discard buffered input through the end of an over-long line."""
+        while True:
+            try:
+                await reader.readuntil(b"\n")
+                return
+            except asyncio.LimitOverrunError as e:
+                await reader.readexactly(e.consumed)
+            except asyncio.IncompleteReadError:
+                return
+
+    async def _reply(self, line: bytes | None, writer: asyncio.StreamWriter) -> None:
+        """Answer one request line; None stands for a line longer than max_line."""
+        rid = None
+        try:
+            if line is None:
+                raise ValueError(f"request line longer than {self.max_line} bytes")
+            msg = json.loads(line)
+            rid = msg.get("id")
+            op = msg.get("op", "encode")
+            if op == "encode":
+                reply = {"encoding": await self.submit(msg["payload"], msg.get("threshold", 0.05))}
+            elif op == "metrics":
+                reply = {"metrics": self.metrics()}
+            else:
+                reply = {"error": f"unknown op {op!r}"}
+        except (ValueError, KeyError, TypeError, AttributeError) as e:
+            reply = {"error": f"{type(e).__name__}: {e}"}
+        reply["id"] = rid
+        writer.write((json.dumps(reply, ensure_ascii=False) + "\n").encode("utf-8"))
+        try:
+            await writer.drain()
+        except ConnectionError:
+            pass
+
+    async def serve(self, socket_path: str | None = None, port: int | None = None, ready=None) -> None:
+        """Listen until cancelled (or SIGINT/SIGTERM); ready(), if given, runs once bound."""
+        import signal
+
+        batcher = asyncio.create_task(self.run_batcher())
+        if port is not None:
+            server = await asyncio.start_server(self.handle, "127.0.0.1", port, limit=self.max_line)
+        else:
+            socket_path = socket_path or default_socket_path()
+            if request({"op": "metrics"}, socket_path=socket_path, timeout=1.0) is not None:
+                raise RuntimeError(f"a service is already listening on {socket_path}")
+            if os.path.exists(socket_path):
+                os.unlink(socket_path)  # stale socket from a crashed run
+            server = await asyncio.start_unix_server(self.handle, path=socket_path, limit=self.max_line)
+        loop = asyncio.get_running_loop()
+        stop = loop.create_future()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            try:
+                loop.add_signal_handler(sig, lambda: stop.done() or stop.set_result(None))
+            except (NotImplementedError, RuntimeError, ValueError):
+                pass  # not the main thread, or no signal support
+        try:
+            if ready is not None:
+                ready()
+            async with server:
+                await stop
+        finally:
+            batcher.cancel()
+            self._executor.shutdown(wait=False)
+            if port is None and socket_path and os.path.exists(socket_path):
+                os.unlink(socket_path)
+
+
+def _connect(socket_path: str | None, port: int | None, timeout: float) -> socket.socket | None:
+    try:
+        if port is not None:
+            return socket.create_connection(("127.0.0.1", port), timeout=timeout)
+        path = socket_path or default_socket_path()
+        if not hasattr(socket, "AF_UNIX") or not os.path.exists(path):
+            return None
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(timeout)
+        try:
+            sock.connect(path)
+        except OSError:
+            sock.close()
+            raise
+        return sock
+    except (ConnectionRefusedError, FileNotFoundError, socket.timeout):
+        return None
+
+
+def request(
+    message: dict, socket_path: str | None = None, port: int | None = None, timeout: float = 10.0
+) -> dict | None:
+    """One request/reply round trip; None when no service is listening."""
+    sock = _connect(socket_path, port, timeout)
+    if sock is None:
+        return None
+    with sock:
+        sock.sendall((json.dumps(message, ensure_ascii=False) + "\n").encode("utf-8"))
+        buf = b""
+        while not buf.endswith(b"\n"):
+            chunk = sock.recv(1 << 16)
+            if not chunk:
+                return None
+            buf += chunk
+    return json.loads(buf)
+
+
+def encode_via_service(
+    payload: Any, threshold: float = 0.05, socket_path: str | None = None, port: int | None = None
+) -> dict | None:
+    """to_json() of payload from a running service, or None when none is listening.
+
+    Raises ValueError when the service rejects the payload.
+    """
+    reply = request({"op": "encode", "payload": payload, "threshold": threshold}, socket_path, port)
+    if reply is None:
+        return None
+    if "error" in reply:
+        raise ValueError(reply["error"])
+    return reply["encoding"]
+
+
+def main(argv: list[str] | None = None) -> int:
+    import argparse
+
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    where = ap.add_mutually_exclusive_group()
+    where.add_argument("--socket", help=f"unix socket path (default {default_socket_path()})")
+    where.add_argument("--port", type=int, help="listen on 127.0.0.1:PORT instead of a unix socket")
+    ap.add_argument("--window-ms", type=float, default=2.0, help="micro-batch collection window")
+    ap.add_argument("--max-batch", type=int, default=256, help="largest batch handed to encode_batch")
+    ap.add_argument("--metrics", action="store_true", help="print a running service's metrics and exit")
+    opts = ap.parse_args(argv)
+
+    if opts.metrics:
+        reply = request({"op": "metrics"}, socket_path=opts.socket, port=opts.port)
+        if reply is None:
+            print("error: no service is listening", file=sys.stderr)
+            return 1
+        print(json.dumps(reply["metrics"], indent=2))
+        return 0
+
+    service = EncodeService(window_ms=opts.window_ms, max_batch=opts.max_batch)
+    where = f"127.0.0.1:{opts.port}" if opts.port is not None else opts.socket or default_socket_path()
+    try:
+        asyncio.run(service.serve(opts.socket, opts.port, ready=lambda: print(f"listening on {where}", file=sys.stderr)))
+    except RuntimeError as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,678 @@
+# SPDX-License-Identifier: CC0-1.0
+"""Copy-on-write branch state and the node table shared by the MRP explorers.
+
+Every ``select()`` clones the current state into a child node. Copying the
+whole state made a step cost O(depth), because history and annotations grow
+with every step and ``atlas_entry`` embeds them. Here a clone shares every
+field with its parent:
+
+- ``PersistentList`` fields (history, annotations, glyph library) share all
+  items that existed at clone time and only store what the child appends;
+- every other field is shared by reference. Branch code assigns new values
+  (``state.family_resonance = vec["families"]``) and never mutates a value
+  it inherited, so parent and child stay independent.
+
+A clone therefore costs O(number of fields), whatever the depth.
+
+The tree itself lives in a ``NodeTable``: parallel arrays of parent row,
+interned choice id, entropy cost and cumulative cost from the root, plus
+first-child / next-sibling links and one state handle per row. A node's id is its row, so lookup is O(1).
+``TreeNode`` is a two-field handle onto a row, created on access, with the
+attributes the explorers always used (``id``, ``state``, ``choice``,
+``parent``, ``children``, ``entropy_cost``).
+
+``save_tree`` streams a tree to JSON lines: a header, then one record per
+row in row order (so parents come first) holding the parent id, choice,
+entropy cost and, last, the state as a delta against the parent's, which
+keeps the file linear in the number of steps. ``load_tree`` indexes such a
+file in one pass that parses only each record's fixed prefix, and reads a
+node's state from it the first time it is used.
+"""
+
+from __future__ import annotations
+
+import json
+import math
+import os
+from array import array
+from collections.abc import Sequence
+from itertools import chain
+from typing import Any, Iterator
+
+__all__ = [
+    "BranchStateBase", "EntropyBudgetExceeded", "FrozenDict", "FrozenList", "NodeTable", "PersistentList",
+    "TreeNode", "advance", "load_tree", "save_tree",
+]
+
+BRANCH_FORMAT = "mrp-branch"
+BRANCH_VERSION = 2
+# Every record is {"id", "parent", "choice", "entropy_cost", "state"} in that
+# order. Quotes inside JSON strings are escaped, so the first STATE_MARK
+# in a line always starts the state payload.
+_STATE_MARK = b', "state": '
+_TAGS = ("__tuple__", "__set__", "__dict__")
+
+_NUMPY: Any = False
+
+
+def _numpy():
+    """numpy, or None when it is not installed (imported on first use)."""
+    global _NUMPY
+    if _NUMPY is False:
+        try:
+            import numpy as _NUMPY
+        except ImportError:
+            _NUMPY = None
+    return _NUMPY
+
+
+class PersistentList(Sequence):
+    """Append-only list whose copies share the items they were copied with.
+
+    Items live in a chain of frozen segments ``(previous, items, length)``
+    plus a private tail. ``copy()`` freezes the tail into a new segment
+    that both lists point at, so copying is O(1) amortized and a copy
+    stores only what is appended to it afterwards. The tail is allocated
+    on the first append, so a copy that never grows costs one small object.
+    """
+
+    __slots__ = ("_frozen", "_tail")
+
+    def __init__(self, items=()):
+        self._frozen: tuple | None = None
+        self._tail: list | tuple = list(items) or ()  # () until the first append
+
+    def append(self, item: Any) -> None:
+        if type(self._tail) is tuple:
+            self._tail = [item]
+        else:
+            self._tail.append(item)
+
+    def extend(self, items) -> None:
+        if type(self._tail) is tuple:
+            self._tail = list(items) or ()
+        else:
+            self._tail.extend(items)
+
+    def copy(self) -> "PersistentList":
+        if self._tail:
+            self._frozen = (self._frozen, tuple(self._tail), len(self))
+            self._tail = ()
+        out = PersistentList.__new__(PersistentList)
+        out._frozen = self._frozen
+        out._tail = ()
+        return out
+
+    def since(self, other: "PersistentList | None") -> tuple[int, list]:
+        """``(keep, items)`` such that self is other's first ``keep`` items followed by items.
+
+        ``keep`` is the prefix the two lists share through ``copy()``, so
+        this walks only the segments added on either side since then.
+        """
+        mine, theirs = self._frozen, other._frozen if other is not None else None
+        segments = [self._tail]
+        while mine is not theirs:
+            if theirs is None or (mine is not None and mine[2] >= theirs[2]):
+                segments.append(mine[1])
+                mine = mine[0]
+            else:
+                theirs = theirs[0]
+        segments.reverse()
+        return (mine[2] if mine else 0), list(chain.from_iterable(segments))
+
+    def _segments(self) -> list[tuple]:
+        out = []
+        node = self._frozen
+        while node is not None:
+            out.append(node[1])
+            node = node[0]
+        out.reverse()
+        return out
+
+    def __len__(self) -> int:
+        return (self._frozen[2] if self._frozen else 0) + len(self._tail)
+
+    def __iter__(self) -> Iterator:
+        return chain(chain.from_iterable(self._segments()), self._tail)
+
+    def __reversed__(self) -> Iterator:
+        return reversed(list(self))
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return list(self)[index]
+        n = len(self)
+        i = index + n if index < 0 else index
+        if not 0 <= i < n:
+            raise IndexError("PersistentList index out of range")
+        frozen = n - len(self._tail)
+        if i >= frozen:
+            return self._tail[i - frozen]
+        node = self._frozen
+        while i < node[2] - len(node[1]):
+            node = node[0]
+        return node[1][i - (node[2] - len(node[1]))]
+
+    def __eq__(self, other):
+        if isinstance(other, (PersistentList, list)):
+            return len(self) == len(other) and list(self) == list(other)
+        return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        return f"PersistentList({list(self)!r})"
+
+
+def _read_only(self, *args, **kwargs):
+    raise TypeError(f"{type(self).__name__} is shared between branches; assign a new value instead")
+
+
+class FrozenDict(dict):
+    """A dict that refuses mutation: what a dict field becomes once branches share it."""
+
+    __slots__ = ()
+    __setitem__ = __delitem__ = __ior__ = clear = pop = popitem = setdefault = update = _read_only
+
+    def __reduce__(self):
+        return (type(self), (dict(self),))
+
+
+class FrozenList(list):
+    """A list that refuses mutation, for lists nested in a shared field."""
+
+    __slots__ = ()
+    __setitem__ = __delitem__ = __iadd__ = __imul__ = _read_only
+    append = extend = insert = pop = remove = clear = sort = reverse = _read_only
+
+    def __reduce__(self):
+        return (type(self), (list(self),))
+
+
+def _freeze(value: Any) -> Any:
+    """value with every dict, list and set inside it made read-only (copied once, then shared)."""
+    kind = type(value)
+    if kind is dict:
+        return FrozenDict({k: _freeze(v) for k, v in value.items()})
+    if kind is list:
+        return FrozenList([_freeze(v) for v in value])
+    if kind is set:
+        return frozenset(value)
+    return value
+
+
+class BranchStateBase:
+    """Base for explorer ``BranchState`` classes with an O(1) ``clone()``.
+
+    Subclasses declare their fields in ``__init__`` as usual, with
+    ``PersistentList`` for the append-only ones. Fields holding plain lists
+    are still copied, so code that assigns one keeps the old semantics.
+    Dict and set fields become shared once cloned, so ``clone()`` swaps
+    them (in parent and child) for a deep read-only copy: ``FrozenDict``
+    (still a dict, so it serializes and type-checks as one), with nested
+    dicts and lists frozen too, or a ``frozenset``. Mutating an inherited
+    value raises TypeError instead of leaking into every branch; assign a
+    new dict to change such a field.
+    """
+
+    def clone(self):
+        fields = self.__dict__
+        for name, value in fields.items():
+            if type(value) is dict or type(value) is set:
+                fields[name] = _freeze(value)
+        fields = fields.copy()
+        for name, value in fields.items():
+            if type(value) is PersistentList or type(value) is list:
+                fields[name] = value.copy()
+        s = object.__new__(type(self))
+        s.__dict__ = fields
+        return s
+
+
+class NodeTable:
+    """Exploration tree stored as parallel arrays, one row per node (row 0 is the root)."""
+
+    def __init__(self, root_state: Any, root_choice: str = "root"):
+        self.parent = array("q")
+        self.choice = array("I")
+        self.entropy_cost = array("d")
+        self.cumulative = array("d")
+        self.first_child = array("q")
+        self.last_child = array("q")
+        self.next_sibling = array("q")
+        self.states: list[Any] = []
+        self.choices: list[str] = []
+        self._choice_ids: dict[str, int] = {}
+        self.add(-1, root_state, root_choice, 0.0)
+
+    def __len__(self) -> int:
+        return len(self.parent)
+
+    def add(self, parent: int, state: Any, choice: str, entropy_cost: float) -> int:
+        """Append a row under parent (-1 for none) and return its index."""
+        cid = self._choice_ids.get(choice)
+        if cid is None:
+            cid = self._choice_ids[choice] = len(self.choices)
+            self.choices.append(choice)
+        row = len(self.parent)
+        self.parent.append(parent)
+        self.choice.append(cid)
+        self.entropy_cost.append(entropy_cost)
+        self.cumulative.append(entropy_cost + self.cumulative[parent] if parent >= 0 else entropy_cost)
+        self.first_child.append(-1)
+        self.last_child.append(-1)
+        self.next_sibling.append(-1)
+        self.states.append(state)
+        if parent >= 0:
+            if self.last_child[parent] < 0:
+                self.first_child[parent] = row
+            else:
+                self.next_sibling[self.last_child[parent]] = row
+            self.last_child[parent] = row
+        return row
+
+    def node(self, row: int) -> "TreeNode":
+        if not 0 <= row < len(self.parent):
+            raise KeyError(f"no node {row!r}")
+        node = TreeNode.__new__(TreeNode)
+        node._table = self
+        node._row = row
+        return node
+
+    def children(self, row: int) -> Iterator[int]:
+        child = self.first_child[row]
+        while child >= 0:
+            yield child
+            child = self.next_sibling[child]
+
+    def find_child(self, row: int, choice: str) -> int:
+        """First child of row made by choice, or -1."""
+        cid = self._choice_ids.get(choice)
+        if cid is not None:
+            for child in self.children(row):
+                if self.choice[child] == cid:
+                    return child
+        return -1
+
+    def walk(self, row: int = 0) -> Iterator[int]:
+        """Rows of the subtree under row in depth-first pre-order, without recursion."""
+        first, sibling = self.first_child, self.next_sibling
+        yield row
+        child = first[row]
+        stack = []
+        while child >= 0:
+            yield child
+            if first[child] >= 0:
+                stack.append(sibling[child])
+                child = first[child]
+            else:
+                child = sibling[child]
+            while child < 0 and stack:
+                child = stack.pop()
+
+    def set_entropy_cost(self, row: int, value: float) -> None:
+        """Change one row's cost and refresh the cumulative cost of its subtree."""
+        self.entropy_cost[row] = value
+        cost, cumulative, parent = self.entropy_cost, self.cumulative, self.parent
+        for r in self.walk(row):
+            p = parent[r]
+            cumulative[r] = cost[r] + cumulative[p] if p >= 0 else cost[r]
+
+    def frontier(self, budget: float) -> list[int]:
+        """Leaf rows whose cumulative entropy cost is within budget, in row order."""
+        np = _numpy()
+        if np is None:
+            return [r for r, (first, total) in enumerate(zip(self.first_child, self.cumulative)) if first < 0 and total <= budget]
+        first = np.frombuffer(self.first_child, dtype=np.int64)
+        total = np.frombuffer(self.cumulative, dtype=np.float64)
+        return np.flatnonzero((first < 0) & (total <= budget)).tolist()
+
+    def path(self, row: int) -> list[int]:
+        """Rows from the root down to row."""
+        out = []
+        while row >= 0:
+            out.append(row)
+            row = self.parent[row]
+        out.reverse()
+        return out
+
+
+class TreeNode:
+    """A node of a NodeTable, or a detached node waiting for ``parent.add_child()``.
+
+    ``select()`` builds its child detached, so a choice that returns early
+    (or raises) leaves the tree untouched. Handles are created on access;
+    compare nodes with ``==``, not ``is``.
+    """
+
+    __slots__ = ("_table", "_row", "_pending")
+
+    def __init__(self, state: Any, choice: str = "root", parent: "TreeNode | None" = None, entropy_cost: float = 0.0):
+        self._table: NodeTable | None = None
+        self._row = -1
+        self._pending = [state, choice, parent, entropy_cost]
+
+    @property
+    def id(self) -> int | None:
+        return self._row if self._table is not None else None
+
+    @property
+    def state(self) -> Any:
+        return self._table.states[self._row] if self._table is not None else self._pending[0]
+
+    @property
+    def choice(self) -> str:
+        if self._table is None:
+            return self._pending[1]
+        return self._table.choices[self._table.choice[self._row]]
+
+    @property
+    def parent(self) -> "TreeNode | None":
+        if self._table is None:
+            return self._pending[2]
+        row = self._table.parent[self._row]
+        return self._table.node(row) if row >= 0 else None
+
+    @property
+    def children(self) -> list["TreeNode"]:
+        if self._table is None:
+            return []
+        return [self._table.node(row) for row in self._table.children(self._row)]
+
+    @property
+    def entropy_cost(self) -> float:
+        return self._table.entropy_cost[self._row] if self._table is not None else self._pending[3]
+
+    @entropy_cost.setter
+    def entropy_cost(self, value: float) -> None:
+        if self._table is None:
+            self._pending[3] = value
+        else:
+            self._table.set_entropy_cost(self._row, value)
+
+    @property
+    def annotations(self):
+        return self.state.annotations
+
+    def add_child(self, child: "TreeNode") -> None:
+        if self._table is None:
+            raise ValueError("add_child() needs a node that is already in a tree")
+        if child._table is not None:
+            raise ValueError("node is already in a tree")
+        state, choice, _parent, cost = child._pending
+        child._row = self._table.add(self._row, state, choice, cost)
+        child._table = self._table
+        child._pending = None
+
+    def total_entropy_cost(self) -> float:
+        if self._table is None:
+            parent = self._pending[2]
+            return self._pending[3] + (parent.total_entropy_cost() if parent is not None else 0.0)
+        return self._table.cumulative[self._row]
+
+    def __eq__(self, other):
+        if not isinstance(other, TreeNode):
+            return NotImplemented
+        if self._table is None or other._table is None:
+            return self is other
+        return self._table is other._table and self._row == other._row
+
+    def __hash__(self):
+        return hash((id(self._table), self._row)) if self._table is not None else id(self)
+
+    def __repr__(self) -> str:
+        return f"TreeNode(id={self.id!r}, choice={self.choice!r})"
+
+
+class EntropyBudgetExceeded(ValueError):
+    """A move would take its branch past the explorer's entropy_budget."""
+
+
+def advance(explorer: Any, child: TreeNode) -> None:
+    """File child under explorer.current and make it current, checking explorer.entropy_budget.
+
+    ``explorer.budget_mode`` decides what happens to a move whose branch
+    total would exceed the budget: "flag" files it with an annotation,
+    "refuse" raises EntropyBudgetExceeded and leaves the tree unchanged,
+    and None skips the check.
+    """
+    mode = explorer.budget_mode
+    if mode is not None:
+        total = explorer.current.total_entropy_cost() + child.entropy_cost
+        if total > explorer.entropy_budget:
+            if mode == "refuse":
+                raise EntropyBudgetExceeded(
+                    f"{child.choice!r} would bring the branch to entropy {total:.2f}, over the budget of {explorer.entropy_budget:.2f}"
+                )
+            child.annotations.append(f"Over entropy budget: {total:.2f} > {explorer.entropy_budget:.2f}")
+    explorer.current.add_child(child)
+    explorer.current = child
+
+
+_UNLOADED = object()
+
+
+def _encode(value: Any) -> Any:
+    """value as JSON data, tagging the types JSON would lose (tuple, set) so loading restores them."""
+    kind = type(value)
+    if kind is str or kind is float or kind is int or kind is bool or value is None:
+        return value
+    if kind is list or kind is PersistentList or kind is FrozenList:
+        return [v if type(v) is str else _encode(v) for v in value]  # mostly annotation strings
+    if kind is tuple:
+        return {"__tuple__": [_encode(v) for v in value]}
+    if kind is set or kind is frozenset:
+        return {"__set__": [_encode(v) for v in value]}
+    if kind is dict or kind is FrozenDict:
+        out = {k: _encode(v) for k, v in value.items()}
+        return {"__dict__": out} if len(out) == 1 and next(iter(out)) in _TAGS else out
+    raise TypeError(f"cannot save a {kind.__name__} in a branch file")
+
+
+def _decode(value: Any) -> Any:
+    """Inverse of _encode()."""
+    if type(value) is list:
+        return [_decode(v) for v in value]
+    if type(value) is not dict:
+        return value
+    if len(value) == 1:
+        tag, inner = next(iter(value.items()))
+        if tag == "__tuple__":
+            return tuple(_decode(v) for v in inner)
+        if tag == "__set__":
+            return {_decode(v) for v in inner}
+        if tag == "__dict__":
+            return {k: _decode(v) for k, v in inner.items()}
+    return {k: _decode(v) for k, v in value.items()}
+
+
+def _state_delta(state: Any, parent: Any) -> dict:
+    """The fields of state that differ from parent's, as stored by save_tree()."""
+    old = parent.__dict__ if parent is not None else {}
+    fields, lists = {}, {}
+    for name, value in state.__dict__.items():
+        prev = old.get(name, _UNLOADED)
+        if type(value) is PersistentList:
+            prev = prev if type(prev) is PersistentList else None
+            keep, items = value.since(prev)
+            if prev is None or items or keep != len(prev):
+                lists[name] = [keep, _encode(items)]
+        elif prev is _UNLOADED or (value != prev if type(value) is list else value is not prev):
+            fields[name] = _encode(value)
+    delta = {}
+    if fields:
+        delta["fields"] = fields
+    if lists:
+        delta["lists"] = lists
+    return delta
+
+
+def _apply_delta(delta: dict, parent: Any, state_type: type) -> Any:
+    """Rebuild a state from its parent's and a _state_delta() record."""
+    if parent is None:
+        state = object.__new__(state_type)
+        state.__dict__ = {}
+    else:
+        state = parent.clone()
+    fields = state.__dict__
+    for name, value in delta.get("fields", {}).items():
+        fields[name] = _decode(value)
+    for name, (keep, items) in delta.get("lists", {}).items():
+        items = _decode(items)
+        current = fields.get(name)
+        if type(current) is PersistentList and keep == len(current):
+            current.extend(items)
+        else:
+            fields[name] = PersistentList((current[:keep] if current is not None else []) + items)
+    return state
+
+
+class _LazyStates(list):
+    """NodeTable.states for a loaded file: rows hold _UNLOADED until first read."""
+
+    def __init__(self, states: list, table: NodeTable, path: str, offsets: array, state_type: type):
+        super().__init__(states)
+        self.parent = table.parent
+        self.path = path
+        self.offsets = offsets
+        self.state_type = state_type
+        self._file = None
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        state = list.__getitem__(self, index)
+        return self._load(index % len(self)) if state is _UNLOADED else state
+
+    def __iter__(self) -> Iterator:
+        return (self[i] for i in range(len(self)))
+
+    def unloaded(self, row: int) -> bool:
+        return list.__getitem__(self, row) is _UNLOADED
+
+    def _load(self, row: int) -> Any:
+        """Read row's state, and any unread ancestors' on the way, from the file."""
+        rows = []
+        while row >= 0 and list.__getitem__(self, row) is _UNLOADED:
+            rows.append(row)
+            row = self.parent[row]
+        state = list.__getitem__(self, row) if row >= 0 else None
+        for row in reversed(rows):
+            state = _apply_delta(json.loads(self.payload(row)), state, self.state_type)
+            list.__setitem__(self, row, state)
+        return state
+
+    def record(self, row: int) -> dict:
+        """The saved record of row, without loading anything."""
+        return json.loads(self.line(row))
+
+    def payload(self, row: int) -> bytes:
+        """The raw state payload of row's record."""
+        line = self.line(row)
+        return line[line.index(_STATE_MARK) + len(_STATE_MARK):line.rindex(b"}")]
+
+    def line(self, row: int) -> bytes:
+        if self._file is None:
+            self._file = open(self.path, "rb")
+        self._file.seek(self.offsets[row])
+        return self._file.readline()
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+def save_tree(explorer: Any, filepath: str) -> int:
+    """Stream explorer's tree to filepath, one JSON line per node, and return the node count.
+
+    Rows are written in order without recursion or building the tree in
+    memory. Rows of a loaded tree that were never read are copied from
+    the source file unparsed. The file is written next to filepath and
+    moved into place, so it can overwrite the file the tree came from.
+    """
+    table = explorer.tree
+    states = table.states
+    lazy = states if type(states) is _LazyStates else None
+    header = {
+        "format": BRANCH_FORMAT,
+        "version": BRANCH_VERSION,
+        "explorer": f"{type(explorer).__module__}.{type(explorer).__qualname__}",
+        "atlas": getattr(explorer, "atlas_path", None),
+        "nodes": len(table),
+        "current": explorer.current.id,
+        "entropy_budget": explorer.entropy_budget,
+        "budget_mode": explorer.budget_mode,
+    }
+    offsets = array("q")
+    choices: list[str] = []
+    tmp = f"{filepath}.tmp"
+    with open(tmp, "wb") as f:
+        pos = f.write((json.dumps(header) + "\n").encode("utf-8"))
+        for row in range(len(table)):
+            offsets.append(pos)
+            if lazy is not None and lazy.unloaded(row):
+                pos += f.write(lazy.line(row))
+                continue
+            parent = table.parent[row]
+            cid = table.choice[row]
+            while cid >= len(choices):  # each distinct choice is encoded once
+                choices.append(json.dumps(table.choices[len(choices)], ensure_ascii=False))
+            cost = table.entropy_cost[row]
+            state = _state_delta(states[row], states[parent] if parent >= 0 else None)
+            line = (
+                f'{{"id": {row}, "parent": {parent}, "choice": {choices[cid]}, '
+                f'"entropy_cost": {repr(cost) if math.isfinite(cost) else json.dumps(cost)}, '
+                f'"state": {json.dumps(state, ensure_ascii=False)}}}\n'
+            )
+            pos += f.write(line.encode("utf-8"))
+    if lazy is not None and os.path.exists(filepath) and os.path.samefile(lazy.path, filepath):
+        lazy.close()
+        lazy.offsets = offsets
+    os.replace(tmp, filepath)
+    return len(table)
+
+
+def load_tree(explorer_type: type, filepath: str, atlas_path: str | None = None) -> Any:
+    """An explorer_type explorer holding the tree saved in filepath, positioned at its saved current node.
+
+    One pass over the file fills the row arrays from each record's prefix,
+    leaving the state payloads unparsed on disk until a node's state is
+    first read, which loads it and its unread ancestors.
+    The atlas defaults to the one recorded in the file.
+    """
+    offsets = array("q")
+    table = None
+    with open(filepath, "rb") as f:
+        line = f.readline()
+        header = json.loads(line) if line.strip() else None
+        if not isinstance(header, dict) or header.get("format") != BRANCH_FORMAT:
+            raise ValueError(f"{filepath} is not a save_branch() file")
+        if header.get("version") != BRANCH_VERSION:
+            raise ValueError(f"{filepath}: branch file version {header.get('version')!r}, expected {BRANCH_VERSION}")
+        pos = len(line)
+        for line in f:
+            cut = line.find(_STATE_MARK)
+            if cut < 0:
+                raise ValueError(f"{filepath}: record at byte {pos} has no state")
+            record = json.loads(line[:cut].decode("utf-8") + "}")
+            offsets.append(pos)
+            pos += len(line)
+            if table is None:
+                table = NodeTable(_UNLOADED, record["choice"])
+                table.entropy_cost[0] = table.cumulative[0] = record["entropy_cost"]
+                row = 0
+            else:
+                row = table.add(record["parent"], _UNLOADED, record["choice"], record["entropy_cost"])
+            if record["id"] != row:
+                raise ValueError(f"{filepath}: record {record['id']!r} found at row {row}")
+    if table is None:
+        raise ValueError(f"{filepath} has no nodes")
+    explorer = explorer_type(atlas_path or header["atlas"])
+    table.states = _LazyStates(table.states, table, os.path.abspath(filepath), offsets, type(explorer.root.state))
+    explorer.tree = table
+    explorer.root = table.node(0)
+    explorer.current = table.node(header["current"])
+    explorer.entropy_budget = header["entropy_budget"]
+    explorer.budget_mode = header["budget_mode"]
+    return explorer
@@ -0,0 +1,470 @@
+#!/usr/bin/env python3
+# SPDX-License-Identifier: CC0-1.0
+"""Automated MRP search over explorer choices: beam search and MCTS.
+
+Both drivers grow the explorer's own tree from ``explorer.current``
+through ``select()``, so every path they try can be inspected, saved and
+resumed like a hand-driven session.
+
+- A *move generator* lists the choice strings to try at a node.
+  ``glyph_moves`` offers the MRP steps that change the glyph (sweeps, seed
+  glyph, bridge glyphs, corrective evolution) and a merge of the current
+  glyph with every family / principle symbol it does not carry yet.
+- An *objective* scores a state: ``objective(explorer, state) -> float``,
+  higher is better. ``spin_balance`` is the spin test's share of balanced
+  families and principles, where a symbol carried by the glyph also
+  balances. ``conflict_count`` is minus the number of
+  ``GlyphAlgebra.detect_conflicts`` hits. ``weighted`` sums weighted
+  objectives.
+- A path's score is ``objective - cost_weight * entropy`` spent since the
+  start node. A step costs 0.05 entropy and a newly carried symbol is
+  worth 1/40 to 1/24 of spin balance, so the default cost_weight of 0.1
+  favours short paths without making every step a loss. Moves over
+  ``entropy_budget`` are refused while searching.
+
+``mcts`` runs its rollouts (random moves from a new leaf) in worker
+processes. Each worker keeps a scratch explorer of the same class and
+replays the leaf's choice path into it, so rollouts never touch the
+searched tree.
+
+Run:
+    python mrp_search.py protocols.json "hexagonal mesh under tidal load"
+    python mrp_search.py protocols.json "turbulent plasma" --mcts --iterations 4000 --workers 4
+"""
+
+from __future__ import annotations
+
+import math
+import random
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Callable, Iterator, List, Optional, Tuple
+
+from explorer_state import EntropyBudgetExceeded, TreeNode
+from polyhedral_bridge import default_workers
+
+Objective = Callable[[Any, Any], float]
+MoveGenerator = Callable[[Any], List[str]]
+
+EVOLVE_ACTIONS = (
+    "run_family_sweep",
+    "run_principle_sweep",
+    "generate_seed_glyph",
+    "add_bridge_glyphs",
+    "corrective_evolution",
+)
+_WORKER_TREE_LIMIT = 50_000  # rows a worker's scratch explorer may grow to before it is rebuilt
+
+
+# ----------------------------------------------------------------------
+# Objectives and moves
+# ----------------------------------------------------------------------
+def _memo(explorer: Any, key: tuple, compute: Callable[[], Any]) -> Any:
+    """compute(), memoized under key in the explorer's per-search cache when there is one."""
+    cache = getattr(explorer, "_search_cache", None)
+    if cache is None:
+        return compute()
+    value = cache.get(key)
+    if value is None:
+        value = cache[key] = compute()
+    return value
+
+
+def glyph_entities(explorer: Any, glyph: str) -> frozenset:
+    """(type, id) entities a glyph carries; empty for explorers without a GlyphAlgebra."""
+    algebra = getattr(explorer, "algebra", None)
+    if algebra is None or not glyph:
+        return frozenset()
+    return _memo(explorer, ("entities", glyph), lambda: frozenset(algebra.entity_set(glyph)))
+
+
+def spin_balance(explorer: Any, state: Any) -> float:
+    """Mean share of families and principles that resonate above 0.2 or appear in the glyph."""
+    present = glyph_entities(explorer, state.current_glyph)
+    families, principles = explorer.mandala.families, explorer.mandala.principles
+    fam_ok = sum(1 for fid in families if state.family_resonance.get(fid, 0) > 0.2 or ("family", fid) in present)
+    prin_ok = sum(1 for pid in principles if state.principle_resonance.get(pid, 0) > 0.2 or ("principle", pid) in present)
+    return (fam_ok / max(1, len(families)) + prin_ok / max(1, len(principles))) / 2
+
+
+def conflict_count(explorer: Any, state: Any) -> float:
+    """Minus the number of internal conflicts in the glyph (0 is best)."""
+    algebra = getattr(explorer, "algebra", None)
+    glyph = state.current_glyph
+    if algebra is None or not glyph:
+        return 0.0
+    return -float(_memo(explorer, ("conflicts", glyph), lambda: len(algebra.detect_conflicts(glyph))))
+
+
+class weighted:
+    """Objective summing ``weight * objective(explorer, state)`` over (weight, objective) terms."""
+
+    def __init__(self, *terms: Tuple[float, Objective]):
+        self.terms = terms
+
+    def __call__(self, explorer: Any, state: Any) -> float:
+        return sum(w * objective(explorer, state) for w, objective in self.terms)
+
+
+def _entity_symbols(explorer: Any) -> List[str]:
+    mandala = explorer.mandala
+    symbols = [ent["symbol"] for ent in mandala.families.values()]
+    symbols += [ent["symbol"] for ent in mandala.principles.values()]
+    return list(dict.fromkeys(symbols))
+
+
+def glyph_moves(explorer: Any) -> List[str]:
+    """Glyph-changing choices available at explorer.current."""
+    state = explorer.current.state
+    offered = set(explorer.choices())
+    moves = [action for action in EVOLVE_ACTIONS if action in offered]
+    glyph = state.current_glyph
+    if glyph and "merge_glyphs" in offered:
+        moves += [f"merge_glyphs:{glyph};{sym}" for sym in _entity_symbols(explorer) if sym not in glyph]
+    return moves
+
+
+# ----------------------------------------------------------------------
+# Shared helpers
+# ----------------------------------------------------------------------
+@dataclass
+class SearchResult:
+    """Best path a search found; node is filed in the explorer's tree."""
+
+    node: TreeNode
+    score: float
+    path: List[str]  # choices from the start node to node
+    evaluated: int  # states scored: beam children or MCTS rollouts
+    expanded: int  # nodes the search added to the explorer's tree
+    seconds: float
+    ranked: List[Tuple[float, TreeNode]] = field(default_factory=list)  # best first
+
+    @property
+    def glyph(self) -> str:
+        return self.node.state.current_glyph
+
+
+def _step(explorer: Any, node: TreeNode, move: str) -> Optional[TreeNode]:
+    """The child select(move) files under node, or None if it was refused or filed nothing."""
+    explorer.current = node
+    try:
+        explorer.select(move)
+    except EntropyBudgetExceeded:
+        return None
+    child = explorer.current
+    return None if child == node else child
+
+
+def _state_key(state: Any) -> tuple:
+    return (state.seed, state.current_glyph, bool(state.family_resonance), bool(state.principle_resonance))
+
+
+def _path_from(explorer: Any, start: TreeNode, node: TreeNode) -> List[str]:
+    rows = explorer.tree.path(node.id)
+    return [explorer.node(row).choice for row in rows[rows.index(start.id) + 1:]]
+
+
+@contextmanager
+def _search_scope(explorer: Any, budget_mode: Optional[str]) -> Iterator[TreeNode]:
+    """Yield the start node under the search's budget mode and a fresh glyph cache; restore all three after.
+
+    The cache lives on the explorer only for the search, so nothing
+    outlives it or pins the explorer's algebra.
+    """
+    start, saved, cache = explorer.current, explorer.budget_mode, getattr(explorer, "_search_cache", None)
+    explorer.budget_mode = budget_mode
+    explorer._search_cache = {}
+    try:
+        yield start
+    finally:
+        explorer.current = start
+        explorer.budget_mode = saved
+        if cache is None:
+            del explorer._search_cache
+        else:
+            explorer._search_cache = cache
+
+
+# ----------------------------------------------------------------------
+# Beam search
+# ----------------------------------------------------------------------
+def beam_search(
+    explorer: Any,
+    objective: Objective = spin_balance,
+    *,
+    width: int = 16,
+    depth: int = 6,
+    moves: MoveGenerator = glyph_moves,
+    cost_weight: float = 0.1,
+    dedupe: bool = True,
+    budget_mode: Optional[str] = "refuse",
+) -> SearchResult:
+    """Expand every move of the `width` best nodes per level for `depth` levels.
+
+    With dedupe, a state already reached (same seed, glyph and sweeps) is
+    not scored or expanded again, since the earlier copy is as good and
+    no more expensive.
+    """
+    t0 = time.perf_counter()
+    rows_before = len(explorer.tree)
+    with _search_scope(explorer, budget_mode) as start:
+        base = start.total_entropy_cost()
+
+        def score(node: TreeNode) -> float:
+            return objective(explorer, node.state) - cost_weight * (node.total_entropy_cost() - base)
+
+        ranked: List[Tuple[float, int]] = [(score(start), start.id)]
+        seen = {_state_key(start.state)}
+        beam, evaluated = [start], 0
+        for _ in range(depth):
+            scored = []
+            for node in beam:
+                explorer.current = node
+                for move in moves(explorer):
+                    child = _step(explorer, node, move)
+                    if child is None:
+                        continue
+                    if dedupe:
+                        key = _state_key(child.state)
+                        if key in seen:
+                            continue
+                        seen.add(key)
+                    evaluated += 1
+                    scored.append((score(child), child.id))
+            if not scored:
+                break
+            scored.sort(key=lambda item: item[0], reverse=True)
+            ranked.extend(scored[:width])
+            beam = [explorer.node(row) for _, row in scored[:width]]
+    ranked.sort(key=lambda item: item[0], reverse=True)
+    top = [(s, explorer.node(row)) for s, row in ranked[:width]]
+    best_score, best = top[0]
+    return SearchResult(
+        node=best,
+        score=best_score,
+        path=_path_from(explorer, start, best),
+        evaluated=evaluated,
+        expanded=len(explorer.tree) - rows_before,
+        seconds=time.perf_counter() - t0,
+        ranked=top,
+    )
+
+
+# ----------------------------------------------------------------------
+# Monte Carlo tree search
+# ----------------------------------------------------------------------
+_WORKER: dict = {}
+
+
+def _init_worker(cls: type, atlas_path: str, budget: float, budget_mode: Optional[str],
+                 objective: Objective, moves: MoveGenerator, rollout_depth: int, cost_weight: float) -> None:
+    _WORKER.clear()
+    _WORKER.update(cls=cls, atlas_path=atlas_path, budget=budget, budget_mode=budget_mode, objective=objective,
+                   moves=moves, rollout_depth=rollout_depth, cost_weight=cost_weight, explorer=None)
+
+
+def _worker_explorer() -> Any:
+    explorer = _WORKER["explorer"]
+    if explorer is None or len(explorer.tree) > _WORKER_TREE_LIMIT:
+        explorer = _WORKER["cls"](_WORKER["atlas_path"])
+        explorer.entropy_budget = _WORKER["budget"]
+        explorer.budget_mode = _WORKER["budget_mode"]
+        explorer._search_cache = {}  # dropped with the scratch explorer
+        _WORKER["explorer"] = explorer
+    return explorer
+
+
+def _replay(explorer: Any, choices: Tuple[str, ...]) -> Optional[TreeNode]:
+    """Walk choices down from the root, reusing children already filed."""
+    tree, node = explorer.tree, explorer.root
+    for choice in choices:
+        row = tree.find_child(node.id, choice)
+        node = tree.node(row) if row >= 0 else _step(explorer, node, choice)
+        if node is None:
+            return None
+    return node
+
+
+def _rollout(task: Tuple[Tuple[str, ...], float, int]) -> Tuple[float, List[str]]:
+    """(value, rollout moves) of random moves from the node at a choice path."""
+    choices, base, seed = task
+    explorer = _worker_explorer()
+    node = _replay(explorer, choices)
+    if node is None:
+        return -math.inf, []
+    rng = random.Random(seed)
+    suffix: List[str] = []
+    for _ in range(_WORKER["rollout_depth"]):
+        explorer.current = node
+        options = _WORKER["moves"](explorer)
+        child = _step(explorer, node, rng.choice(options)) if options else None
+        if child is None:
+            break
+        suffix.append(child.choice)
+        node = child
+    value = _WORKER["objective"](explorer, node.state) - _WORKER["cost_weight"] * (node.total_entropy_cost() - base)
+    return value, suffix
+
+
+def mcts(
+    explorer: Any,
+    objective: Objective = spin_balance,
+    *,
+    iterations: int = 1000,
+    rollout_depth: int = 4,
+    workers: Optional[int] = 1,
+    batch: Optional[int] = None,
+    exploration: float = 1.4,
+    moves: MoveGenerator = glyph_moves,
+    cost_weight: float = 0.1,
+    seed: int = 0,
+    budget_mode: Optional[str] = "refuse",
+) -> SearchResult:
+    """UCT search: `iterations` rollouts, `batch` selected per round and run on `workers` processes.
+
+    Selection adds each visit before its rollout returns (a virtual loss),
+    so one round spreads over different leaves. workers=None uses every
+    CPU. objective and moves must be module-level callables (or
+    ``weighted`` instances) when workers > 1 and the platform spawns.
+    """
+    t0 = time.perf_counter()
+    workers = workers or default_workers()
+    batch = batch or (1 if workers == 1 else 8 * workers)
+    rng = random.Random(seed)
+    rows_before = len(explorer.tree)
+    # row -> [visits, value sum, untried moves (None until first visit), child rows]
+    stats: dict = {}
+    initargs = (type(explorer), explorer.atlas_path, explorer.entropy_budget, budget_mode,
+                objective, moves, rollout_depth, cost_weight)
+
+    pool = None
+    if workers > 1:
+        import multiprocessing  # deferred: only parallel runs need it
+
+        methods = multiprocessing.get_all_start_methods()
+        ctx = multiprocessing.get_context("fork" if "fork" in methods else "spawn")
+        pool = ctx.Pool(workers, initializer=_init_worker, initargs=initargs)
+    else:
+        saved_worker = dict(_WORKER)
+        _init_worker(*initargs)
+
+    def visit(node: TreeNode) -> list:
+        st = stats.get(node.id)
+        if st is None:
+            st = stats[node.id] = [0, 0.0, None, []]
+        if st[2] is None:
+            explorer.current = node
+            st[2] = moves(explorer)
+            rng.shuffle(st[2])
+        return st
+
+    def select_leaf(start: TreeNode) -> List[int]:
+        node, path = start, [start.id]
+        while True:
+            st = visit(node)
+            st[0] += 1
+            while st[2]:
+                child = _step(explorer, node, st[2].pop())
+                if child is not None:
+                    st[3].append(child.id)
+                    stats[child.id] = [1, 0.0, None, []]
+                    path.append(child.id)
+                    return path
+            if not st[3]:
+                return path
+            log_n = math.log(st[0])
+            node = explorer.node(max(
+                st[3],
+                key=lambda r: stats[r][1] / stats[r][0] + exploration * math.sqrt(log_n / stats[r][0]),
+            ))
+            path.append(node.id)
+
+    best: Tuple[float, int, List[str]] = (-math.inf, -1, [])
+    done = 0
+    try:
+        with _search_scope(explorer, budget_mode) as start:
+            base = start.total_entropy_cost()
+            prefix = tuple(_path_from(explorer, explorer.root, start))
+            while done < iterations:
+                paths = [select_leaf(start) for _ in range(min(batch, iterations - done))]
+                tasks = [
+                    (prefix + tuple(explorer.node(r).choice for r in path[1:]), base, rng.randrange(1 << 32))
+                    for path in paths
+                ]
+                results = pool.map(_rollout, tasks) if pool is not None else [_rollout(t) for t in tasks]
+                for path, (value, suffix) in zip(paths, results):
+                    if value == -math.inf:
+                        continue
+                    for row in path:
+                        stats[row][1] += value
+                    if value > best[0]:
+                        best = (value, path[-1], suffix)
+                done += len(paths)
+
+            node = explorer.node(best[1]) if best[1] >= 0 else start
+            for move in best[2]:  # file the best rollout in the searched tree too
+                node = _step(explorer, node, move) or node
+            score = objective(explorer, node.state) - cost_weight * (node.total_entropy_cost() - base)
+            ranked = sorted(
+                ((st[1] / st[0], explorer.node(row)) for row, st in stats.items() if st[0] and row != start.id),
+                key=lambda item: item[0],
+                reverse=True,
+            )[:16]
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+        else:
+            _WORKER.clear()
+            _WORKER.update(saved_worker)
+    return SearchResult(
+        node=node,
+        score=score,
+        path=_path_from(explorer, start, node),
+        evaluated=done,
+        expanded=len(explorer.tree) - rows_before,
+        seconds=time.perf_counter() - t0,
+        ranked=ranked,
+    )
+
+
+# ----------------------------------------------------------------------
+# Demo
+# ----------------------------------------------------------------------
+if __name__ == "__main__":
+    import argparse
+
+    from polyhedral_explorer_v3 import MRPExplorer
+
+    ap = argparse.ArgumentParser(description="Search MRP glyph-evolution paths for one seed.")
+    ap.add_argument("atlas", help="mandala JSON (families + principles), e.g. protocols.json")
+    ap.add_argument("seed", nargs="?", default="hexagonal mesh under tidal load")
+    ap.add_argument("--mcts", action="store_true", help="Monte Carlo tree search instead of beam search")
+    ap.add_argument("--objective", choices=["spin", "conflicts", "both"], default="spin")
+    ap.add_argument("--width", type=int, default=16, help="beam: nodes kept per level")
+    ap.add_argument("--depth", type=int, default=6, help="beam: levels")
+    ap.add_argument("--iterations", type=int, default=2000, help="mcts: rollouts")
+    ap.add_argument("--rollout-depth", type=int, default=4, help="mcts: random moves per rollout")
+    ap.add_argument("--workers", type=int, default=1, help="mcts: rollout processes (0 = all CPUs)")
+    ap.add_argument("--budget", type=float, default=5.0, help="entropy budget")
+    args = ap.parse_args()
+
+    objectives = {
+        "spin": spin_balance,
+        "conflicts": conflict_count,
+        "both": weighted((1.0, spin_balance), (0.01, conflict_count)),
+    }
+    exp = MRPExplorer(args.atlas)
+    exp.entropy_budget = args.budget
+    exp.select(f"set_seed_concept:{args.seed}")
+    if args.mcts:
+        result = mcts(exp, objectives[args.objective], iterations=args.iterations,
+                      rollout_depth=args.rollout_depth, workers=args.workers or None)
+    else:
+        result = beam_search(exp, objectives[args.objective], width=args.width, depth=args.depth)
+    print(f"Best score {result.score:.3f} after {result.evaluated} states in {result.seconds:.2f}s "
+          f"({result.expanded} nodes filed)")
+    print("Glyph:", result.glyph)
+    for choice in result.path:
+        print("  ", choice)
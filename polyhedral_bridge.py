@@ -16,23 +16,51 @@ PhysicalConstraint is imported lazily from
 metrology.constraint_recovery_framework. If the import fails, the bridge
 falls back to duck-typing on the expected attribute names — no crash.
 
+Ontology and equation-index tables are compiled once into a
+PolyhedralEncoder and reused across calls; the module-level encode() wraps
+a shared default instance that recompiles when the source files change.
+
 Run as a script:
     python polyhedral_bridge.py "a hexagonal mesh under tidal load"
+    python polyhedral_bridge.py --jsonl payloads.jsonl encodings.jsonl --workers 8
+    cat payloads.jsonl | python polyhedral_bridge.py --jsonl > encodings.jsonl
+    python polyhedral_bridge.py --to-archive encodings.jsonl encodings.pbarc
+    python polyhedral_bridge.py --reencode payloads.jsonl encodings.jsonl new.jsonl --snapshots .snapshots
+    python polyhedral_bridge.py --file transcript.txt   # any size, bounded memory
+    python polyhedral_bridge.py --build-precompiled   # faster cold start
 """
 
 from __future__ import annotations
 
+import codecs
+import hashlib
 import json
+import marshal
+import mmap
+import os
+import re
 import sys
-from dataclasses import asdict, dataclass
-from datetime import datetime, timezone
+from array import array
+from bisect import bisect_left
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from functools import reduce
+from itertools import compress
+from operator import or_
 from pathlib import Path
-from typing import Any
+from time import gmtime, perf_counter_ns, strftime
+from typing import Any, Callable, Iterable, Iterator, TextIO
 
 ROOT = Path(__file__).resolve().parent
 FAMILIES_PATH = ROOT / "ontology" / "families.json"
 PRINCIPLES_PATH = ROOT / "ontology" / "principles.json"
 INDEX_PATH = ROOT / "equations" / "json" / "equation_index.json"
+# build_precompiled() output; bump _PRECOMPILED_FORMAT when the tables change shape.
+PRECOMPILED_PATH = Path(
+    os.environ.get("POLYHEDRAL_BRIDGE_PRECOMPILED") or ROOT / ".bridge-cache" / "tables.marshal"
+)
+_PRECOMPILED_FORMAT = b"polyhedral_bridge.precompiled/1"
 
 try:
     from metrology.constraint_recovery_framework import (  # type: ignore
@@ -92,75 +120,398 @@ _PRINCIPLE_KEYWORDS: dict[str, list[str]] = {
 }
 
 
-@dataclass
 class PolyhedralEncoding:
-    family_vector: list[float]
-    principle_vector: list[float]
-    family_amplitudes_l1: dict[str, float]
-    principle_amplitudes_l1: dict[str, float]
-    family_raw_counts: dict[str, int]
-    principle_raw_counts: dict[str, int]
-    equation_hashes: list[str]
-    glyph_signature: str
-    provenance: dict
+    """One payload's encoding, stored compactly.
+
+    Raw counts and L1 amplitudes live once each in flat arrays
+    (``counts``, ``amplitudes``): families then principles, in
+    ``family_order`` / ``principle_order``, which are tuples shared by every
+    encoding from the same encoder. The vectors, the id-keyed dicts and
+    provenance are built on access, so each dict read returns a fresh
+    copy. Construct from the named fields like the original dataclass, or
+    without conversion through from_arrays().
+    """
+
+    __slots__ = (
+        "family_order",
+        "principle_order",
+        "counts",
+        "amplitudes",
+        "equation_hashes",
+        "glyph_signature",
+        "_prov",
+    )
+
+    def __init__(
+        self,
+        family_vector: list[float],
+        principle_vector: list[float],
+        family_amplitudes_l1: dict[str, float],
+        principle_amplitudes_l1: dict[str, float],
+        family_raw_counts: dict[str, int],
+        principle_raw_counts: dict[str, int],
+        equation_hashes: list[str],
+        glyph_signature: str,
+        provenance: dict,
+    ) -> None:
+        self.family_order = tuple(family_amplitudes_l1)
+        self.principle_order = tuple(principle_amplitudes_l1)
+        self.counts = array(
+            "i",
+            [family_raw_counts.get(k, 0) for k in self.family_order]
+            + [principle_raw_counts.get(k, 0) for k in self.principle_order],
+        )
+        self.amplitudes = array("d", list(family_vector) + list(principle_vector))
+        self.equation_hashes = equation_hashes
+        self.glyph_signature = glyph_signature
+        self._prov = provenance
+
+    @classmethod
+    def from_arrays(
+        cls,
+        family_order: tuple[str, ...],
+        principle_order: tuple[str, ...],
+        counts: array,
+        amplitudes: array,
+        equation_hashes: list[str],
+        glyph_signature: str,
+        provenance: dict | tuple,
+    ) -> PolyhedralEncoding:
+        """Wrap prebuilt arrays without copying.
+
+        provenance may be a dict, or the (input_type, source, timestamp,
+        threshold, fingerprints) tuple _provenance_dict() expands on first
+        access.
+        """
+        self = cls.__new__(cls)
+        self.family_order = family_order
+        self.principle_order = principle_order
+        self.counts = counts
+        self.amplitudes = amplitudes
+        self.equation_hashes = equation_hashes
+        self.glyph_signature = glyph_signature
+        self._prov = provenance
+        return self
+
+    @property
+    def family_vector(self) -> list[float]:
+        return self.amplitudes[: len(self.family_order)].tolist()
+
+    @property
+    def principle_vector(self) -> list[float]:
+        return self.amplitudes[len(self.family_order):].tolist()
+
+    @property
+    def family_amplitudes_l1(self) -> dict[str, float]:
+        return dict(zip(self.family_order, self.family_vector))
+
+    @property
+    def principle_amplitudes_l1(self) -> dict[str, float]:
+        return dict(zip(self.principle_order, self.principle_vector))
+
+    @property
+    def family_raw_counts(self) -> dict[str, int]:
+        return dict(zip(self.family_order, self.counts[: len(self.family_order)].tolist()))
+
+    @property
+    def principle_raw_counts(self) -> dict[str, int]:
+        return dict(zip(self.principle_order, self.counts[len(self.family_order):].tolist()))
+
+    @property
+    def provenance(self) -> dict:
+        if isinstance(self._prov, tuple):
+            self._prov = _provenance_dict(*self._prov)
+        return self._prov
+
+    @provenance.setter
+    def provenance(self, value: dict) -> None:
+        self._prov = value
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, PolyhedralEncoding):
+            return NotImplemented
+        return (
+            self.family_order == other.family_order
+            and self.principle_order == other.principle_order
+            and self.counts == other.counts
+            and self.amplitudes == other.amplitudes
+            and self.equation_hashes == other.equation_hashes
+            and self.glyph_signature == other.glyph_signature
+            and self.provenance == other.provenance
+        )
+
+    __hash__ = None  # type: ignore[assignment]
+
+    def __repr__(self) -> str:
+        return f"PolyhedralEncoding(glyph_signature={self.glyph_signature!r}, equation_hashes={len(self.equation_hashes)})"
 
     def to_json(self) -> dict:
-        return asdict(self)
+        n = len(self.family_order)
+        amps = self.amplitudes.tolist()
+        counts = self.counts.tolist()
+        fam_vector, prin_vector = amps[:n], amps[n:]
+        prov = self._prov
+        return {
+            "family_vector": fam_vector,
+            "principle_vector": prin_vector,
+            "family_amplitudes_l1": dict(zip(self.family_order, fam_vector)),
+            "principle_amplitudes_l1": dict(zip(self.principle_order, prin_vector)),
+            "family_raw_counts": dict(zip(self.family_order, counts[:n])),
+            "principle_raw_counts": dict(zip(self.principle_order, counts[n:])),
+            "equation_hashes": list(self.equation_hashes),
+            "glyph_signature": self.glyph_signature,
+            "provenance": _provenance_dict(*prov) if isinstance(prov, tuple) else dict(prov),
+        }
+
 
+@dataclass
+class PolyhedralBatchEncoding:
+    """Column-oriented encodings for N payloads (see encode_batch).
 
-def _load_ontology() -> tuple[dict, dict]:
-    with FAMILIES_PATH.open("r", encoding="utf-8") as f:
-        fam_doc = json.load(f)
-    with PRINCIPLES_PATH.open("r", encoding="utf-8") as f:
-        prin_doc = json.load(f)
-    return fam_doc, prin_doc
+    Matrices are NumPy arrays with one row per payload and columns in
+    canonical family_order / principle_order. equation_hashes holds one
+    tuple per row; rows invoking the same equation set share one tuple.
+    above_threshold (N×W) marks the columns over threshold and
+    node_equations (W×E) the equations each column invokes, with E in
+    equation_order; equation_matrix() combines them.
+    """
 
+    family_counts: Any
+    principle_counts: Any
+    family_amplitudes_l1: Any
+    principle_amplitudes_l1: Any
+    glyph_signatures: Any
+    equation_hashes: list[tuple[str, ...]]
+    family_order: list[str]
+    principle_order: list[str]
+    input_types: list[str]
+    threshold: float
+    timestamp: str | None = "now"
+    above_threshold: Any = None
+    equation_order: list[str] = field(default_factory=list)
+    node_equations: Any = None
+    fingerprints: dict | None = None
 
-def _load_index() -> dict | None:
-    if not INDEX_PATH.exists():
-        return None
-    with INDEX_PATH.open("r", encoding="utf-8") as f:
-        return json.load(f)
+    def __len__(self) -> int:
+        return len(self.input_types)
 
+    def equation_matrix(self):
+        """Dense N×E boolean matrix of invoked equations, columns in equation_order."""
+        np = _require_numpy()
+        if self.node_equations is None or not self.node_equations.shape[1]:
+            return np.zeros((len(self), len(self.equation_order)), dtype=bool)
+        hits = self.above_threshold.astype(np.float32) @ self.node_equations.astype(np.float32)
+        return hits > 0
 
-def _payload_to_text_and_tags(payload: Any) -> tuple[str, list[str], str]:
-    """Return (text, tags, input_type_label)."""
-    if isinstance(payload, str):
-        return payload, [], "text"
+    def row(self, i: int, source: str = "polyhedral_bridge.encode_batch") -> PolyhedralEncoding:
+        """Materialize row i as a PolyhedralEncoding (canonical order); source goes into provenance."""
+        return PolyhedralEncoding.from_arrays(
+            tuple(self.family_order),
+            tuple(self.principle_order),
+            array("i", self.family_counts[i].tolist() + self.principle_counts[i].tolist()),
+            array("d", self.family_amplitudes_l1[i].tolist() + self.principle_amplitudes_l1[i].tolist()),
+            list(self.equation_hashes[i]),
+            str(self.glyph_signatures[i]),
+            (
+                self.input_types[i],
+                source,
+                _resolve_timestamp(self.timestamp),
+                self.threshold,
+                self.fingerprints,
+            ),
+        )
 
-    if isinstance(payload, dict):
-        parts: list[str] = []
-        for key in ("intent", "name", "description", "concept", "domain"):
-            v = payload.get(key)
-            if v:
-                parts.append(str(v))
-        tags = [str(t) for t in payload.get("tags", [])]
-        parts.extend(tags)
-        glyph = payload.get("glyph", "")
-        if glyph:
-            parts.append(str(glyph))
-        return " ".join(parts), tags, "dict"
-
-    # PhysicalConstraint or duck-typed object
-    parts = []
-    tags = []
-    for attr in ("name", "description", "domain", "concept"):
-        v = getattr(payload, attr, None)
+
+WINDOW_UNITS = ("chars", "tokens", "lines")
+
+
+@dataclass
+class ResonanceProfile:
+    """Family/principle resonance over sliding windows of one text (see resonance_profile).
+
+    Row w covers text_l[spans[w, 0]:spans[w, 1]] of the lowercased text
+    (the same offsets as the original unless lowercasing changes a
+    character's length, e.g. "İ") and holds the counts, L1 amplitudes and
+    glyph signature encode() gives that slice. Windows are size units
+    long and start every step units; the last one may be shorter.
+    """
+
+    family_counts: Any
+    principle_counts: Any
+    family_amplitudes_l1: Any
+    principle_amplitudes_l1: Any
+    glyph_signatures: Any
+    spans: Any
+    unit: str
+    size: int
+    step: int
+    family_order: list[str]
+    principle_order: list[str]
+
+    def __len__(self) -> int:
+        return len(self.spans)
+
+
+# -------------------------------------------------------------------
+# Payload adapters: payload -> (text, tags, input_type). Extractors are
+# looked up by exact payload type (one dict hit instead of an isinstance
+# chain) and cached per class; register_adapter() adds types.
+# PayloadColumns carries bulk seeds column-wise so encode_batch gets text
+# and tag columns assembled a column at a time.
+# -------------------------------------------------------------------
+
+# Field order of the text each payload kind contributes.
+_SEED_TEXT_KEYS = ("intent", "name", "description", "concept", "domain")
+_OBJECT_TEXT_ATTRS = ("name", "description", "domain", "concept")
+_OBJECT_ITEM_ATTRS = ("variables", "tags")
+
+_Extractor = Callable[[Any], tuple[str, list[str], str]]
+
+
+def _extract_text(payload: str) -> tuple[str, list[str], str]:
+    return payload, [], "text"
+
+
+def _extract_seed(payload: dict) -> tuple[str, list[str], str]:
+    parts: list[str] = []
+    for key in _SEED_TEXT_KEYS:
+        v = payload.get(key)
         if v:
             parts.append(str(v))
-    for attr in ("variables", "tags"):
-        v = getattr(payload, attr, None)
-        if v:
-            for item in v:
-                parts.append(str(item))
-                if attr == "tags":
-                    tags.append(str(item))
+    tags = [str(t) for t in payload.get("tags", [])]
+    parts.extend(tags)
+    glyph = payload.get("glyph", "")
+    if glyph:
+        parts.append(str(glyph))
+    return " ".join(parts), tags, "dict"
 
-    if _HAS_CRF and PhysicalConstraint is not None and isinstance(payload, PhysicalConstraint):
-        label = "PhysicalConstraint"
-    else:
-        label = "object"
-    return " ".join(parts), tags, label
+
+def _object_label(cls: type) -> str:
+    if _HAS_CRF and PhysicalConstraint is not None and issubclass(cls, PhysicalConstraint):
+        return "PhysicalConstraint"
+    return "object"
+
+
+def _object_extractor(label: str) -> _Extractor:
+    """PhysicalConstraint / duck-typed extractor with the input_type label fixed per class."""
+
+    # getattr with a default is the cheapest probe CPython has; keep it.
+    def extract(payload: Any) -> tuple[str, list[str], str]:
+        parts = []
+        tags = []
+        for attr in _OBJECT_TEXT_ATTRS:
+            v = getattr(payload, attr, None)
+            if v:
+                parts.append(str(v))
+        for attr in _OBJECT_ITEM_ATTRS:
+            v = getattr(payload, attr, None)
+            if v:
+                for item in v:
+                    parts.append(str(item))
+                    if attr == "tags":
+                        tags.append(str(item))
+        return " ".join(parts), tags, label
+
+    return extract
+
+
+_ADAPTERS: dict[type, _Extractor] = {str: _extract_text, dict: _extract_seed}
+_EXTRACTORS: dict[type, _Extractor] = dict(_ADAPTERS)
+
+
+def register_adapter(cls: type, extractor: _Extractor) -> None:
+    """Extract cls (and subclasses) payloads with extractor(payload) -> (text, tags, input_type)."""
+    _ADAPTERS[cls] = extractor
+    _EXTRACTORS.clear()
+    _EXTRACTORS.update(_ADAPTERS)
+
+
+def _extractor_for(cls: type) -> _Extractor:
+    """Registered extractor for cls or its nearest registered base, else a duck-typed one."""
+    extractor = _EXTRACTORS.get(cls)
+    if extractor is None:
+        extractor = next((_ADAPTERS[base] for base in cls.__mro__ if base in _ADAPTERS), None)
+        if extractor is None:
+            extractor = _object_extractor(_object_label(cls))
+        _EXTRACTORS[cls] = extractor
+    return extractor
+
+
+def _payload_to_text_and_tags(payload: Any) -> tuple[str, list[str], str]:
+    """Return (text, tags, input_type_label)."""
+    extractor = _EXTRACTORS.get(type(payload))
+    if extractor is None:
+        extractor = _extractor_for(type(payload))
+    return extractor(payload)
+
+
+class PayloadColumns:
+    """Bulk payloads stored column-wise, one list per seed field.
+
+    Build from a dict of lists (``PayloadColumns({"intent": [...],
+    "tags": [[...], ...]})``), from a list of dict seeds (from_records) or
+    from PhysicalConstraint-like objects (from_objects). extract() gives
+    the text, tag and input-type columns _payload_to_text_and_tags would
+    give row by row, assembled a column at a time; encode_batch accepts a
+    PayloadColumns directly.
+    """
+
+    def __init__(
+        self, columns: dict[str, list[Any]], kind: str = "dict", input_types: list[str] | None = None
+    ) -> None:
+        lengths = {len(v) for v in columns.values()}
+        if input_types is not None:
+            lengths.add(len(input_types))
+        if len(lengths) > 1:
+            raise ValueError(f"columns differ in length: {sorted(lengths)}")
+        if kind not in ("dict", "object"):
+            raise ValueError(f"kind must be 'dict' or 'object', got {kind!r}")
+        self.columns = columns
+        self.kind = kind
+        self._n = lengths.pop() if lengths else 0
+        self.input_types = input_types if input_types is not None else [kind] * self._n
+
+    def __len__(self) -> int:
+        return self._n
+
+    @classmethod
+    def from_records(cls, records: Iterable[dict]) -> PayloadColumns:
+        records = list(records)
+        keys = _SEED_TEXT_KEYS + ("tags", "glyph")
+        return cls({k: [r.get(k) for r in records] for k in keys})
+
+    @classmethod
+    def from_objects(cls, objects: Iterable[Any]) -> PayloadColumns:
+        objects = list(objects)
+        attrs = _OBJECT_TEXT_ATTRS + _OBJECT_ITEM_ATTRS
+        columns = {a: [getattr(o, a, None) for o in objects] for a in attrs}
+        labels = {t: _object_label(t) for t in set(map(type, objects))}
+        return cls(columns, kind="object", input_types=[labels[type(o)] for o in objects])
+
+    def extract(self) -> tuple[list[str], list[list[str]], list[str]]:
+        """(texts, tags, input_types) columns."""
+        # Every present piece carries its leading separator, so each row
+        # is one C-level "".join and absent pieces are just "".
+        n = self._n
+        if self.kind == "dict":
+            keys, item_keys = _SEED_TEXT_KEYS + ("tags", "glyph"), ("tags",)
+        else:
+            keys, item_keys = _OBJECT_TEXT_ATTRS + _OBJECT_ITEM_ATTRS, _OBJECT_ITEM_ATTRS
+        pieces = []
+        tags: list[list[str]] | None = None
+        for key in keys:
+            values = self.columns.get(key)
+            if values is None or not any(values):
+                continue
+            if key == "tags":
+                tags = [[str(t) for t in v] if v else [] for v in values]
+                pieces.append([" " + " ".join(t) if v else "" for v, t in zip(values, tags)])
+            elif key in item_keys:
+                pieces.append([" " + " ".join(map(str, v)) if v else "" for v in values])
+            else:
+                pieces.append([" " + str(v) if v else "" for v in values])
+        texts = [t[1:] for t in map("".join, zip(*pieces))] if pieces else [""] * n
+        return texts, tags if tags is not None else [[] for _ in range(n)], list(self.input_types)
 
 
 def _scan_keywords(text: str, keyword_map: dict[str, list[str]]) -> dict[str, int]:
@@ -175,6 +526,235 @@ def _scan_keywords(text: str, keyword_map: dict[str, list[str]]) -> dict[str, in
     return counts
 
 
+class _TokenMaskCache(dict):
+    """token -> bitmask of keyword pieces it contains, filled on first sight."""
+
+    max_token_len = 64
+    max_size = 1 << 16
+
+    def __init__(self, pieces: list[tuple[str, int]]) -> None:
+        super().__init__()
+        self._pieces = pieces
+
+    def __missing__(self, token: str) -> int:
+        mask = 0
+        for piece, bit in self._pieces:
+            if piece in token:
+                mask |= bit
+        # Long tokens (hashes, base64 blobs) are rarely repeated; don't keep them.
+        if len(token) <= self.max_token_len:
+            if len(self) >= self.max_size:
+                self.clear()
+            self[token] = mask
+        return mask
+
+
+class KeywordMatcher:
+    """Single-pass matcher over the family and principle keyword maps.
+
+    A keyword without whitespace can only occur inside one whitespace-
+    delimited token, so scan() lowercases the text once, reduces it to its
+    set of distinct tokens and ORs together a per-token bitmask of the
+    keywords each token contains. Token masks are memoized across calls,
+    so on a warm corpus the scan is one split plus a dict lookup per
+    distinct token instead of one substring search per keyword. Multi-word
+    phrases ("standing wave") are confirmed against the full text only
+    when every word of the phrase was seen.
+
+    Texts longer than long_text_chars are matched on their head first; when
+    at most max_direct_searches keywords are still missing, those few are
+    searched for directly in the full text instead of tokenizing all of it.
+
+    Counting semantics match _scan_keywords: each (id, keyword) pair
+    counts at most once per text, substring match on the lowercased text.
+    """
+
+    long_text_chars = 1 << 16
+    max_direct_searches = 24
+
+    def __init__(
+        self,
+        family_keywords: dict[str, list[str]],
+        principle_keywords: dict[str, list[str]],
+    ) -> None:
+        self.family_keywords = {nid: list(kws) for nid, kws in family_keywords.items()}
+        self.principle_keywords = {nid: list(kws) for nid, kws in principle_keywords.items()}
+
+        # Unique keyword strings, each pointing at every (map, id) slot that lists it.
+        self.keywords: list[str] = []
+        self._targets: list[list[tuple[int, str]]] = []
+        kw_index: dict[str, int] = {}
+        for which, keyword_map in enumerate((self.family_keywords, self.principle_keywords)):
+            for nid, kws in keyword_map.items():
+                for kw in kws:
+                    i = kw_index.get(kw)
+                    if i is None:
+                        i = kw_index[kw] = len(self.keywords)
+                        self.keywords.append(kw)
+                        self._targets.append([])
+                    self._targets[i].append((which, nid))
+
+        # Pieces are what tokens get tested against: whole single-word
+        # keywords plus the individual words of multi-word phrases.
+        piece_bit: dict[str, int] = {}
+
+        def bit_for(piece: str) -> int:
+            if piece not in piece_bit:
+                piece_bit[piece] = 1 << len(piece_bit)
+            return piece_bit[piece]
+
+        self._single: dict[int, int] = {}  # piece bit -> keyword index
+        self._phrases: list[tuple[int, int]] = []  # (required piece mask, keyword index)
+        for i, kw in enumerate(self.keywords):
+            words = kw.split()
+            if len(words) == 1 and words[0] == kw:
+                self._single[bit_for(kw)] = i
+            else:
+                required = 0
+                for w in words:
+                    required |= bit_for(w)
+                self._phrases.append((required, i))
+        self._token_masks = _TokenMaskCache(list(piece_bit.items()))
+
+    def state(self) -> tuple:
+        """Compiled tables as plain containers (marshal-able); see from_state()."""
+        return (
+            self.family_keywords,
+            self.principle_keywords,
+            self.keywords,
+            self._targets,
+            self._single,
+            self._phrases,
+            self._token_masks._pieces,
+        )
+
+    @classmethod
+    def from_state(cls, state: tuple) -> KeywordMatcher:
+        """Rebuild a matcher from state() output without recompiling."""
+        self = cls.__new__(cls)
+        (self.family_keywords, self.principle_keywords, self.keywords,
+         self._targets, self._single, self._phrases, pieces) = state
+        self._token_masks = _TokenMaskCache(pieces)
+        return self
+
+    def match(self, text_l: str) -> list[int]:
+        """Indices into self.keywords of every keyword present in lowercased text."""
+        if len(text_l) <= self.long_text_chars:
+            return self._match_tokens(text_l)
+        # Long text: the head usually holds the common keywords. If only a
+        # few are still missing, C-level substring searches for just those
+        # beat splitting the whole text into token objects.
+        found = self._match_tokens(text_l[: self.long_text_chars])
+        seen = set(found)
+        missing = [i for i in range(len(self.keywords)) if i not in seen]
+        if len(missing) > self.max_direct_searches:
+            return self._match_tokens(text_l)
+        return found + [i for i in missing if self.keywords[i] in text_l]
+
+    def _match_tokens(self, text_l: str) -> list[int]:
+        mask = reduce(or_, map(self._token_masks.__getitem__, set(text_l.split())), 0)
+        found: list[int] = []
+        single = self._single
+        m = mask
+        while m:
+            low = m & -m
+            i = single.get(low)
+            if i is not None:
+                found.append(i)
+            m ^= low
+        for required, i in self._phrases:
+            if mask & required == required and self.keywords[i] in text_l:
+                found.append(i)
+        return found
+
+    def occurrences(self, text_l: str, tokens: list[str], offsets: Iterable[int]) -> dict[int, list[int]]:
+        """Keyword index -> sorted start offsets of every occurrence in lowercased text.
+
+        tokens is text_l.split() and offsets their start offsets. Each
+        token's memoized mask says which single-word keywords it contains;
+        those are located inside each distinct token once for all its
+        positions. Only phrases whose words all appear are searched for in
+        the full text.
+        """
+        masks = list(map(self._token_masks.__getitem__, tokens))
+        by_token: dict[str, list[int]] = {}
+        for token, start in compress(zip(tokens, offsets), masks):
+            by_token.setdefault(token, []).append(start)
+        found: dict[int, list[int]] = {}
+        seen = reduce(or_, map(self._token_masks.__getitem__, by_token), 0)
+        for token, starts in by_token.items():
+            mask = self._token_masks[token]
+            while mask:
+                low = mask & -mask
+                mask ^= low
+                i = self._single.get(low)
+                if i is None:
+                    continue
+                keyword, hits = self.keywords[i], found.setdefault(i, [])
+                j = token.find(keyword)
+                while j >= 0:
+                    hits.extend(start + j for start in starts)
+                    j = token.find(keyword, j + 1)
+        for required, i in self._phrases:
+            if seen & required == required:
+                keyword, hits = self.keywords[i], []
+                j = text_l.find(keyword)
+                while j >= 0:
+                    hits.append(j)
+                    j = text_l.find(keyword, j + 1)
+                if hits:
+                    found[i] = hits
+        for hits in found.values():
+            hits.sort()
+        return found
+
+    def scan(
+        self, text: str, offsets: bool = False
+    ) -> tuple[dict[str, int], dict[str, int], list[tuple[int, str]] | None]:
+        """Return (family_counts, principle_counts, matches) for one text.
+
+        matches is None unless offsets=True, in which case it lists
+        (offset, keyword) for the first occurrence of each matched keyword
+        in the lowercased text, sorted by offset.
+        """
+        text_l = text.lower()
+        found = self.match(text_l)
+        fam_counts, prin_counts = self._count(found)
+        matches = None
+        if offsets:
+            matches = sorted((text_l.find(self.keywords[i]), self.keywords[i]) for i in found)
+        return fam_counts, prin_counts, matches
+
+    def scan_chunks(self, chunks: Iterable[str]) -> tuple[dict[str, int], dict[str, int]]:
+        """(family_counts, principle_counts) for a text supplied as consecutive pieces.
+
+        Equals scan("".join(chunks)) when every piece boundary falls after
+        whitespace (so per-piece lower() agrees with lowering the whole).
+        Each piece is matched together with the last len(longest keyword) - 1
+        lowered chars before it, so keywords and phrases that straddle a
+        boundary are still found. Stops reading once every keyword is seen.
+        """
+        keep = max(map(len, self.keywords), default=1) - 1
+        found: set[int] = set()
+        tail = ""
+        for chunk in chunks:
+            window = tail + chunk.lower()
+            found.update(self.match(window))
+            if len(found) == len(self.keywords):
+                break
+            tail = window[-keep:] if keep else ""
+        return self._count(found)
+
+    def _count(self, found: Iterable[int]) -> tuple[dict[str, int], dict[str, int]]:
+        fam_counts = dict.fromkeys(self.family_keywords, 0)
+        prin_counts = dict.fromkeys(self.principle_keywords, 0)
+        counts = (fam_counts, prin_counts)
+        for i in found:
+            for which, nid in self._targets[i]:
+                counts[which][nid] += 1
+        return fam_counts, prin_counts
+
+
 def _l1_normalize(counts: dict[str, int]) -> dict[str, float]:
     total = sum(counts.values())
     if total == 0:
@@ -186,6 +766,67 @@ def _ordered_vector(amps: dict[str, float], order: list[str]) -> list[float]:
     return [amps.get(k, 0.0) for k in order]
 
 
+def _tag_bonus(fam_counts: dict[str, int], prin_counts: dict[str, int], tags: list[str]) -> None:
+    """Add one count per explicit FAM:* / PRIN:* tag reference, in place."""
+    for tag in tags:
+        t = tag.upper().strip()
+        if t in fam_counts:
+            fam_counts[t] += 1
+        if t in prin_counts:
+            prin_counts[t] += 1
+
+
+def _columns_above(amplitudes: list[float], threshold: float) -> int:
+    """Bitmask of the columns whose amplitude exceeds threshold."""
+    above = 0
+    for c, amp in enumerate(amplitudes):
+        if amp > threshold:
+            above |= 1 << c
+    return above
+
+
+def _resolve_timestamp(timestamp: str | None) -> str | None:
+    """"now" -> current UTC time; None (omit) and fixed strings pass through."""
+    if timestamp == "now":
+        return strftime("%Y-%m-%dT%H:%M:%SZ", gmtime())
+    return timestamp
+
+
+def _provenance_dict(
+    input_type: str,
+    source: str,
+    timestamp: str | None,
+    threshold: float,
+    fingerprints: dict | None = None,
+) -> dict:
+    """Provenance block; timestamp None omits the field (see _resolve_timestamp).
+
+    fingerprints, when given, records the keyword/ontology/index content
+    hashes the encoding was produced with (see bridge_reencode.plan_reencode).
+    """
+    prov = {"input_type": input_type, "source": source}
+    if timestamp is not None:
+        prov["timestamp"] = timestamp
+    prov.update({
+        "crf_available": _HAS_CRF,
+        "amplitude_convention": "L1",
+        "rationale": "matches seed-physics energy conservation contract; linear interpretability",
+        "threshold": threshold,
+    })
+    if fingerprints is not None:
+        prov["fingerprints"] = dict(fingerprints)
+    return prov
+
+
+def _require_numpy():
+    """Import numpy on first use so the single-payload path stays stdlib-only."""
+    try:
+        import numpy
+    except ImportError as e:
+        raise ImportError("batch encoding needs numpy (pip install numpy)") from e
+    return numpy
+
+
 def _composite_glyph(
     fam_amps: dict[str, float],
     prin_amps: dict[str, float],
@@ -201,81 +842,1246 @@ def _composite_glyph(
     return "◯"
 
 
+def _sha256(*parts: bytes) -> str:
+    h = hashlib.sha256()
+    for part in parts:
+        h.update(part)
+    return "sha256:" + h.hexdigest()
+
+
+_ENCODING_FIELDS = (
+    "family_vector",
+    "principle_vector",
+    "family_amplitudes_l1",
+    "principle_amplitudes_l1",
+    "family_raw_counts",
+    "principle_raw_counts",
+    "equation_hashes",
+    "glyph_signature",
+)
+
+
+class EncodeCache:
+    """Content-addressed cache of encodings: in-memory LRU, optionally backed by disk.
+
+    Keys come from PolyhedralEncoder.cache_key (payload text, tags, input
+    type, threshold and the encoder's ontology/index fingerprint), so an
+    entry can never outlive the tables that produced it. Entries are
+    stored without provenance; the encoder rebuilds it on every hit.
+    directory, when given, holds one JSON file per key and is safe to
+    share between processes (writes are atomic renames).
+    """
+
+    def __init__(self, maxsize: int = 4096, directory: str | Path | None = None) -> None:
+        self.maxsize = maxsize
+        self.directory = Path(directory) if directory is not None else None
+        self._entries: OrderedDict[str, PolyhedralEncoding] = OrderedDict()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _path(self, key: str) -> Path:
+        digest = key.split(":", 1)[-1]
+        return self.directory / digest[:2] / f"{digest}.json"
+
+    def get(self, key: str) -> PolyhedralEncoding | None:
+        enc = self._entries.get(key)
+        if enc is not None:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return enc
+        if self.directory is not None:
+            try:
+                with self._path(key).open("r", encoding="utf-8") as f:
+                    doc = json.load(f)
+                enc = PolyhedralEncoding(**{name: doc[name] for name in _ENCODING_FIELDS}, provenance={})
+            except (OSError, ValueError, KeyError, TypeError):
+                enc = None
+            if enc is not None:
+                self.disk_hits += 1
+                self._remember(key, enc)
+                return enc
+        self.misses += 1
+        return None
+
+    def put(self, key: str, enc: PolyhedralEncoding) -> None:
+        self._remember(key, enc)
+        if self.directory is not None:
+            path = self._path(key)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            doc = {name: getattr(enc, name) for name in _ENCODING_FIELDS}
+            tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+            tmp.write_text(json.dumps(doc, ensure_ascii=False), encoding="utf-8")
+            os.replace(tmp, path)
+
+    def _remember(self, key: str, enc: PolyhedralEncoding) -> None:
+        if self.maxsize <= 0:
+            return
+        self._entries[key] = enc
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self) -> None:
+        """Drop in-memory entries (the disk store is left alone) and reset counters."""
+        self._entries.clear()
+        self.hits = self.disk_hits = self.misses = self.evictions = 0
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "size": len(self._entries),
+        }
+
+
+# Stages of one encode() call, in execution order (see StageProfiler).
+PROFILE_STAGES = ("load", "extract", "cache", "scan", "tags", "normalize", "glyph", "equations", "build")
+
+
+class StageHistogram:
+    """Durations in log2 nanosecond buckets, plus count, total, min and max.
+
+    Histograms from different encoders, threads or processes combine with
+    merge(); percentile() reads the bucket upper bound, so it is exact to
+    within a factor of two.
+    """
+
+    __slots__ = ("count", "total_ns", "min_ns", "max_ns", "buckets")
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.total_ns = 0
+        self.min_ns = 0
+        self.max_ns = 0
+        self.buckets: dict[int, int] = {}
+
+    def add(self, ns: int) -> None:
+        if not self.count or ns < self.min_ns:
+            self.min_ns = ns
+        if ns > self.max_ns:
+            self.max_ns = ns
+        self.count += 1
+        self.total_ns += ns
+        b = ns.bit_length()
+        self.buckets[b] = self.buckets.get(b, 0) + 1
+
+    def merge(self, other: StageHistogram) -> None:
+        if not other.count:
+            return
+        if not self.count or other.min_ns < self.min_ns:
+            self.min_ns = other.min_ns
+        self.max_ns = max(self.max_ns, other.max_ns)
+        self.count += other.count
+        self.total_ns += other.total_ns
+        for b, n in other.buckets.items():
+            self.buckets[b] = self.buckets.get(b, 0) + n
+
+    def percentile(self, q: float) -> int:
+        """Upper bound in ns of the bucket holding the q-quantile (0 when empty)."""
+        rank = q * self.count
+        seen = 0
+        for b in sorted(self.buckets):
+            seen += self.buckets[b]
+            if seen >= rank:
+                return min((1 << b) - 1, self.max_ns)
+        return self.max_ns
+
+
+class StageProfiler:
+    """Per-stage duration histograms and counters for PolyhedralEncoder.encode().
+
+    Attach one with PolyhedralEncoder(profiler=...) or the profiled()
+    context manager. Stages are PROFILE_STAGES: load (freshness check and
+    any recompile), extract (payload -> text and tags), cache (lookup,
+    when the encoder has an EncodeCache), scan (keyword match), tags (tag
+    bonus), normalize (L1 amplitudes and counts), glyph (signature),
+    equations (threshold mask and hash resolution) and build (the
+    PolyhedralEncoding itself). Counters track encodes, chars,
+    keyword_hits, tag_hits, equations, cache_hits and reloads.
+
+    encode_thresholds() and encode_file() record the stages they run.
+    Only in-process calls are recorded: worker processes of
+    encode_parallel keep their own copies.
+    """
+
+    def __init__(self) -> None:
+        self.stages = {stage: StageHistogram() for stage in PROFILE_STAGES}
+        self.counters: dict[str, int] = dict.fromkeys(
+            ("encodes", "chars", "keyword_hits", "tag_hits", "equations", "cache_hits", "reloads"), 0
+        )
+
+    def add(self, stage: str, ns: int) -> None:
+        self.stages[stage].add(ns)
+
+    def count(self, name: str, n: int = 1) -> None:
+        self.counters[name] = self.counters.get(name, 0) + n
+
+    def merge(self, other: StageProfiler) -> None:
+        for stage, hist in other.stages.items():
+            self.stages.setdefault(stage, StageHistogram()).merge(hist)
+        for name, n in other.counters.items():
+            self.count(name, n)
+
+    def summary(self) -> dict[str, Any]:
+        """JSON-ready {"stages": {stage: timings in µs and share of the total}, "counters": {...}}."""
+        total = sum(h.total_ns for h in self.stages.values()) or 1
+        stages = {}
+        for stage, h in self.stages.items():
+            if not h.count:
+                continue
+            stages[stage] = {
+                "count": h.count,
+                "total_ms": h.total_ns / 1e6,
+                "mean_us": h.total_ns / h.count / 1e3,
+                "p50_us": h.percentile(0.5) / 1e3,
+                "p99_us": h.percentile(0.99) / 1e3,
+                "max_us": h.max_ns / 1e3,
+                "share": h.total_ns / total,
+            }
+        return {"stages": stages, "counters": dict(self.counters)}
+
+    def report(self) -> str:
+        """The summary as a fixed-width table."""
+        summary = self.summary()
+        lines = [f"{'stage':<10} {'count':>7} {'total ms':>10} {'mean µs':>9} {'p50 µs':>9} {'p99 µs':>9} {'share':>6}"]
+        for stage, r in summary["stages"].items():
+            lines.append(
+                f"{stage:<10} {r['count']:>7} {r['total_ms']:>10.3f} {r['mean_us']:>9.1f}"
+                f" {r['p50_us']:>9.1f} {r['p99_us']:>9.1f} {r['share']:>6.1%}"
+            )
+        lines.append("  ".join(f"{name}={n}" for name, n in summary["counters"].items()))
+        return "\n".join(lines)
+
+
+def _counting_chars(chunks: Iterable[str], prof: StageProfiler) -> Iterator[str]:
+    for chunk in chunks:
+        prof.count("chars", len(chunk))
+        yield chunk
+
+
+def iter_file_text(path: str | Path, chunk_bytes: int = 1 << 20, encoding: str = "utf-8") -> Iterator[str]:
+    """Decode a file through mmap in pieces of about chunk_bytes, each cut after whitespace.
+
+    Multi-byte characters split between slices are held back by an
+    incremental decoder; the text after a piece's last space or newline
+    moves on to the next piece (so lower() never sees a word split across
+    pieces), unless the piece has no whitespace at all. Mapped pages are
+    released once read, so resident memory stays near chunk_bytes.
+    """
+    with open(path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if size == 0:
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as m:
+            decoder = codecs.getincrementaldecoder(encoding)()
+            release = getattr(m, "madvise", None) if hasattr(mmap, "MADV_DONTNEED") else None
+            carry = ""
+            released = 0
+            for start in range(0, size, chunk_bytes):
+                data = m[start:start + chunk_bytes]
+                done = start - start % mmap.PAGESIZE
+                if release is not None and done > released:
+                    release(mmap.MADV_DONTNEED, released, done - released)
+                    released = done
+                piece = carry + decoder.decode(data, final=start + chunk_bytes >= size)
+                cut = max(piece.rfind(" "), piece.rfind("\n")) + 1
+                if cut:
+                    carry = piece[cut:]
+                    piece = piece[:cut]
+                else:
+                    carry = ""
+                if piece:
+                    yield piece
+            if carry:
+                yield carry
+
+
+def _clone(enc: PolyhedralEncoding, provenance: dict | tuple) -> PolyhedralEncoding:
+    """Copy of a cached encoding with fresh storage, so callers can't mutate the cache."""
+    return PolyhedralEncoding.from_arrays(
+        enc.family_order,
+        enc.principle_order,
+        enc.counts[:],
+        enc.amplitudes[:],
+        list(enc.equation_hashes),
+        enc.glyph_signature,
+        provenance,
+    )
+
+
+class PolyhedralEncoder:
+    """Reusable encoder holding the compiled ontology and equation index.
+
+    Parses families.json, principles.json and equation_index.json once and
+    keeps the derived tables (canonical order, glyphs, equation ids, the
+    inverted id -> hash map, the compiled KeywordMatcher) warm across calls. Source mtimes are checked
+    on each encode() and the tables recompile when any file changes;
+    reload() forces a recompile.
+
+    timestamp controls provenance["timestamp"]: "now" (default) stamps the
+    current UTC time, None omits the field and any other string is used
+    verbatim, so identical inputs serialize to identical JSON. cache, an
+    optional EncodeCache, short-circuits repeat payloads in encode().
+    family_keywords / principle_keywords override the module keyword maps.
+    Every encoding's provenance carries the encoder's fingerprints.
+    precompiled names a build_precompiled() file to restore the tables
+    from when it matches the sources (None always compiles from JSON).
+    profiler, an optional StageProfiler, records per-stage encode() timings;
+    without one encode() pays a single attribute check.
+    """
+
+    def __init__(
+        self,
+        families_path: Path | None = None,
+        principles_path: Path | None = None,
+        index_path: Path | None = None,
+        check_mtime: bool = True,
+        timestamp: str | None = "now",
+        cache: EncodeCache | None = None,
+        family_keywords: dict[str, list[str]] | None = None,
+        principle_keywords: dict[str, list[str]] | None = None,
+        precompiled: str | Path | None = PRECOMPILED_PATH,
+        profiler: StageProfiler | None = None,
+    ) -> None:
+        self.family_keywords = family_keywords if family_keywords is not None else _FAMILY_KEYWORDS
+        self.principle_keywords = principle_keywords if principle_keywords is not None else _PRINCIPLE_KEYWORDS
+        self.families_path = Path(families_path or FAMILIES_PATH)
+        self.principles_path = Path(principles_path or PRINCIPLES_PATH)
+        self.index_path = Path(index_path or INDEX_PATH)
+        self.check_mtime = check_mtime
+        self.timestamp = timestamp
+        self.cache = cache
+        self.precompiled = precompiled
+        self.profiler = profiler
+        self._mtimes: tuple = ()
+        t0 = perf_counter_ns()
+        self.reload()
+        if profiler is not None:
+            profiler.add("load", perf_counter_ns() - t0)
+
+    def _source_mtimes(self) -> tuple:
+        mtimes = []
+        for path in (self.families_path, self.principles_path, self.index_path):
+            try:
+                mtimes.append(path.stat().st_mtime_ns)
+            except FileNotFoundError:
+                mtimes.append(None)
+        return tuple(mtimes)
+
+    def reload(self) -> None:
+        """Re-read the ontology and index files and rebuild every derived table.
+
+        When self.precompiled is a build_precompiled() file made from the
+        same sources (and the same Python), the tables are restored from it
+        instead of parsed and compiled. self.loaded_from says which ran.
+        """
+        mtimes = self._source_mtimes()
+        fam_raw = self.families_path.read_bytes()
+        prin_raw = self.principles_path.read_bytes()
+        index_raw = self.index_path.read_bytes() if self.index_path.exists() else None
+        # Content fingerprints of everything an encoding depends on.
+        keywords = [
+            {nid: list(kws) for nid, kws in self.family_keywords.items()},
+            {nid: list(kws) for nid, kws in self.principle_keywords.items()},
+        ]
+        self.fingerprints = {
+            "keywords": _sha256(json.dumps(keywords, ensure_ascii=False).encode("utf-8")),
+            "ontology": _sha256(fam_raw, b"\0", prin_raw),
+            "index": _sha256(index_raw) if index_raw is not None else None,
+        }
+        self.fingerprint = _sha256(json.dumps(self.fingerprints, sort_keys=True).encode("utf-8"))
+        tables = self._read_precompiled()
+        if tables is not None:
+            self._restore_tables(tables)
+            self.loaded_from = "precompiled"
+        else:
+            self._compile_tables(json.loads(fam_raw), json.loads(prin_raw),
+                                 json.loads(index_raw) if index_raw is not None else None)
+            self.loaded_from = "json"
+        self._mtimes = mtimes
+        if self.profiler is not None:
+            self.profiler.count("reloads")
+
+    def _compile_tables(self, fam_doc: dict, prin_doc: dict, index: dict | None) -> None:
+        self.fam_order = [f["id"] for f in fam_doc["families"]]
+        self.prin_order = [p["id"] for p in prin_doc["principles"]]
+        self.fam_glyphs = {f["id"]: f["glyph"] for f in fam_doc["families"]}
+        self.prin_glyphs = {p["id"]: p["glyph"] for p in prin_doc["principles"]}
+        self.names = {f["id"]: f["name"] for f in fam_doc["families"]}
+        self.names.update({p["id"]: p["name"] for p in prin_doc["principles"]})
+        self.fam_eq = {f["id"]: f.get("equation_ids", []) for f in fam_doc["families"]}
+        self.prin_eq = {p["id"]: p.get("equation_ids", []) for p in prin_doc["principles"]}
+        self.eq_id_to_hash: dict[str, str] | None = None
+        if index is not None:
+            self.eq_id_to_hash = {eq_id: h for h, eq_id in index["by_hash"].items()}
+        self.matcher = KeywordMatcher(self.family_keywords, self.principle_keywords)
+        self._compile_columns()
+        self._share_tables()
+
+    def _share_tables(self) -> None:
+        """Cheap views of the compiled tables, rebuilt rather than stored."""
+        # Shared by every PolyhedralEncoding this encoder produces.
+        self._fam_ids = tuple(self.fam_order)
+        self._prin_ids = tuple(self.prin_order)
+        self.glyphs = {**self.fam_glyphs, **self.prin_glyphs}
+        self._glyph_by_col = [self.fam_glyphs[f] for f in self.fam_order] + [self.prin_glyphs[p] for p in self.prin_order]
+        self._eq_by_mask: dict[int, tuple[str, ...]] = {}
+
+    _TABLE_ATTRS = (
+        "fam_order", "prin_order", "fam_glyphs", "prin_glyphs", "names", "fam_eq", "prin_eq",
+        "eq_id_to_hash", "_kw_cols", "_tag_cols", "equation_order", "_eq_walk",
+    )
+
+    def _precompiled_key(self) -> bytes:
+        return _sha256(_PRECOMPILED_FORMAT, sys.version.encode(), self.fingerprint.encode()).encode()
+
+    def _read_precompiled(self) -> dict | None:
+        if self.precompiled is None:
+            return None
+        try:
+            key, tables = marshal.loads(Path(self.precompiled).read_bytes())
+        except (OSError, EOFError, ValueError, TypeError):
+            return None
+        return tables if key == self._precompiled_key() else None
+
+    def _restore_tables(self, tables: dict) -> None:
+        for name in self._TABLE_ATTRS:
+            setattr(self, name, tables[name])
+        self.matcher = KeywordMatcher.from_state(tables["matcher"])
+        self._share_tables()
+
+    def write_precompiled(self, path: str | Path) -> Path:
+        """Marshal the compiled tables to path, keyed by the current source hashes."""
+        tables = {name: getattr(self, name) for name in self._TABLE_ATTRS}
+        tables["matcher"] = self.matcher.state()
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        tmp.write_bytes(marshal.dumps((self._precompiled_key(), tables)))
+        os.replace(tmp, path)
+        return path
+
+    def snapshot(self) -> dict[str, Any]:
+        """The tables behind each fingerprint, as JSON-ready dicts keyed like self.fingerprints.
+
+        keywords: the family and principle keyword lists by id;
+        ontology: canonical order, glyphs and equation ids by id;
+        index: equation id -> hash (None without an index file).
+        bridge_reencode.SnapshotStore keeps these so plan_reencode can diff old against new.
+        """
+        return {
+            "keywords": {
+                "family": self.matcher.family_keywords,
+                "principle": self.matcher.principle_keywords,
+            },
+            "ontology": {
+                "family_order": self.fam_order,
+                "principle_order": self.prin_order,
+                "glyphs": self.glyphs,
+                "equation_ids": {**self.fam_eq, **self.prin_eq},
+            },
+            "index": self.eq_id_to_hash,
+        }
+
+    def _compile_columns(self) -> None:
+        """Column tables for batch encoding: families 0..19, then principles."""
+        n_fam = len(self.fam_order)
+        col = {fid: j for j, fid in enumerate(self.fam_order)}
+        col.update({pid: n_fam + j for j, pid in enumerate(self.prin_order)})
+        scan_ids = list(self.matcher.family_keywords) + list(self.matcher.principle_keywords)
+        # Keyword index -> columns it bumps; tag id -> column for the tag bonus.
+        self._kw_cols = [[col[nid] for _which, nid in targets if nid in col] for targets in self.matcher._targets]
+        self._tag_cols = {nid: col[nid] for nid in scan_ids if nid in col}
+        # Equation index as bits: every distinct hash gets a bit in scan order
+        # (equation_order); each scanned column with equations keeps its
+        # deduplicated hashes, their bits and their union mask.
+        self.equation_order: list[str] = []
+        bit_of: dict[str, int] = {}
+        self._eq_walk: list[tuple[int, int, tuple[str, ...], tuple[int, ...]]] = []
+        if self.eq_id_to_hash is not None:
+            eq_ids = {**self.fam_eq, **self.prin_eq}
+            for nid in scan_ids:
+                if nid not in col:
+                    continue
+                hashes = dict.fromkeys(self.eq_id_to_hash[e] for e in eq_ids.get(nid, []) if self.eq_id_to_hash.get(e))
+                bits = tuple(bit_of.setdefault(h, len(bit_of)) for h in hashes)
+                if bits:
+                    self._eq_walk.append((col[nid], reduce(or_, (1 << b for b in bits)), tuple(hashes), bits))
+            self.equation_order = list(bit_of)
+
+    def _resolve_equations(self, cols_mask: int) -> tuple[str, ...]:
+        """Equation hashes for the columns set in cols_mask, first-seen order as in the scan walk.
+
+        Columns are unioned as bitmasks; a column whose equations are all
+        new is appended whole. Results are memoized per column mask.
+        """
+        hit = self._eq_by_mask.get(cols_mask)
+        if hit is not None:
+            return hit
+        out: list[str] = []
+        seen = 0
+        for c, mask, hashes, bits in self._eq_walk:
+            if cols_mask >> c & 1:
+                new = mask & ~seen
+                if new == mask:
+                    out.extend(hashes)
+                elif new:
+                    out.extend(h for h, b in zip(hashes, bits) if new >> b & 1)
+                seen |= mask
+        if len(self._eq_by_mask) >= 1 << 14:
+            self._eq_by_mask.clear()
+        hit = self._eq_by_mask[cols_mask] = tuple(out)
+        return hit
+
+    def node_equations(self):
+        """W×E boolean matrix: column (family then principle) -> equation_order entries it invokes."""
+        np = _require_numpy()
+        m = np.zeros((len(self.fam_order) + len(self.prin_order), len(self.equation_order)), dtype=bool)
+        for c, _mask, _hashes, bits in self._eq_walk:
+            m[c, list(bits)] = True
+        return m
+
+    def is_stale(self) -> bool:
+        """True when any source file changed (or appeared/vanished) since the last load."""
+        return self._source_mtimes() != self._mtimes
+
+    def _ensure_fresh(self) -> None:
+        if self.check_mtime and self.is_stale():
+            self.reload()
+
+    def cache_key(self, text: str, tags: list[str], input_type: str, threshold: float) -> str:
+        """Content address of an encoding: normalized text and tags, threshold, fingerprints."""
+        header = [self.fingerprint, input_type, threshold, sorted(t.upper().strip() for t in tags)]
+        return _sha256(
+            json.dumps(header).encode("utf-8"),
+            b"\0",
+            text.lower().encode("utf-8", "surrogatepass"),
+        )
+
+    def encode(self, payload: Any, threshold: float = 0.05) -> PolyhedralEncoding:
+        """Encode a PhysicalConstraint, str, or dict into a PolyhedralEncoding.
+
+        threshold: amplitude floor for including a Family/Principle's equations
+        in equation_hashes. Default 0.05.
+        """
+        if self.profiler is not None:
+            return self._encode_profiled(payload, threshold)
+        self._ensure_fresh()
+        text, tags, input_type = _payload_to_text_and_tags(payload)
+        return self._encode_extracted(text, tags, input_type, threshold)
+
+    def _encode_profiled(self, payload: Any, threshold: float) -> PolyhedralEncoding:
+        """encode() with every stage timed into self.profiler."""
+        prof = self.profiler
+        t0 = perf_counter_ns()
+        self._ensure_fresh()
+        t1 = perf_counter_ns()
+        text, tags, input_type = _payload_to_text_and_tags(payload)
+        t2 = perf_counter_ns()
+        prof.add("load", t1 - t0)
+        prof.add("extract", t2 - t1)
+        prof.count("encodes")
+        prof.count("chars", len(text))
+        cache = self.cache
+        if cache is None:
+            return self._encode_text_profiled(text, tags, input_type, threshold, prof)
+        key = self.cache_key(text, tags, input_type, threshold)
+        hit = cache.get(key)
+        prof.add("cache", perf_counter_ns() - t2)
+        if hit is not None:
+            prof.count("cache_hits")
+            return _clone(hit, self._provenance_args(input_type, threshold))
+        enc = self._encode_text_profiled(text, tags, input_type, threshold, prof)
+        cache.put(key, _clone(enc, {}))
+        return enc
+
+    def _encode_text_profiled(
+        self, text: str, tags: list[str], input_type: str, threshold: float, prof: StageProfiler
+    ) -> PolyhedralEncoding:
+        """_encode_text() split at the PROFILE_STAGES boundaries."""
+        counts, amplitudes, glyph_signature = self._measure_profiled(text, tags, prof)
+        t0 = perf_counter_ns()
+        equations = list(self._resolve_equations(_columns_above(amplitudes, threshold)))
+        t1 = perf_counter_ns()
+        enc = PolyhedralEncoding.from_arrays(
+            self._fam_ids,
+            self._prin_ids,
+            counts,
+            array("d", amplitudes),
+            equations,
+            glyph_signature,
+            self._provenance_args(input_type, threshold),
+        )
+        prof.add("equations", t1 - t0)
+        prof.add("build", perf_counter_ns() - t1)
+        prof.count("equations", len(equations))
+        return enc
+
+    def _measure_profiled(self, text: str, tags: list[str], prof: StageProfiler) -> tuple[array, list[float], str]:
+        """_measure() with the scan, tags, normalize and glyph stages timed."""
+        t0 = perf_counter_ns()
+        fam_counts, prin_counts, _ = self.matcher.scan(text)
+        t1 = perf_counter_ns()
+        hits = sum(fam_counts.values()) + sum(prin_counts.values())  # untimed: before the tag bonus
+        t1b = perf_counter_ns()
+        _tag_bonus(fam_counts, prin_counts, tags)
+        t2 = perf_counter_ns()
+        counts, amplitudes, fam_amps, prin_amps = self._normalize(fam_counts, prin_counts)
+        t3 = perf_counter_ns()
+        glyph_signature = self._glyph(fam_amps, prin_amps)
+        prof.add("scan", t1 - t0)
+        prof.add("tags", t2 - t1b)
+        prof.add("normalize", t3 - t2)
+        prof.add("glyph", perf_counter_ns() - t3)
+        prof.count("keyword_hits", hits)
+        prof.count("tag_hits", sum(counts) - hits)
+        return counts, amplitudes, glyph_signature
+
+    def _encode_extracted(self, text: str, tags: list[str], input_type: str, threshold: float) -> PolyhedralEncoding:
+        """encode() after payload extraction: consult the cache, else encode the text."""
+        cache = self.cache
+        if cache is None:
+            return self._encode_text(text, tags, input_type, threshold)
+
+        key = self.cache_key(text, tags, input_type, threshold)
+        hit = cache.get(key)
+        if hit is not None:
+            return _clone(hit, self._provenance_args(input_type, threshold))
+        enc = self._encode_text(text, tags, input_type, threshold)
+        cache.put(key, _clone(enc, {}))
+        return enc
+
+    def _encode_text(self, text: str, tags: list[str], input_type: str, threshold: float) -> PolyhedralEncoding:
+        """Encode already-extracted payload text and tags (tables must be fresh)."""
+        counts, amplitudes, glyph_signature = self._measure(text, tags)
+        return PolyhedralEncoding.from_arrays(
+            self._fam_ids,
+            self._prin_ids,
+            counts,
+            array("d", amplitudes),
+            list(self._resolve_equations(_columns_above(amplitudes, threshold))),
+            glyph_signature,
+            self._provenance_args(input_type, threshold),
+        )
+
+    def _measure(self, text: str, tags: list[str]) -> tuple[array, list[float], str]:
+        """One keyword scan plus tag bonus -> (counts, amplitudes, glyph signature), canonical order."""
+        fam_counts, prin_counts, _ = self.matcher.scan(text)
+        _tag_bonus(fam_counts, prin_counts, tags)
+        return self._derive(fam_counts, prin_counts)
+
+    def _derive(self, fam_counts: dict[str, int], prin_counts: dict[str, int]) -> tuple[array, list[float], str]:
+        """Counts by id -> (counts, amplitudes, glyph signature) in canonical order."""
+        counts, amplitudes, fam_amps, prin_amps = self._normalize(fam_counts, prin_counts)
+        return counts, amplitudes, self._glyph(fam_amps, prin_amps)
+
+    def _normalize(self, fam_counts: dict[str, int], prin_counts: dict[str, int]) -> tuple:
+        """Counts by id -> (counts array, amplitude list, family amps, principle amps)."""
+        fam_amps = _l1_normalize(fam_counts)
+        prin_amps = _l1_normalize(prin_counts)
+        amplitudes = _ordered_vector(fam_amps, self.fam_order) + _ordered_vector(prin_amps, self.prin_order)
+        counts = array(
+            "i", [fam_counts.get(k, 0) for k in self.fam_order] + [prin_counts.get(k, 0) for k in self.prin_order]
+        )
+        return counts, amplitudes, fam_amps, prin_amps
+
+    def _glyph(self, fam_amps: dict[str, float], prin_amps: dict[str, float]) -> str:
+        return sys.intern(_composite_glyph(fam_amps, prin_amps, self.fam_glyphs, self.prin_glyphs))
+
+    def encode_file(
+        self, path: str | Path, threshold: float = 0.05, chunk_bytes: int = 1 << 20, encoding: str = "utf-8"
+    ) -> PolyhedralEncoding:
+        """Encode a text file of any size in bounded memory.
+
+        Equals encode(Path(path).read_text(encoding)) but the file is
+        memory-mapped and scanned about chunk_bytes at a time (see
+        iter_file_text and KeywordMatcher.scan_chunks), so peak memory
+        depends on chunk_bytes, not the file size. The profiler, if any,
+        records load, scan (reading included), normalize, glyph, equations
+        and build. The cache is not consulted: its key covers the whole
+        text, which is only known once the file has been scanned.
+        """
+        prof = self.profiler
+        t0 = perf_counter_ns()
+        self._ensure_fresh()
+        t1 = perf_counter_ns()
+        chunks = iter_file_text(path, chunk_bytes, encoding)
+        if prof is not None:
+            chunks = _counting_chars(chunks, prof)
+        fam_counts, prin_counts = self.matcher.scan_chunks(chunks)
+        t2 = perf_counter_ns()
+        counts, amplitudes, fam_amps, prin_amps = self._normalize(fam_counts, prin_counts)
+        t3 = perf_counter_ns()
+        glyph_signature = self._glyph(fam_amps, prin_amps)
+        t4 = perf_counter_ns()
+        equations = list(self._resolve_equations(_columns_above(amplitudes, threshold)))
+        t5 = perf_counter_ns()
+        enc = PolyhedralEncoding.from_arrays(
+            self._fam_ids,
+            self._prin_ids,
+            counts,
+            array("d", amplitudes),
+            equations,
+            glyph_signature,
+            self._provenance_args("text", threshold),
+        )
+        if prof is not None:
+            prof.add("load", t1 - t0)
+            prof.add("scan", t2 - t1)
+            prof.add("normalize", t3 - t2)
+            prof.add("glyph", t4 - t3)
+            prof.add("equations", t5 - t4)
+            prof.add("build", perf_counter_ns() - t5)
+            prof.count("encodes")
+            prof.count("keyword_hits", sum(counts))
+            prof.count("equations", len(equations))
+        return enc
+
+    def encode_thresholds(self, payload: Any, thresholds: Iterable[float]) -> list[PolyhedralEncoding]:
+        """Encode once and resolve equation_hashes at every threshold, in the order given.
+
+        Columns are ranked by amplitude a single time; the columns above a
+        threshold are then a prefix of that ranking, so each threshold
+        costs one bisect plus a (memoized) equation union. With a cache,
+        each threshold is looked up and stored under its own cache_key and
+        the scan is skipped when all of them hit; the profiler counts one
+        encode per call. Freshly encoded results share their count/amplitude
+        arrays.
+        """
+        prof = self.profiler
+        t0 = perf_counter_ns()
+        self._ensure_fresh()
+        t1 = perf_counter_ns()
+        text, tags, input_type = _payload_to_text_and_tags(payload)
+        t2 = perf_counter_ns()
+        thresholds = list(thresholds)
+        stamp = _resolve_timestamp(self.timestamp)
+        provenance = [(input_type, "polyhedral_bridge.encode", stamp, t, self.fingerprints) for t in thresholds]
+        results: list[PolyhedralEncoding | None] = [None] * len(thresholds)
+        cache = self.cache
+        if cache is not None:
+            keys = [self.cache_key(text, tags, input_type, t) for t in thresholds]
+            for i, key in enumerate(keys):
+                hit = cache.get(key)
+                if hit is not None:
+                    results[i] = _clone(hit, provenance[i])
+        misses = [i for i, enc in enumerate(results) if enc is None]
+        if prof is not None:
+            prof.add("load", t1 - t0)
+            prof.add("extract", t2 - t1)
+            if cache is not None:
+                prof.add("cache", perf_counter_ns() - t2)
+            prof.count("encodes")
+            prof.count("chars", len(text))
+            prof.count("cache_hits", len(thresholds) - len(misses))
+        if not misses:
+            return results
+
+        if prof is not None:
+            counts, amplitudes, glyph_signature = self._measure_profiled(text, tags, prof)
+        else:
+            counts, amplitudes, glyph_signature = self._measure(text, tags)
+        t3 = perf_counter_ns()
+        ranked = sorted(range(len(amplitudes)), key=amplitudes.__getitem__, reverse=True)
+        neg_sorted = [-amplitudes[c] for c in ranked]
+        prefix = [0]
+        for c in ranked:
+            prefix.append(prefix[-1] | 1 << c)
+        equations = {i: list(self._resolve_equations(prefix[bisect_left(neg_sorted, -thresholds[i])])) for i in misses}
+        t4 = perf_counter_ns()
+        amps = array("d", amplitudes)
+        for i in misses:
+            enc = results[i] = PolyhedralEncoding.from_arrays(
+                self._fam_ids, self._prin_ids, counts, amps, equations[i], glyph_signature, provenance[i]
+            )
+            if cache is not None:
+                cache.put(keys[i], _clone(enc, {}))
+        if prof is not None:
+            prof.add("equations", t4 - t3)
+            prof.add("build", perf_counter_ns() - t4)
+            prof.count("equations", sum(map(len, equations.values())))
+        return results
+
+    def _provenance_args(self, input_type: str, threshold: float) -> tuple:
+        stamp = _resolve_timestamp(self.timestamp)
+        return (input_type, "polyhedral_bridge.encode", stamp, threshold, self.fingerprints)
+
+    def encode_batch(self, payloads: Iterable[Any], threshold: float = 0.05) -> PolyhedralBatchEncoding:
+        """Encode many payloads into NumPy count/amplitude matrices.
+
+        Row i matches encode(payloads[i]): same counts, amplitudes (zero-count
+        rows stay all-zero), glyph signature and equation hashes. Glyph
+        signatures and equation sets are resolved once per distinct pattern
+        rather than once per row. payloads may also be a PayloadColumns,
+        whose text and tag columns are assembled in bulk.
+        """
+        np = _require_numpy()
+        self._ensure_fresh()
+        n_fam = len(self.fam_order)
+        width = n_fam + len(self.prin_order)
+
+        # Flat (row * width + col) hits; bincount turns them into counts.
+        hits = array("q")
+        input_types: list[str] = []
+        match = self.matcher.match
+        kw_cols = self._kw_cols
+        tag_cols = self._tag_cols
+        if isinstance(payloads, PayloadColumns):
+            rows = zip(*payloads.extract())
+        else:
+            rows = map(_payload_to_text_and_tags, payloads)
+        for text, tags, input_type in rows:
+            base = len(input_types) * width
+            for i in match(text.lower()):
+                for c in kw_cols[i]:
+                    hits.append(base + c)
+            for tag in tags:
+                c = tag_cols.get(tag.upper().strip())
+                if c is not None:
+                    hits.append(base + c)
+            input_types.append(input_type)
+        n = len(input_types)
+
+        counts = np.bincount(np.frombuffer(hits, dtype=np.int64), minlength=n * width)
+        counts = counts.astype(np.int32).reshape(n, width)
+        fam_counts, prin_counts = counts[:, :n_fam], counts[:, n_fam:]
+        fam_amps, prin_amps = _l1_rows(np, fam_counts), _l1_rows(np, prin_counts)
+
+        glyphs = self._batch_glyphs(np, fam_counts, prin_counts)
+        above = np.concatenate([fam_amps, prin_amps], axis=1) > threshold
+        equation_hashes = self._batch_equations(np, above)
+
+        return PolyhedralBatchEncoding(
+            family_counts=fam_counts,
+            principle_counts=prin_counts,
+            family_amplitudes_l1=fam_amps,
+            principle_amplitudes_l1=prin_amps,
+            glyph_signatures=glyphs,
+            equation_hashes=equation_hashes,
+            family_order=list(self.fam_order),
+            principle_order=list(self.prin_order),
+            input_types=input_types,
+            timestamp=self.timestamp,
+            threshold=threshold,
+            above_threshold=above,
+            equation_order=list(self.equation_order),
+            node_equations=self.node_equations(),
+            fingerprints=self.fingerprints,
+        )
+
+    def resonance_profile(
+        self, text: str, size: int, step: int | None = None, unit: str = "chars"
+    ) -> ResonanceProfile:
+        """Counts, amplitudes and glyphs over sliding windows of text, without re-encoding each window.
+
+        unit is "chars", "tokens" (whitespace-delimited) or "lines"; step
+        defaults to size (adjacent windows). Every keyword occurrence is
+        located in one pass (KeywordMatcher.occurrences); a window holds the keyword when
+        an occurrence starts in [start, end - len(keyword)], which two
+        searchsorted calls answer for all windows at once. Tags play no part.
+        """
+        np = _require_numpy()
+        if unit not in WINDOW_UNITS:
+            raise ValueError(f"unit must be one of {WINDOW_UNITS}, got {unit!r}")
+        step = size if step is None else step
+        if size < 1 or step < 1:
+            raise ValueError("size and step must be positive")
+        self._ensure_fresh()
+        text_l = text.lower()
+        spans = _window_spans(np, text_l, size, step, unit)
+        n_fam = len(self.fam_order)
+        counts = np.zeros((len(spans), n_fam + len(self.prin_order)), dtype=np.int32)
+        tokens, offsets = _token_starts(np, text_l)
+        for i, starts in self.matcher.occurrences(text_l, tokens, offsets.tolist()).items():
+            occ = np.array(starts, dtype=np.int64)
+            present = np.searchsorted(occ, spans[:, 1] - len(self.matcher.keywords[i]), side="right") > (
+                np.searchsorted(occ, spans[:, 0], side="left")
+            )
+            for c in self._kw_cols[i]:
+                counts[:, c] += present
+        fam_counts, prin_counts = counts[:, :n_fam], counts[:, n_fam:]
+        return ResonanceProfile(
+            family_counts=fam_counts,
+            principle_counts=prin_counts,
+            family_amplitudes_l1=_l1_rows(np, fam_counts),
+            principle_amplitudes_l1=_l1_rows(np, prin_counts),
+            glyph_signatures=self._batch_glyphs(np, fam_counts, prin_counts),
+            spans=spans,
+            unit=unit,
+            size=size,
+            step=step,
+            family_order=list(self.fam_order),
+            principle_order=list(self.prin_order),
+        )
+
+    def _batch_glyphs(self, np, fam_counts, prin_counts):
+        """Composite glyph per row: top-3 families ➝ top-2 principles, ties by id."""
+        n_fam = fam_counts.shape[1]
+        picks = []
+        for block, order, offset, k in (
+            (fam_counts, self.fam_order, 0, 3),
+            (prin_counts, self.prin_order, n_fam, 2),
+        ):
+            # Amplitude order within a row equals count order; ties break on id.
+            id_rank = np.argsort(np.argsort(np.array(order, dtype=object)))
+            ranks = np.broadcast_to(id_rank, block.shape)
+            top = np.lexsort((ranks, -block), axis=1)[:, :k]
+            present = np.take_along_axis(block, top, axis=1) > 0
+            picks.append(np.where(present, top + offset + 1, 0))
+        picks = np.concatenate(picks, axis=1).astype(np.int64)
+        radix = len(self._glyph_by_col) + 1
+        keys = picks @ (radix ** np.arange(picks.shape[1], dtype=np.int64))
+        uniq, first, inverse = np.unique(keys, return_index=True, return_inverse=True)
+        sigs = []
+        for row in first:
+            parts = [self._glyph_by_col[c - 1] for c in picks[row].tolist() if c]
+            sigs.append("➝".join(parts) if parts else "◯")
+        return np.array(sigs, dtype=object)[inverse.reshape(-1)]
+
+    def _batch_equations(self, np, above) -> list[tuple[str, ...]]:
+        """Equation hashes per row, resolved once per distinct above-threshold pattern."""
+        n = above.shape[0]
+        if not self._eq_walk or n == 0:
+            return [()] * n
+        packed = np.packbits(above, axis=1)
+        keys = np.ascontiguousarray(packed).view(np.dtype((np.void, packed.shape[1]))).reshape(-1)
+        uniq, first, inverse = np.unique(keys, return_index=True, return_inverse=True)
+        resolved = [
+            self._resolve_equations(reduce(or_, (1 << c for c in np.flatnonzero(above[row]).tolist()), 0))
+            for row in first
+        ]
+        return [resolved[j] for j in inverse.reshape(-1).tolist()]
+
+
+def _window_spans(np, text_l: str, size: int, step: int, unit: str):
+    """W×2 char spans of the sliding windows over text_l's chars, tokens or lines."""
+    if unit == "chars":
+        starts = ends = None
+        n = len(text_l)
+    elif unit == "tokens":
+        tokens, starts = _token_starts(np, text_l)
+        ends = starts + np.fromiter(map(len, tokens), dtype=np.int64, count=len(tokens))
+        n = len(tokens)
+    else:
+        breaks = [m.start() for m in re.finditer("\n", text_l)]
+        starts = [0] + [b + 1 for b in breaks]
+        ends = breaks + [len(text_l)]
+        if starts[-1] == len(text_l) and len(starts) > 1:  # trailing newline ends the last line
+            starts.pop()
+            ends.pop()
+        n = len(starts)
+    first = np.arange(0, max(n - size, 0) + step, step, dtype=np.int64)
+    first = first[(first == 0) | ((first < n) & (first + size - step < n))]  # stop once a window reaches the end
+    last = np.minimum(first + size, n)
+    if starts is None:
+        return np.stack([first, last], axis=1)
+    if n == 0:
+        return np.array([[0, len(text_l)]], dtype=np.int64)
+    return np.stack([np.asarray(starts, dtype=np.int64)[first], np.asarray(ends, dtype=np.int64)[last - 1]], axis=1)
+
+
+_WHITESPACE_CODES = None
+
+
+def _token_starts(np, text_l: str) -> tuple[list[str], Any]:
+    """(text_l.split(), start offset of each token) without a Python loop per token."""
+    global _WHITESPACE_CODES
+    if _WHITESPACE_CODES is None:
+        # Everything str.split() splits on; all of it lies below U+3001.
+        _WHITESPACE_CODES = np.array([c for c in range(0x3001) if chr(c).isspace()], dtype=np.uint32)
+    tokens = text_l.split()
+    codes = np.frombuffer(text_l.encode("utf-32-le", "surrogatepass"), dtype=np.uint32)
+    space = np.isin(codes, _WHITESPACE_CODES)
+    starts = np.flatnonzero(~space & np.concatenate(([True], space[:-1])))
+    return tokens, starts
+
+
+def _l1_rows(np, counts):
+    """Row-wise L1 normalization; all-zero rows stay all-zero like _l1_normalize."""
+    totals = counts.sum(axis=1, keepdims=True)
+    amps = np.zeros(counts.shape, dtype=np.float64)
+    np.divide(counts, totals, out=amps, where=totals > 0)
+    return amps
+
+
+_DEFAULT_ENCODER: PolyhedralEncoder | None = None
+
+
+def get_default_encoder() -> PolyhedralEncoder:
+    """Return the shared module-level encoder, compiling it on first use."""
+    global _DEFAULT_ENCODER
+    if _DEFAULT_ENCODER is None:
+        _DEFAULT_ENCODER = PolyhedralEncoder()
+    return _DEFAULT_ENCODER
+
+
+@contextmanager
+def profiled(
+    encoder: PolyhedralEncoder | None = None, profiler: StageProfiler | None = None
+) -> Iterator[StageProfiler]:
+    """Record encode() stage timings on encoder (default: the shared one) inside the with-block.
+
+    Yields the StageProfiler (a new one unless given). When the shared
+    encoder does not exist yet, compiling it is recorded as a load.
+    """
+    global _DEFAULT_ENCODER
+    prof = profiler or StageProfiler()
+    if encoder is None and _DEFAULT_ENCODER is None:
+        enc = _DEFAULT_ENCODER = PolyhedralEncoder(profiler=prof)
+        previous = None
+    else:
+        enc = encoder or get_default_encoder()
+        previous, enc.profiler = enc.profiler, prof
+    try:
+        yield prof
+    finally:
+        enc.profiler = previous
+
+
+def build_precompiled(path: str | Path | None = None, encoder: PolyhedralEncoder | None = None) -> Path:
+    """Compile the tables from JSON and write them to path (default PRECOMPILED_PATH).
+
+    Encoders pointed at the file restore from it while the ontology, index
+    and keyword maps hash the same; any edit falls back to JSON until rebuilt.
+    """
+    enc = encoder or PolyhedralEncoder(precompiled=None)
+    return enc.write_precompiled(path or PRECOMPILED_PATH)
+
+
 def encode(payload: Any, threshold: float = 0.05) -> PolyhedralEncoding:
     """Encode a PhysicalConstraint, str, or dict into a PolyhedralEncoding.
 
     threshold: amplitude floor for including a Family/Principle's equations
-    in equation_hashes. Default 0.05.
+    in equation_hashes. Default 0.05. Thin wrapper over the shared
+    PolyhedralEncoder returned by get_default_encoder().
     """
-    fam_doc, prin_doc = _load_ontology()
-    index = _load_index()
+    return get_default_encoder().encode(payload, threshold=threshold)
 
-    fam_order = [f["id"] for f in fam_doc["families"]]
-    prin_order = [p["id"] for p in prin_doc["principles"]]
-    fam_glyphs = {f["id"]: f["glyph"] for f in fam_doc["families"]}
-    prin_glyphs = {p["id"]: p["glyph"] for p in prin_doc["principles"]}
-    fam_eq = {f["id"]: f.get("equation_ids", []) for f in fam_doc["families"]}
-    prin_eq = {p["id"]: p.get("equation_ids", []) for p in prin_doc["principles"]}
 
-    text, tags, input_type = _payload_to_text_and_tags(payload)
+def encode_file(path: str | Path, threshold: float = 0.05, chunk_bytes: int = 1 << 20) -> PolyhedralEncoding:
+    """Encode a UTF-8 text file in bounded memory with the shared encoder (see PolyhedralEncoder.encode_file)."""
+    return get_default_encoder().encode_file(path, threshold=threshold, chunk_bytes=chunk_bytes)
 
-    fam_counts = _scan_keywords(text, _FAMILY_KEYWORDS)
-    prin_counts = _scan_keywords(text, _PRINCIPLE_KEYWORDS)
 
-    # Tag bonus for explicit FAM:* / PRIN:* references.
-    for tag in tags:
-        t = tag.upper().strip()
-        if t in fam_counts:
-            fam_counts[t] += 1
-        if t in prin_counts:
-            prin_counts[t] += 1
+def resonance_profile(text: str, size: int, step: int | None = None, unit: str = "chars") -> ResonanceProfile:
+    """Sliding-window resonance of text with the shared encoder (see PolyhedralEncoder.resonance_profile)."""
+    return get_default_encoder().resonance_profile(text, size, step=step, unit=unit)
 
-    fam_amps = _l1_normalize(fam_counts)
-    prin_amps = _l1_normalize(prin_counts)
-
-    fam_vector = _ordered_vector(fam_amps, fam_order)
-    prin_vector = _ordered_vector(prin_amps, prin_order)
-
-    equation_hashes: list[str] = []
-    if index is not None:
-        eq_id_to_hash = {eq_id: h for h, eq_id in index["by_hash"].items()}
-        seen: set[str] = set()
-        for fid, amp in fam_amps.items():
-            if amp > threshold:
-                for eq_id in fam_eq.get(fid, []):
-                    h = eq_id_to_hash.get(eq_id)
-                    if h and h not in seen:
-                        seen.add(h)
-                        equation_hashes.append(h)
-        for pid, amp in prin_amps.items():
-            if amp > threshold:
-                for eq_id in prin_eq.get(pid, []):
-                    h = eq_id_to_hash.get(eq_id)
-                    if h and h not in seen:
-                        seen.add(h)
-                        equation_hashes.append(h)
-
-    glyph_signature = _composite_glyph(fam_amps, prin_amps, fam_glyphs, prin_glyphs)
-
-    return PolyhedralEncoding(
-        family_vector=fam_vector,
-        principle_vector=prin_vector,
-        family_amplitudes_l1=fam_amps,
-        principle_amplitudes_l1=prin_amps,
-        family_raw_counts=fam_counts,
-        principle_raw_counts=prin_counts,
-        equation_hashes=equation_hashes,
-        glyph_signature=glyph_signature,
-        provenance={
-            "input_type": input_type,
-            "source": "polyhedral_bridge.encode",
-            "timestamp": datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
-            "crf_available": _HAS_CRF,
-            "amplitude_convention": "L1",
-            "rationale": "matches seed-physics energy conservation contract; linear interpretability",
-            "threshold": threshold,
-        },
-    )
+
+def encode_thresholds(payload: Any, thresholds: Iterable[float]) -> list[PolyhedralEncoding]:
+    """One encoding per threshold from a single scan (see PolyhedralEncoder.encode_thresholds)."""
+    return get_default_encoder().encode_thresholds(payload, thresholds)
+
+
+def parse_thresholds(specs: str | Iterable[str]) -> list[float]:
+    """Parse "0.05" / "0.05,0.1,0.2" (or several such strings) into a list of floats."""
+    specs = [specs] if isinstance(specs, str) else list(specs)
+    try:
+        return [float(part) for spec in specs for part in spec.split(",") if part.strip()]
+    except ValueError as e:
+        raise ValueError(f"bad threshold list {list(specs)!r}: {e}") from None
+
+
+def encode_batch(payloads: Iterable[Any], threshold: float = 0.05) -> PolyhedralBatchEncoding:
+    """Encode many payloads into N×20 / N×12 NumPy matrices (needs numpy).
+
+    See PolyhedralEncoder.encode_batch; uses the shared default encoder.
+    """
+    return get_default_encoder().encode_batch(payloads, threshold=threshold)
+
+
+# -------------------------------------------------------------------
+# Streaming JSONL — one payload per input line (a JSON string or seed
+# object), one encoding per output line, in input order. Every stage is
+# a generator, so memory stays bounded by a single record.
+# -------------------------------------------------------------------
+def iter_jsonl_payloads(lines: Iterable[str]) -> Iterator[Any]:
+    """Parse JSONL lines into str/dict payloads, skipping blank lines."""
+    for lineno, line in enumerate(lines, 1):
+        if not line.strip():
+            continue
+        try:
+            payload = json.loads(line)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"line {lineno}: invalid JSON: {e}") from e
+        if not isinstance(payload, (str, dict)):
+            raise ValueError(f"line {lineno}: expected a JSON string or object, got {type(payload).__name__}")
+        yield payload
+
+
+def encode_stream(
+    payloads: Iterable[Any],
+    threshold: float = 0.05,
+    encoder: PolyhedralEncoder | None = None,
+) -> Iterator[PolyhedralEncoding]:
+    """Lazily encode payloads one at a time, preserving order."""
+    enc = encoder or get_default_encoder()
+    for payload in payloads:
+        yield enc.encode(payload, threshold=threshold)
+
+
+def encode_jsonl(
+    src: TextIO,
+    dst: TextIO,
+    threshold: float | Iterable[float] = 0.05,
+    encoder: PolyhedralEncoder | None = None,
+    workers: int = 1,
+    chunk_size: int = 256,
+) -> int:
+    """Stream JSONL payloads from src to JSONL encodings on dst; return the record count.
+
+    workers > 1 fans chunks out to encode_parallel; workers then also do
+    the JSON serialization, and output order is unchanged. A list of
+    thresholds writes one JSON array per line instead: that payload's
+    encoding at each threshold, from a single scan (encode_thresholds).
+    """
+    payloads = iter_jsonl_payloads(src)
+    if not isinstance(threshold, (int, float)):
+        threshold = tuple(threshold)
+    if workers == 1:
+        enc = encoder or get_default_encoder()
+        lines = (_encode_record(enc, payload, threshold, as_json=True) for payload in payloads)
+    else:
+        lines = _parallel_chunks(payloads, threshold, encoder, workers, chunk_size, as_json=True)
+    n = 0
+    for line in lines:
+        dst.write(line)
+        dst.write("\n")
+        n += 1
+    return n
+
+
+# -------------------------------------------------------------------
+# Parallel encoding — chunks of payloads fan out to a process pool.
+# Workers get the compiled encoder once, at pool start: inherited through
+# fork where available (copy-on-write, nothing pickled), otherwise pickled
+# once per worker through the pool initializer. Tasks carry only the
+# chunk function (by reference), the payloads and a few scalar options.
+# -------------------------------------------------------------------
+_WORKER_ENCODER: PolyhedralEncoder | None = None
+
+
+def _init_worker(encoder: PolyhedralEncoder | None) -> None:
+    global _WORKER_ENCODER
+    if encoder is not None:
+        _WORKER_ENCODER = encoder
+
+
+def _run_chunk(task: tuple[Any, list[Any], tuple]) -> list[Any]:
+    fn, chunk, args = task
+    return fn(_WORKER_ENCODER or get_default_encoder(), chunk, *args)
+
+
+def _encode_chunk_with(enc: PolyhedralEncoder, chunk: list[Any], threshold: Any, as_json: bool) -> list[Any]:
+    return [_encode_record(enc, p, threshold, as_json) for p in chunk]
+
+
+def _encode_record(enc: PolyhedralEncoder, payload: Any, threshold: Any, as_json: bool) -> Any:
+    """One payload at one threshold, or at each of a tuple of thresholds."""
+    if isinstance(threshold, tuple):
+        out = enc.encode_thresholds(payload, threshold)
+        return json.dumps([e.to_json() for e in out], ensure_ascii=False) if as_json else out
+    out = enc.encode(payload, threshold=threshold)
+    return json.dumps(out.to_json(), ensure_ascii=False) if as_json else out
+
+
+def default_workers() -> int:
+    """CPUs this process may run on."""
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def _parallel_chunks(
+    payloads: Iterable[Any],
+    threshold: float | tuple[float, ...],
+    encoder: PolyhedralEncoder | None,
+    workers: int | None,
+    chunk_size: int,
+    as_json: bool,
+) -> Iterator[Any]:
+    return _parallel_map(payloads, _encode_chunk_with, (threshold, as_json), encoder, workers, chunk_size)
+
+
+def _parallel_map(
+    items: Iterable[Any],
+    fn: Any,
+    args: tuple,
+    encoder: PolyhedralEncoder | None,
+    workers: int | None,
+    chunk_size: int,
+) -> Iterator[Any]:
+    """Yield fn(encoder, chunk, *args) results for each chunk of items, in order.
+
+    fn must be a module-level function so tasks pickle by reference.
+    """
+    global _WORKER_ENCODER
+    enc = encoder or get_default_encoder()
+    enc._ensure_fresh()
+    workers = workers or default_workers()
+    chunks = _chunked(items, chunk_size)
+    if workers == 1:
+        for chunk in chunks:
+            yield from fn(enc, chunk, *args)
+        return
+
+    import multiprocessing  # deferred: costs more than a whole encoder reload
+
+    methods = multiprocessing.get_all_start_methods()
+    ctx = multiprocessing.get_context("fork" if "fork" in methods else "spawn")
+    forked = ctx.get_start_method() == "fork"
+    previous = _WORKER_ENCODER
+    if forked:
+        _WORKER_ENCODER = enc  # inherited by the children at fork time
+    try:
+        pool = ctx.Pool(workers, initializer=_init_worker, initargs=(None if forked else enc,))
+    finally:
+        _WORKER_ENCODER = previous
+    with pool:
+        # Keep a bounded window of chunks in flight so a huge input stream
+        # is never read ahead of what the pool can absorb.
+        pending: deque = deque()
+        for chunk in chunks:
+            pending.append(pool.apply_async(_run_chunk, ((fn, chunk, args),)))
+            if len(pending) >= 2 * workers:
+                yield from pending.popleft().get()
+        while pending:
+            yield from pending.popleft().get()
+
+
+def _chunked(items: Iterable[Any], size: int) -> Iterator[list[Any]]:
+    chunk: list[Any] = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def encode_parallel(
+    payloads: Iterable[Any],
+    threshold: float = 0.05,
+    workers: int | None = None,
+    chunk_size: int = 256,
+    encoder: PolyhedralEncoder | None = None,
+) -> Iterator[PolyhedralEncoding]:
+    """Encode payloads across a process pool, yielding results in input order.
+
+    workers defaults to the CPUs available; workers=1 runs in-process.
+    chunk_size payloads travel per task, which amortizes IPC overhead.
+    """
+    return _parallel_chunks(payloads, threshold, encoder, workers, chunk_size, as_json=False)
 
 
 # -------------------------------------------------------------------
@@ -343,6 +2149,7 @@ def generate_mandala_insight(
     name: str,
     family_flag_count: int = 3,
     principle_flag_count: int = 1,
+    encoder: PolyhedralEncoder | None = None,
 ) -> dict:
     """Run MRP steps 1-4 + NIP on a payload and draft an Atlas-entry-shaped dict.
 
@@ -350,17 +2157,24 @@ def generate_mandala_insight(
     new entries/NNNN_*.json can be bootstrapped from free text, then
     hand-refined (title, insight prose, refined_glyph) same as any other
     Atlas entry — mirrors Poly.py's --ai-enhance draft-then-edit workflow.
+    Names, glyphs and order come from the encoder's compiled tables.
     """
-    fam_doc, prin_doc = _load_ontology()
-    fam_order = [f["id"] for f in fam_doc["families"]]
-    prin_order = [p["id"] for p in prin_doc["principles"]]
-    names = {f["id"]: f["name"] for f in fam_doc["families"]}
-    names.update({p["id"]: p["name"] for p in prin_doc["principles"]})
-    glyphs = {f["id"]: f["glyph"] for f in fam_doc["families"]}
-    glyphs.update({p["id"]: p["glyph"] for p in prin_doc["principles"]})
+    enc = encoder or get_default_encoder()
+    enc._ensure_fresh()
+    return _draft_insight(enc, payload, name, family_flag_count, principle_flag_count)
 
-    enc = encode(payload)
-    text, _tags, _input_type = _payload_to_text_and_tags(payload)
+
+def _draft_insight(
+    encoder: PolyhedralEncoder,
+    payload: Any,
+    name: str,
+    family_flag_count: int,
+    principle_flag_count: int,
+) -> dict:
+    text, tags, input_type = _payload_to_text_and_tags(payload)
+    enc = encoder._encode_extracted(text, tags, input_type, 0.05)
+    fam_order, prin_order = encoder.fam_order, encoder.prin_order
+    names, glyphs = encoder.names, encoder.glyphs
 
     fam_flags = _select_flags(enc.family_amplitudes_l1, fam_order, _FRICTION_FAMILIES, family_flag_count)
     prin_flags = _select_flags(enc.principle_amplitudes_l1, prin_order, _FRICTION_PRINCIPLES, principle_flag_count)
@@ -386,11 +2200,241 @@ def generate_mandala_insight(
     }
 
 
+def _insight_chunk(
+    encoder: PolyhedralEncoder,
+    chunk: list[tuple[Any, str]],
+    family_flag_count: int,
+    principle_flag_count: int,
+) -> list[dict]:
+    return [_draft_insight(encoder, p, name, family_flag_count, principle_flag_count) for p, name in chunk]
+
+
+def generate_mandala_insights(
+    payloads: Iterable[Any],
+    names: Iterable[str],
+    family_flag_count: int = 3,
+    principle_flag_count: int = 1,
+    workers: int = 1,
+    chunk_size: int = 256,
+    encoder: PolyhedralEncoder | None = None,
+) -> Iterator[dict]:
+    """Lazily draft one Atlas entry per (payload, name) pair, in input order.
+
+    Same drafts as generate_mandala_insight(). Inputs are consumed as the
+    output is read; workers > 1 spreads chunks over a process pool like
+    encode_parallel (workers=0 uses every CPU). payloads and names must
+    be the same length.
+    """
+    pairs = zip(payloads, names, strict=True)
+    return _parallel_map(
+        pairs, _insight_chunk, (family_flag_count, principle_flag_count),
+        encoder, workers or default_workers(), chunk_size,
+    )
+
+
+# Re-encoding, the archive and the vector index live in their own modules;
+# their public names stay importable from here for existing callers.
+_MOVED = {
+    **dict.fromkeys(
+        ("REENCODE_ACTIONS", "ReencodePlan", "SnapshotStore", "plan_reencode", "reencode"), "bridge_reencode"
+    ),
+    **dict.fromkeys(
+        ("ARCHIVE_MAGIC", "EncodingArchive", "EncodingArchiveWriter", "archive_to_jsonl", "jsonl_to_archive"),
+        "bridge_archive",
+    ),
+    **dict.fromkeys(("VectorIndex", "atlas_items", "get_atlas_index", "nearest"), "bridge_index"),
+}
+
+
+def __getattr__(name: str) -> Any:
+    module = _MOVED.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    import importlib
+
+    return getattr(importlib.import_module(module), name)
+
+
+def _run_jsonl(args: list[str]) -> int:
+    """--jsonl [IN [OUT]] [--workers N] [--chunk-size N] [--threshold T[,T...]] [--timestamp T] [--cache-dir DIR]
+    [--snapshots DIR] [--profile]."""
+    import argparse
+
+    ap = argparse.ArgumentParser(prog="polyhedral_bridge.py --jsonl")
+    ap.add_argument("src", nargs="?", default="-", help="input JSONL path, or - for stdin")
+    ap.add_argument("dst", nargs="?", default="-", help="output JSONL path, or - for stdout")
+    ap.add_argument("--workers", type=int, default=1, help="worker processes (0 = all CPUs)")
+    ap.add_argument("--chunk-size", type=int, default=256, help="payloads per worker task")
+    ap.add_argument(
+        "--threshold", default="0.05",
+        help="equation threshold, or a comma list (e.g. 0.05,0.1,0.2) for one array of encodings per line",
+    )
+    ap.add_argument(
+        "--timestamp", default="now",
+        help="provenance timestamp: 'now' (default), 'none' to omit it, or a fixed value",
+    )
+    ap.add_argument("--cache-dir", help="on-disk encode cache shared across runs and workers")
+    ap.add_argument("--snapshots", help="snapshot store to record the encoder tables in (for --reencode)")
+    ap.add_argument("--profile", action="store_true", help="print a per-stage timing breakdown to stderr")
+    opts = ap.parse_args(args)
+    try:
+        thresholds = parse_thresholds(opts.threshold)
+    except ValueError as e:
+        ap.error(str(e))
+    threshold = thresholds[0] if len(thresholds) == 1 else thresholds
+    encoder = None
+    profiler = StageProfiler() if opts.profile else None
+    if opts.profile and opts.workers != 1:
+        print("note: --profile only times in-process encodes; use --workers 1", file=sys.stderr)
+    if opts.timestamp != "now" or opts.cache_dir or profiler is not None:
+        encoder = PolyhedralEncoder(
+            timestamp=None if opts.timestamp == "none" else opts.timestamp,
+            cache=EncodeCache(directory=opts.cache_dir) if opts.cache_dir else None,
+            profiler=profiler,
+        )
+    if opts.snapshots:
+        from bridge_reencode import SnapshotStore
+
+        SnapshotStore(opts.snapshots).save(encoder or get_default_encoder())
+    src_path, dst_path = opts.src, opts.dst
+    src = sys.stdin if src_path == "-" else open(src_path, "r", encoding="utf-8")
+    dst = sys.stdout if dst_path == "-" else open(dst_path, "w", encoding="utf-8")
+    try:
+        encode_jsonl(
+            src, dst, threshold=threshold, encoder=encoder,
+            workers=opts.workers or default_workers(), chunk_size=opts.chunk_size,
+        )
+    except ValueError as e:
+        print(f"error: {src_path}: {e}", file=sys.stderr)
+        return 1
+    finally:
+        if src is not sys.stdin:
+            src.close()
+        if dst is not sys.stdout:
+            dst.close()
+    if profiler is not None:
+        print(profiler.report(), file=sys.stderr)
+    return 0
+
+
+def _run_reencode(args: list[str]) -> int:
+    """--reencode PAYLOADS ENCODINGS [OUT] --snapshots DIR [--timestamp T] [--dry-run]."""
+    import argparse
+
+    from bridge_reencode import SnapshotStore, plan_reencode, reencode
+
+    ap = argparse.ArgumentParser(prog="polyhedral_bridge.py --reencode")
+    ap.add_argument("payloads", help="input JSONL the encodings were made from")
+    ap.add_argument("encodings", help="encodings JSONL, one to_json() object per payload line")
+    ap.add_argument("dst", nargs="?", default="-", help="output JSONL path, or - for stdout")
+    ap.add_argument("--snapshots", required=True, help="snapshot store written by --jsonl --snapshots")
+    ap.add_argument(
+        "--timestamp", default="now",
+        help="provenance timestamp for re-encoded records: 'now' (default), 'none', or a fixed value",
+    )
+    ap.add_argument("--dry-run", action="store_true", help="print the plan summary and write nothing")
+    opts = ap.parse_args(args)
+    encoder = PolyhedralEncoder(timestamp=None if opts.timestamp == "none" else opts.timestamp)
+    store = SnapshotStore(opts.snapshots)
+    try:
+        with open(opts.payloads, "r", encoding="utf-8") as f:
+            payloads = list(iter_jsonl_payloads(f))
+        with open(opts.encodings, "r", encoding="utf-8") as f:
+            records = [PolyhedralEncoding(**json.loads(line)) for line in f if line.strip()]
+        plan = plan_reencode(payloads, records, store, encoder=encoder)
+    except (OSError, ValueError, TypeError) as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 1
+    print(json.dumps(plan.summary()), file=sys.stderr)
+    if opts.dry_run:
+        return 0
+    store.save(encoder)
+    dst = sys.stdout if opts.dst == "-" else open(opts.dst, "w", encoding="utf-8")
+    try:
+        for enc in reencode(payloads, records, plan, encoder=encoder):
+            dst.write(json.dumps(enc.to_json(), ensure_ascii=False) + "\n")
+    finally:
+        if dst is not sys.stdout:
+            dst.close()
+    return 0
+
+
+def _run_archive(args: list[str], to_archive: bool) -> int:
+    """--to-archive IN.jsonl OUT [--count-dtype T] / --from-archive IN [OUT.jsonl]."""
+    import argparse
+
+    from bridge_archive import _COUNT_CODES, archive_to_jsonl, jsonl_to_archive
+
+    if to_archive:
+        ap = argparse.ArgumentParser(prog="polyhedral_bridge.py --to-archive")
+        ap.add_argument("src", help="encodings JSONL path, or - for stdin")
+        ap.add_argument("dst", help="archive path to write")
+        ap.add_argument("--count-dtype", choices=sorted(_COUNT_CODES), default="uint16")
+    else:
+        ap = argparse.ArgumentParser(prog="polyhedral_bridge.py --from-archive")
+        ap.add_argument("src", help="archive path to read")
+        ap.add_argument("dst", nargs="?", default="-", help="output JSONL path, or - for stdout")
+    opts = ap.parse_args(args)
+    try:
+        if to_archive:
+            src = sys.stdin if opts.src == "-" else open(opts.src, "r", encoding="utf-8")
+            try:
+                jsonl_to_archive(src, opts.dst, count_dtype=opts.count_dtype)
+            finally:
+                if src is not sys.stdin:
+                    src.close()
+        else:
+            dst = sys.stdout if opts.dst == "-" else open(opts.dst, "w", encoding="utf-8")
+            try:
+                archive_to_jsonl(opts.src, dst)
+            finally:
+                if dst is not sys.stdout:
+                    dst.close()
+    except (OSError, ValueError) as e:
+        print(f"error: {opts.src}: {e}", file=sys.stderr)
+        return 1
+    return 0
+
+
 def main(argv: list[str]) -> int:
     if len(argv) < 2:
-        print("usage: polyhedral_bridge.py '<text>'", file=sys.stderr)
+        print("usage: polyhedral_bridge.py [--profile] '<text>'", file=sys.stderr)
         print("       polyhedral_bridge.py --insight '<name>' '<text>'", file=sys.stderr)
+        print("       polyhedral_bridge.py --file PATH   # large text files, bounded memory", file=sys.stderr)
+        print(
+            "       polyhedral_bridge.py --jsonl [IN|-] [OUT|-] [--workers N] [--chunk-size N]"
+            " [--threshold T[,T...]] [--timestamp now|none|VALUE] [--cache-dir DIR] [--snapshots DIR] [--profile]",
+            file=sys.stderr,
+        )
+        print(
+            "       polyhedral_bridge.py --reencode PAYLOADS.jsonl ENCODINGS.jsonl [OUT|-] --snapshots DIR [--dry-run]",
+            file=sys.stderr,
+        )
+        print("       polyhedral_bridge.py --to-archive IN.jsonl OUT [--count-dtype uint16|uint32]", file=sys.stderr)
+        print("       polyhedral_bridge.py --from-archive IN [OUT.jsonl]", file=sys.stderr)
+        print("       polyhedral_bridge.py --build-precompiled [PATH]", file=sys.stderr)
         return 2
+    if argv[1] == "--jsonl":
+        return _run_jsonl(argv[2:])
+    if argv[1] == "--reencode":
+        return _run_reencode(argv[2:])
+    if argv[1] in ("--to-archive", "--from-archive"):
+        return _run_archive(argv[2:], to_archive=argv[1] == "--to-archive")
+    if argv[1] == "--file":
+        if len(argv) < 3:
+            print("usage: polyhedral_bridge.py --file PATH", file=sys.stderr)
+            return 2
+        try:
+            enc = encode_file(argv[2])
+        except (OSError, UnicodeDecodeError) as e:
+            print(f"error: {argv[2]}: {e}", file=sys.stderr)
+            return 1
+        print(json.dumps(enc.to_json(), ensure_ascii=False, indent=2))
+        return 0
+    if argv[1] == "--build-precompiled":
+        path = build_precompiled(argv[2] if len(argv) > 2 else None)
+        print(f"wrote {path}", file=sys.stderr)
+        return 0
     if argv[1] == "--insight":
         if len(argv) < 4:
             print("usage: polyhedral_bridge.py --insight '<name>' '<text>'", file=sys.stderr)
@@ -398,10 +2442,23 @@ def main(argv: list[str]) -> int:
         entry = generate_mandala_insight(argv[3], name=argv[2])
         print(json.dumps(entry, ensure_ascii=False, indent=2))
         return 0
+    if argv[1] == "--profile":
+        if len(argv) < 3:
+            print("usage: polyhedral_bridge.py --profile '<text>'", file=sys.stderr)
+            return 2
+        with profiled() as prof:
+            enc = encode(argv[2])
+        print(json.dumps(enc.to_json(), ensure_ascii=False, indent=2))
+        print(prof.report(), file=sys.stderr)
+        return 0
     enc = encode(argv[1])
     print(json.dumps(enc.to_json(), ensure_ascii=False, indent=2))
     return 0
 
 
 if __name__ == "__main__":
-    sys.exit(main(sys.argv))
+    # Run main() from the importable module, so bridge_archive/bridge_reencode
+    # and this script share one set of classes and one default encoder.
+    import polyhedral_bridge
+
+    sys.exit(polyhedral_bridge.main(sys.argv))
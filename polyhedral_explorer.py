@@ -6,11 +6,11 @@
 # protocol application (MRP, NIP), and automated experiment suggestion.
 
 import json
-import copy
-import uuid
 import random
 from typing import Any, Dict, List, Optional
 
+from explorer_state import BranchStateBase, NodeTable, PersistentList, TreeNode, advance, load_tree, save_tree
+
 # ----------------------------------------------------------------------
 # Knowledge graph from JSON
 # ----------------------------------------------------------------------
@@ -35,48 +35,28 @@ class PolyhedralMandala:
 # ----------------------------------------------------------------------
 # Tree data structures (minimal, same as before)
 # ----------------------------------------------------------------------
-class BranchState:
+class BranchState(BranchStateBase):
+    # clone() shares fields with the parent: assign new values, don't mutate inherited ones
     def __init__(self, focus_type: str = "", focus_id: str = ""):
         self.focus_type = focus_type    # "family", "principle", "equation", "none"
         self.focus_id = focus_id
         self.data: Any = None           # e.g. currently selected equation dict
-        self.history: List[str] = []
-        self.annotations: List[str] = []
+        self.history = PersistentList()
+        self.annotations = PersistentList()
         self.params: Dict[str, Any] = {}
 
-    def clone(self):
-        s = BranchState(self.focus_type, self.focus_id)
-        s.data = copy.deepcopy(self.data)
-        s.history = self.history.copy()
-        s.annotations = self.annotations.copy()
-        s.params = copy.deepcopy(self.params)
-        return s
-
-class TreeNode:
-    def __init__(self, state: BranchState, choice: str = "root", parent=None, entropy_cost=0.0):
-        self.id = str(uuid.uuid4())[:8]
-        self.state = state
-        self.choice = choice
-        self.parent = parent
-        self.children: List["TreeNode"] = []
-        self.entropy_cost = entropy_cost
-
-    def add_child(self, child):
-        child.parent = self
-        self.children.append(child)
-
-    def total_entropy_cost(self):
-        return self.entropy_cost + (self.parent.total_entropy_cost() if self.parent else 0)
-
 # ----------------------------------------------------------------------
 # Explorer for the Polyhedral Mandala
 # ----------------------------------------------------------------------
 class MandalaExplorer:
     def __init__(self, json_path: str):
+        self.atlas_path = json_path
         self.mandala = PolyhedralMandala(json_path)
-        self.root = TreeNode(BranchState(), "root")
+        self.tree = NodeTable(BranchState())
+        self.root = self.tree.node(0)
         self.current = self.root
         self.entropy_budget = 5.0
+        self.budget_mode = "flag"  # "refuse" raises EntropyBudgetExceeded; None disables the check
 
     def choices(self) -> List[str]:
         """Return possible next actions from the current state."""
@@ -246,8 +226,7 @@ class MandalaExplorer:
         elif action == "annotate":
             child.annotations.append(arg if arg else "manual note")
 
-        self.current.add_child(child)
-        self.current = child
+        advance(self, child)
 
     def _get_entity(self, typ, id_):
         if typ == "family":
@@ -256,6 +235,14 @@ class MandalaExplorer:
             return self.mandala.principles[id_]
         return None
 
+    def node(self, node_id: int) -> TreeNode:
+        return self.tree.node(node_id)
+
+    def frontier(self, budget: Optional[float] = None) -> List[TreeNode]:
+        """Leaf nodes whose branch entropy is within budget (default: entropy_budget)."""
+        budget = self.entropy_budget if budget is None else budget
+        return [self.tree.node(row) for row in self.tree.frontier(budget)]
+
     def backtrack(self, steps=1):
         for _ in range(steps):
             if self.current.parent:
@@ -277,17 +264,13 @@ class MandalaExplorer:
         return suggestions
 
     def save_branch(self, filepath):
-        # simplified serialisation
-        def node_to_dict(node):
-            return {
-                "id": node.id,
-                "choice": node.choice,
-                "annotations": node.state.annotations,
-                "entropy_cost": node.entropy_cost,
-                "children": [node_to_dict(c) for c in node.children]
-            }
-        with open(filepath, 'w') as f:
-            json.dump(node_to_dict(self.root), f, indent=2)
+        """Stream the tree to filepath as JSON lines, one record per node (see explorer_state.save_tree)."""
+        save_tree(self, filepath)
+
+    @classmethod
+    def load_branch(cls, filepath, atlas_json_path=None):
+        """Resume a save_branch() file; node states are read from it when first used."""
+        return load_tree(cls, filepath, atlas_json_path)
 
 # ----------------------------------------------------------------------
 # Demo
@@ -307,5 +290,5 @@ if __name__ == "__main__":
     print(exp.current.state.annotations)
     exp.select("apply_protocol:NIP")
     print(exp.current.state.annotations)
-    exp.save_branch("polyhedral_tree.json")
+    exp.save_branch("polyhedral_tree.jsonl")
     print("Tree saved.")
@@ -6,9 +6,11 @@
 # Noise‑to‑Insight mappings drive the corrective evolution step.
 # Works with or without polyhedral_bridge.py (falls back to tag‑overlap).
 
-import json, copy, os, uuid, random, math, sys
+import json, os, uuid, random, math, sys
 from typing import Any, Dict, List, Optional
 
+from explorer_state import BranchStateBase, NodeTable, PersistentList, TreeNode, advance, load_tree, save_tree
+
 # ----------------------------------------------------------------------
 # 1. Load the atlas
 # ----------------------------------------------------------------------
@@ -67,54 +69,30 @@ def resonance_vector(seed: str, mandala: PolyhedralMandala) -> Dict[str, Dict[st
 # ----------------------------------------------------------------------
 # 3. Tree data structures (same as before)
 # ----------------------------------------------------------------------
-class BranchState:
+class BranchState(BranchStateBase):
+    # clone() shares fields with the parent: assign new values, don't mutate inherited ones
     def __init__(self):
         self.seed = ""              # original seed concept
         self.family_resonance = {}  # {Fxx: score}
         self.principle_resonance = {}
         self.current_glyph = ""     # evolving glyph string
-        self.annotations: List[str] = []
-        self.history: List[str] = []
+        self.annotations = PersistentList()
+        self.history = PersistentList()
         self.params: Dict[str, Any] = {}
         self.atlas_entry: Dict[str, Any] = {}  # final entry to save
 
-    def clone(self):
-        s = BranchState()
-        s.seed = self.seed
-        s.family_resonance = copy.deepcopy(self.family_resonance)
-        s.principle_resonance = copy.deepcopy(self.principle_resonance)
-        s.current_glyph = self.current_glyph
-        s.annotations = self.annotations.copy()
-        s.history = self.history.copy()
-        s.params = copy.deepcopy(self.params)
-        s.atlas_entry = copy.deepcopy(self.atlas_entry)
-        return s
-
-class TreeNode:
-    def __init__(self, state: BranchState, choice="root", parent=None, entropy_cost=0.0):
-        self.id = str(uuid.uuid4())[:8]
-        self.state = state
-        self.choice = choice
-        self.parent = parent
-        self.children: List[TreeNode] = []
-        self.entropy_cost = entropy_cost
-
-    def add_child(self, child):
-        child.parent = self
-        self.children.append(child)
-
-    def total_entropy_cost(self):
-        return self.entropy_cost + (self.parent.total_entropy_cost() if self.parent else 0)
-
 # ----------------------------------------------------------------------
 # 4. MRP Explorer
 # ----------------------------------------------------------------------
 class MRPExplorer:
     def __init__(self, atlas_json_path: str):
+        self.atlas_path = atlas_json_path
         self.mandala = PolyhedralMandala(atlas_json_path)
-        self.root = TreeNode(BranchState(), "root")
+        self.tree = NodeTable(BranchState())
+        self.root = self.tree.node(0)
         self.current = self.root
         self.entropy_budget = 5.0
+        self.budget_mode = "flag"  # "refuse" raises EntropyBudgetExceeded; None disables the check
 
     def choices(self) -> List[str]:
         state = self.current.state
@@ -230,9 +208,9 @@ class MRPExplorer:
             entry = {
                 "seed": new_state.seed,
                 "glyph": new_state.current_glyph,
-                "family_resonance": new_state.family_resonance,
-                "principle_resonance": new_state.principle_resonance,
-                "annotations": new_state.annotations,
+                "family_resonance": dict(new_state.family_resonance),
+                "principle_resonance": dict(new_state.principle_resonance),
+                "annotations": list(new_state.annotations),
                 "protocol_version": "1.0.0",
             }
             new_state.atlas_entry = entry
@@ -268,8 +246,15 @@ class MRPExplorer:
         elif action == "annotate":
             child.annotations.append(arg if arg else "manual note")
 
-        self.current.add_child(child)
-        self.current = child
+        advance(self, child)
+
+    def node(self, node_id: int) -> TreeNode:
+        return self.tree.node(node_id)
+
+    def frontier(self, budget: Optional[float] = None) -> List[TreeNode]:
+        """Leaf nodes whose branch entropy is within budget (default: entropy_budget)."""
+        budget = self.entropy_budget if budget is None else budget
+        return [self.tree.node(row) for row in self.tree.frontier(budget)]
 
     def backtrack(self, steps=1):
         for _ in range(steps):
@@ -284,16 +269,13 @@ class MRPExplorer:
         ]
 
     def save_branch(self, filepath):
-        def node_to_dict(node):
-            return {
-                "id": node.id,
-                "choice": node.choice,
-                "annotations": node.state.annotations,
-                "entropy_cost": node.entropy_cost,
-                "children": [node_to_dict(c) for c in node.children]
-            }
-        with open(filepath, 'w') as f:
-            json.dump(node_to_dict(self.root), f, indent=2)
+        """Stream the tree to filepath as JSON lines, one record per node (see explorer_state.save_tree)."""
+        save_tree(self, filepath)
+
+    @classmethod
+    def load_branch(cls, filepath, atlas_json_path=None):
+        """Resume a save_branch() file; node states are read from it when first used."""
+        return load_tree(cls, filepath, atlas_json_path)
 
 # ----------------------------------------------------------------------
 # Demo: run the full MRP pipeline on a seed concept
@@ -317,5 +299,5 @@ if __name__ == "__main__":
     # Show full annotations
     for ann in explorer.current.state.annotations:
         print("  ", ann)
-    explorer.save_branch("mrp_tree.json")
+    explorer.save_branch("mrp_tree.jsonl")
     print("MRP pipeline tree saved.")
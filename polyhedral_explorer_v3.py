@@ -5,9 +5,11 @@
 # Full 7‑step Mandala Redesign Protocol embedded as an explorable tree,
 # plus glyph tokenization, similarity, merging, and conflict analysis.
 
-import json, copy, os, uuid, random, math, sys
+import json, os, uuid, random, math, sys
 from typing import Any, Dict, List, Optional, Tuple, Set
 
+from explorer_state import BranchStateBase, NodeTable, PersistentList, TreeNode, advance, load_tree, save_tree
+
 # ----------------------------------------------------------------------
 # 1. Load the atlas (add symbol->entity mapping)
 # ----------------------------------------------------------------------
@@ -64,6 +66,10 @@ class GlyphAlgebra:
         self.mandala = mandala
         # Build a sorted list of known symbol strings by length descending for greedy matching
         self.symbols_by_len = sorted(mandala.symbol_to_entity.keys(), key=len, reverse=True)
+        # Same order, bucketed by first character so each position only tries symbols that can match
+        self.symbols_by_first: Dict[str, List[str]] = {}
+        for sym in self.symbols_by_len:
+            self.symbols_by_first.setdefault(sym[:1], []).append(sym)
 
     def tokenize(self, glyph: str) -> List[Tuple[str, Optional[Tuple[str, str]]]]:
         """
@@ -80,8 +86,8 @@ class GlyphAlgebra:
                 continue
             # Try longest known symbol
             matched = False
-            for sym in self.symbols_by_len:
-                if glyph[i:].startswith(sym):
+            for sym in self.symbols_by_first.get(glyph[i], ()):
+                if glyph.startswith(sym, i):
                     entity_info = self.mandala.symbol_to_entity.get(sym)
                     tokens.append((sym, entity_info))
                     i += len(sym)
@@ -150,57 +156,32 @@ class GlyphAlgebra:
 # ----------------------------------------------------------------------
 # 3. Tree state – extended with glyph library
 # ----------------------------------------------------------------------
-class BranchState:
+class BranchState(BranchStateBase):
+    # clone() shares fields with the parent: assign new values, don't mutate inherited ones
     def __init__(self):
         self.seed = ""
         self.family_resonance = {}
         self.principle_resonance = {}
         self.current_glyph = ""
-        self.glyph_library: List[Tuple[str, str]] = []  # (name, glyph_string)
-        self.annotations: List[str] = []
-        self.history: List[str] = []
+        self.glyph_library = PersistentList()  # (name, glyph_string)
+        self.annotations = PersistentList()
+        self.history = PersistentList()
         self.params: Dict[str, Any] = {}
         self.atlas_entry: Dict[str, Any] = {}
 
-    def clone(self):
-        s = BranchState()
-        s.seed = self.seed
-        s.family_resonance = copy.deepcopy(self.family_resonance)
-        s.principle_resonance = copy.deepcopy(self.principle_resonance)
-        s.current_glyph = self.current_glyph
-        s.glyph_library = self.glyph_library.copy()
-        s.annotations = self.annotations.copy()
-        s.history = self.history.copy()
-        s.params = copy.deepcopy(self.params)
-        s.atlas_entry = copy.deepcopy(self.atlas_entry)
-        return s
-
-class TreeNode:
-    def __init__(self, state, choice="root", parent=None, entropy_cost=0.0):
-        self.id = str(uuid.uuid4())[:8]
-        self.state = state
-        self.choice = choice
-        self.parent = parent
-        self.children: List[TreeNode] = []
-        self.entropy_cost = entropy_cost
-
-    def add_child(self, child):
-        child.parent = self
-        self.children.append(child)
-
-    def total_entropy_cost(self):
-        return self.entropy_cost + (self.parent.total_entropy_cost() if self.parent else 0)
-
 # ----------------------------------------------------------------------
 # 4. MRP Explorer with glyph algebra
 # ----------------------------------------------------------------------
 class MRPExplorer:
     def __init__(self, atlas_json_path: str):
+        self.atlas_path = atlas_json_path
         self.mandala = PolyhedralMandala(atlas_json_path)
         self.algebra = GlyphAlgebra(self.mandala)
-        self.root = TreeNode(BranchState(), "root")
+        self.tree = NodeTable(BranchState())
+        self.root = self.tree.node(0)
         self.current = self.root
         self.entropy_budget = 5.0
+        self.budget_mode = "flag"  # "refuse" raises EntropyBudgetExceeded; None disables the check
 
     def choices(self) -> List[str]:
         state = self.current.state
@@ -297,9 +278,9 @@ class MRPExplorer:
             entry = {
                 "seed": new_state.seed,
                 "glyph": new_state.current_glyph,
-                "family_resonance": new_state.family_resonance,
-                "principle_resonance": new_state.principle_resonance,
-                "annotations": new_state.annotations,
+                "family_resonance": dict(new_state.family_resonance),
+                "principle_resonance": dict(new_state.principle_resonance),
+                "annotations": list(new_state.annotations),
             }
             new_state.atlas_entry = entry
             fld = os.environ.get("FIELDLINK_PATH", "./fieldlink_staging")
@@ -413,8 +394,15 @@ class MRPExplorer:
         elif action == "annotate":
             child.annotations.append(arg or "note")
 
-        self.current.add_child(child)
-        self.current = child
+        advance(self, child)
+
+    def node(self, node_id: int) -> TreeNode:
+        return self.tree.node(node_id)
+
+    def frontier(self, budget: Optional[float] = None) -> List[TreeNode]:
+        """Leaf nodes whose branch entropy is within budget (default: entropy_budget)."""
+        budget = self.entropy_budget if budget is None else budget
+        return [self.tree.node(row) for row in self.tree.frontier(budget)]
 
     def backtrack(self, steps=1):
         for _ in range(steps):
@@ -430,16 +418,13 @@ class MRPExplorer:
         ]
 
     def save_branch(self, filepath):
-        def node_to_dict(node):
-            return {
-                "id": node.id,
-                "choice": node.choice,
-                "annotations": node.state.annotations,
-                "entropy_cost": node.entropy_cost,
-                "children": [node_to_dict(c) for c in node.children]
-            }
-        with open(filepath, 'w') as f:
-            json.dump(node_to_dict(self.root), f, indent=2)
+        """Stream the tree to filepath as JSON lines, one record per node (see explorer_state.save_tree)."""
+        save_tree(self, filepath)
+
+    @classmethod
+    def load_branch(cls, filepath, atlas_json_path=None):
+        """Resume a save_branch() file; node states are read from it when first used."""
+        return load_tree(cls, filepath, atlas_json_path)
 
 # ----------------------------------------------------------------------
 # Resonance helper (tag overlap fallback)
@@ -502,5 +487,5 @@ if __name__ == "__main__":
     exp.select("detect_glyph_conflicts")
     for ann in exp.current.state.annotations:
         print(" ", ann)
-    exp.save_branch("glyph_algebra_tree.json")
+    exp.save_branch("glyph_algebra_tree.jsonl")
     print("Tree saved.")
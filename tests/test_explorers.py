@@ -0,0 +1,384 @@
+# SPDX-License-Identifier: CC0-1.0
+"""Smoke tests for the MRP explorers and their shared branch state.
+
+Run with:
+    python -m pytest tests/test_explorers.py
+or:
+    python tests/test_explorers.py
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import sys
+import tempfile
+from contextlib import contextmanager
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+import explorer_state  # noqa: E402
+import mrp_search  # noqa: E402
+import polyhedral_bridge_v2  # noqa: E402
+import polyhedral_explorer  # noqa: E402
+import polyhedral_explorer_v2  # noqa: E402
+import polyhedral_explorer_v3  # noqa: E402
+from explorer_state import EntropyBudgetExceeded, NodeTable, PersistentList, TreeNode  # noqa: E402
+
+ATLAS = str(ROOT / "protocols.json")
+
+
+@contextmanager
+def staging_dir():
+    """A temporary FIELDLINK_PATH, so record_atlas_entry stages outside the repo."""
+    old = os.environ.get("FIELDLINK_PATH")
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["FIELDLINK_PATH"] = tmp
+        try:
+            yield tmp
+        finally:
+            if old is None:
+                os.environ.pop("FIELDLINK_PATH", None)
+            else:
+                os.environ["FIELDLINK_PATH"] = old
+
+
+def test_persistent_list_copies_share_prefix_and_diverge():
+    """Copies see the items present at copy time and nothing appended to the other side afterwards."""
+    base = PersistentList(["a", "b"])
+    left = base.copy()
+    right = base.copy()
+    base.append("base")
+    left.append("l1")
+    left.extend(["l2", "l3"])
+    right.append("r1")
+    leftleft = left.copy()
+    leftleft.append("ll")
+    assert list(base) == ["a", "b", "base"]
+    assert list(left) == ["a", "b", "l1", "l2", "l3"]
+    assert list(right) == ["a", "b", "r1"]
+    assert list(leftleft) == ["a", "b", "l1", "l2", "l3", "ll"]
+    assert [leftleft[i] for i in range(len(leftleft))] == list(leftleft)
+    assert leftleft[-1] == "ll" and leftleft[-6] == "a" and leftleft[1:3] == ["b", "l1"]
+    assert left == ["a", "b", "l1", "l2", "l3"] and left != right
+    assert "l2" in leftleft and "r1" not in leftleft
+    try:
+        leftleft[6]
+        raise AssertionError("out-of-range index should raise")
+    except IndexError:
+        pass
+
+
+def test_explorer_branches_share_state_without_leaking_between_siblings():
+    """select() children start from the parent's state; siblings and parents never see each other's edits."""
+    with staging_dir() as tmp:
+        exp = polyhedral_explorer_v3.MRPExplorer(ATLAS)
+        for choice in ("set_seed_concept:hexagonal mesh under tidal load", "run_family_sweep",
+                       "run_principle_sweep", "generate_seed_glyph", "save_glyph_to_library:a:◇⚙"):
+            exp.select(choice)
+        fork = exp.current
+        exp.select("save_glyph_to_library:b:⬡")
+        exp.select("record_atlas_entry")
+        left = exp.current.state
+        exp.current = fork
+        exp.select("annotate:other branch")
+        right = exp.current.state
+
+        assert [name for name, _ in left.glyph_library] == ["a", "b"]
+        assert [name for name, _ in right.glyph_library] == ["a"]
+        assert list(fork.state.glyph_library) == [("a", "◇⚙")]
+        assert right.annotations[-1] == "other branch" and "other branch" not in left.annotations
+        assert list(left.history)[-2:] == ["save_glyph_to_library:b:⬡", "record_atlas_entry"]
+        assert right.family_resonance is fork.state.family_resonance  # shared, not copied
+        staged = json.loads(next(Path(tmp).iterdir()).read_text())
+        assert staged["annotations"] == list(left.annotations)[: len(staged["annotations"])]
+
+        out = Path(tmp) / "tree.jsonl"
+        exp.save_branch(str(out))
+        header, root = (json.loads(line) for line in out.read_text().splitlines()[:2])
+        assert header["nodes"] == len(exp.tree) and root["choice"] == "root" and root["parent"] == -1
+
+
+def test_clone_makes_inherited_dicts_read_only():
+    """Mutating a dict a child inherited raises, so it can never leak into the parent or a sibling."""
+    with staging_dir():
+        exp = polyhedral_explorer_v3.MRPExplorer(ATLAS)
+        exp.select("set_seed_concept:tidal mesh")
+        exp.select("run_family_sweep")
+        parent = exp.current
+        exp.select("run_principle_sweep")
+        child = exp.current.state
+        before = dict(parent.state.family_resonance)
+        key = next(iter(before))
+        try:
+            child.family_resonance[key] = 99.0
+            raise AssertionError("inherited dict should be read-only")
+        except TypeError:
+            pass
+        assert dict(parent.state.family_resonance) == before and child.family_resonance == before
+        child.family_resonance = {**child.family_resonance, key: 99.0}  # assigning a new dict is the way
+        assert parent.state.family_resonance[key] == before[key]
+        exp.select("generate_seed_glyph")
+        exp.select("record_atlas_entry")  # stages JSON built from the shared fields
+        assert exp.current.state.atlas_entry["family_resonance"][key] == 99.0
+
+    state = polyhedral_explorer.BranchState()
+    state.params = {"k": 1, "nested": {"xs": [1, {"y": 2}]}}
+    state.tags = {"a"}
+    left, right = state.clone(), state.clone()
+    assert isinstance(left.tags, frozenset) and isinstance(left.params, dict) and left.params["k"] == 1
+    for mutate in (lambda: left.params["nested"].update(z=3), lambda: left.params["nested"]["xs"].append(3),
+                   lambda: left.params["nested"]["xs"][1].pop("y")):
+        try:
+            mutate()
+            raise AssertionError("nested values of an inherited dict should be read-only")
+        except TypeError:
+            pass
+    left.params = dict(left.params, k=2)
+    assert state.params["k"] == 1 and right.params["k"] == 1
+    assert json.loads(json.dumps(right.params)) == {"k": 1, "nested": {"xs": [1, {"y": 2}]}}
+
+
+def test_bridge_explorer_stages_atlas_entry_with_its_encoding():
+    """The bridge explorer's seed-glyph encoding, inherited through clone(), still serializes into the atlas entry."""
+    with staging_dir() as tmp:
+        exp = polyhedral_bridge_v2.MRPExplorer(ATLAS)
+        assert polyhedral_bridge_v2.BRIDGE_AVAILABLE
+        for choice in ("set_seed_concept:tidal mesh", "run_family_sweep", "run_principle_sweep",
+                       "generate_seed_glyph", "record_atlas_entry"):
+            exp.select(choice)
+        state = exp.current.state
+        assert isinstance(state.encoding, dict) and state.atlas_entry["bridge_encoding"] == state.encoding
+        staged = json.loads(next(Path(tmp).iterdir()).read_text())
+        assert staged["bridge_encoding"] == json.loads(json.dumps(state.encoding))
+        assert staged["glyph"] == state.current_glyph
+
+
+def test_node_table_links_walks_and_looks_up_rows():
+    """Rows keep insertion-ordered children, a pre-order walk and O(1) id lookup through TreeNode handles."""
+    table = NodeTable("s0")
+    a = table.add(0, "sa", "a", 0.5)
+    b = table.add(0, "sb", "b", 0.25)
+    a1 = table.add(a, "sa1", "x", 1.0)
+    table.add(b, "sb1", "x", 0.0)
+    a2 = table.add(a, "sa2", "y", 2.0)
+    assert len(table) == 6 and table.choices == ["root", "a", "b", "x", "y"]
+    assert list(table.children(a)) == [a1, a2]
+    assert list(table.walk()) == [0, a, a1, a2, b, 4] and list(table.walk(a)) == [a, a1, a2]
+    assert table.path(a2) == [0, a, a2]
+
+    node = table.node(a2)
+    assert node == table.node(a2) and node.id == a2 and node.state == "sa2" and node.choice == "y"
+    assert node.parent == table.node(a) and table.node(0).parent is None
+    assert [c.id for c in table.node(a).children] == [a1, a2]
+    assert node.total_entropy_cost() == 2.5
+    node.entropy_cost = 3.0
+    assert table.entropy_cost[a2] == 3.0
+
+    child = TreeNode("new", "z", parent=node, entropy_cost=0.1)
+    assert child.id is None and child.parent == node and len(table) == 6  # detached until add_child
+    node.add_child(child)
+    assert child.id == 6 and table.node(6).choice == "z" and child in node.children
+    try:
+        table.node(7)
+        raise AssertionError("unknown id should raise")
+    except KeyError:
+        pass
+
+    deep = NodeTable(None)
+    row = 0
+    for _ in range(5000):  # deeper than the recursion limit
+        row = deep.add(row, None, "step", 0.001)
+    assert sum(1 for _ in deep.walk()) == 5001 and len(deep.path(row)) == 5001
+
+
+def test_cumulative_entropy_budget_modes_and_frontier():
+    """Branch totals are stored per row, select() flags or refuses over-budget moves, frontier() filters leaves."""
+    with staging_dir():
+        exp = polyhedral_explorer_v3.MRPExplorer(ATLAS)
+        exp.entropy_budget = 0.5
+        exp.select("set_seed_concept:tidal mesh")
+        exp.select("entropy_event:0.3")
+        fork = exp.current
+        assert abs(fork.total_entropy_cost() - 0.35) < 1e-12
+        exp.select("entropy_event:0.2")  # 0.55 > 0.5: filed and flagged
+        assert exp.current.annotations[-1] == "Over entropy budget: 0.55 > 0.50"
+        exp.current = fork
+        exp.budget_mode = "refuse"
+        rows = len(exp.tree)
+        try:
+            exp.select("entropy_event:0.4")
+            raise AssertionError("over-budget move should be refused")
+        except EntropyBudgetExceeded:
+            pass
+        assert len(exp.tree) == rows and exp.current == fork
+        exp.select("annotate:cheap")  # 0.40 fits
+        assert [n.choice for n in exp.frontier()] == ["annotate:cheap"]
+        assert [n.choice for n in exp.frontier(1.0)] == ["entropy_event:0.2", "annotate:cheap"]
+
+    table = NodeTable(None)
+    rows = [0]
+    for i in range(5000):  # deep enough that the old recursive total hit the recursion limit
+        rows.append(table.add(rows[i // 2], None, "step", 0.001 * (i % 7)))
+    want = {r: sum(table.entropy_cost[p] for p in table.path(r)) for r in range(0, 5001, 97)}
+    assert all(abs(table.node(r).total_entropy_cost() - total) < 1e-9 for r, total in want.items())
+    table.node(1).entropy_cost = 2.0  # refreshes the whole subtree
+    assert all(abs(table.cumulative[r] - sum(table.entropy_cost[p] for p in table.path(r))) < 1e-9 for r in want)
+    brute = [r for r in range(len(table)) if not list(table.children(r)) and table.cumulative[r] <= 2.5]
+    assert table.frontier(2.5) == brute
+    numpy = explorer_state._numpy
+    explorer_state._numpy = lambda: None
+    try:
+        assert table.frontier(2.5) == brute
+    finally:
+        explorer_state._numpy = numpy
+
+
+def test_beam_search_and_mcts_find_replayable_in_budget_paths():
+    """Both drivers return a filed best node whose path replays to the same glyph, within the budget."""
+    exp = polyhedral_explorer_v3.MRPExplorer(ATLAS)
+    exp.entropy_budget = 0.5
+    exp.select("set_seed_concept:hexagonal mesh under tidal load")
+    start = exp.current
+    objective = mrp_search.weighted((1.0, mrp_search.spin_balance), (0.001, mrp_search.conflict_count))
+    beam = mrp_search.beam_search(exp, objective, width=8, depth=5)
+    assert exp.current == start and exp.budget_mode == "flag"
+    assert not hasattr(exp, "_search_cache")  # the glyph cache lives only for the search
+    assert beam.evaluated > 100 and beam.expanded >= beam.evaluated
+    assert beam.score > objective(exp, start.state) and beam.ranked[0] == (beam.score, beam.node)
+    assert [s for s, _ in beam.ranked] == sorted((s for s, _ in beam.ranked), reverse=True)
+    assert all(row == 0 or exp.tree.cumulative[row] <= 0.5 + 1e-9 for row in exp.tree.walk())
+
+    replay = polyhedral_explorer_v3.MRPExplorer(ATLAS)
+    for choice in ["set_seed_concept:hexagonal mesh under tidal load"] + beam.path:
+        replay.select(choice)
+    assert replay.current.state.current_glyph == beam.glyph
+    assert mrp_search.spin_balance(replay, replay.current.state) > 0.1
+
+    results = []
+    for workers in (1, 2):
+        exp = polyhedral_explorer_v3.MRPExplorer(ATLAS)
+        exp.select("set_seed_concept:turbulent plasma")
+        res = mrp_search.mcts(exp, iterations=48, batch=8, rollout_depth=3, workers=workers, seed=3)
+        assert res.evaluated == 48 and res.node.total_entropy_cost() <= exp.entropy_budget
+        results.append((res.path, round(res.score, 12), [round(s, 12) for s, _ in res.ranked]))
+    assert results[0] == results[1]  # rollouts are seeded, so worker processes change nothing
+
+
+def test_save_branch_streams_records_and_load_branch_reads_states_on_demand():
+    """Saved trees reload with equal states, read lazily along the accessed path, and resume where they stopped."""
+    def fields(state):
+        return {k: list(v) if isinstance(v, PersistentList) else v for k, v in state.__dict__.items()}
+
+    with staging_dir() as tmp:
+        exp = polyhedral_explorer_v3.MRPExplorer(ATLAS)
+        for choice in ("set_seed_concept:tidal mesh", "run_family_sweep", "run_principle_sweep",
+                       "generate_seed_glyph", "save_glyph_to_library:a:◇⚙"):
+            exp.select(choice)
+        fork = exp.current
+        exp.select("corrective_evolution")
+        exp.select("record_atlas_entry")
+        exp.current = fork
+        exp.select("annotate:side branch")
+        fork.state.annotations.append("noted after forking")  # children must not see it
+        for _ in range(1500):  # deeper than the recursion limit
+            exp.select("annotate:deep")
+        path = Path(tmp) / "session.jsonl"
+        exp.save_branch(str(path))
+        assert sum(1 for _ in path.open()) == len(exp.tree) + 1
+
+        loaded = polyhedral_explorer_v3.MRPExplorer.load_branch(str(path))
+        states = loaded.tree.states
+        assert len(loaded.tree) == len(exp.tree) and loaded.current.id == exp.current.id
+        assert all(states.unloaded(row) for row in range(len(loaded.tree)))
+        assert fields(loaded.node(7).state) == fields(exp.node(7).state)  # loads rows 0..7 only
+        assert [row for row in range(len(loaded.tree)) if not states.unloaded(row)] == list(range(8))
+        assert list(loaded.node(7).state.glyph_library) == [("a", "◇⚙")]
+        sample = [*range(12), *range(12, len(exp.tree), 97), len(exp.tree) - 1]
+        assert all(fields(states[row]) == fields(exp.tree.states[row]) for row in sample)
+        assert loaded.current.total_entropy_cost() == exp.current.total_entropy_cost()
+
+        resumed = polyhedral_explorer_v3.MRPExplorer.load_branch(str(path))
+        resumed.current = resumed.node(fork.id)
+        resumed.select("mandala_spin_test")
+        resumed.save_branch(str(path))  # over its own source, copying the rows it never read
+        again = polyhedral_explorer_v3.MRPExplorer.load_branch(str(path))
+        assert len(again.tree) == len(exp.tree) + 1 and again.current.choice == "mandala_spin_test"
+        assert fields(again.current.state)["history"] == fields(fork.state)["history"] + ["mandala_spin_test"]
+        assert all(fields(again.tree.states[row]) == fields(resumed.tree.states[row]) for row in sample + [len(exp.tree)])
+
+        try:
+            polyhedral_explorer.MandalaExplorer.load_branch(ATLAS)
+            raise AssertionError("a non-branch file should be rejected")
+        except ValueError:
+            pass
+
+        # Types JSON would merge round-trip as saved, not as guessed.
+        v1 = polyhedral_explorer.MandalaExplorer(ATLAS)
+        v1.select("select_family:F01")
+        params = {"pairs": [["a", 1], ("b", 2)], "seen": {"x", "y"}, "odd": {"__tuple__": [1]}, "nested": {"t": (1, (2,))}}
+        v1.current.state.params = params
+        v1.current.state.history.extend([("pair", ["list", "inside"]), ["plain", "list"]])
+        small = Path(tmp) / "types.jsonl"
+        v1.save_branch(str(small))
+        back = polyhedral_explorer.MandalaExplorer.load_branch(str(small)).current.state
+        assert back.params == params and back.params["pairs"][1] == ("b", 2) and back.params["pairs"][0] == ["a", 1]
+        assert list(back.history)[-2:] == [("pair", ["list", "inside"]), ["plain", "list"]]
+
+        # Loading parses record prefixes only: a broken state payload fails when that node is read, not before.
+        lines = path.read_bytes().splitlines(keepends=True)
+        lines[-1] = lines[-1].replace(b'"state": {', b'"state": {broken', 1)
+        path.write_bytes(b"".join(lines))
+        lazy = polyhedral_explorer_v3.MRPExplorer.load_branch(str(path))
+        assert len(lazy.tree) == len(again.tree) and lazy.node(7).state.current_glyph == exp.node(7).state.current_glyph
+        try:
+            lazy.node(len(lazy.tree) - 1).state
+            raise AssertionError("the broken payload should only fail when read")
+        except ValueError:
+            pass
+
+
+def test_every_explorer_runs_its_pipeline():
+    """v1, v2 and v3 explorers run a few steps and record node annotations."""
+    with staging_dir():
+        v1 = polyhedral_explorer.MandalaExplorer(ATLAS)
+        v1.select("select_family:F01")
+        v1.annotate("note")
+        assert list(v1.current.annotations) == ["Focused on family: Resonance", "note"]
+        v1.select("back_to_root")  # returns before filing its child
+        assert v1.current == v1.root and len(v1.tree) == 2 and v1.node(1).choice == "select_family:F01"
+        for module in (polyhedral_explorer_v2, polyhedral_explorer_v3):
+            exp = module.MRPExplorer(ATLAS)
+            exp.select("set_seed_concept:turbulent plasma containment")
+            exp.select("run_family_sweep")
+            assert exp.current.annotations and len(exp.current.state.history) == 2
+            assert not exp.root.state.history
+
+
+if __name__ == "__main__":
+    tests = [
+        test_persistent_list_copies_share_prefix_and_diverge,
+        test_explorer_branches_share_state_without_leaking_between_siblings,
+        test_clone_makes_inherited_dicts_read_only,
+        test_bridge_explorer_stages_atlas_entry_with_its_encoding,
+        test_node_table_links_walks_and_looks_up_rows,
+        test_cumulative_entropy_budget_modes_and_frontier,
+        test_beam_search_and_mcts_find_replayable_in_budget_paths,
+        test_save_branch_streams_records_and_load_branch_reads_states_on_demand,
+        test_every_explorer_runs_its_pipeline,
+    ]
+    failures = 0
+    for t in tests:
+        try:
+            t()
+            print(f"PASS {t.__name__}")
+        except AssertionError as e:
+            print(f"FAIL {t.__name__}: {e}")
+            failures += 1
+        except Exception as e:
+            print(f"ERROR {t.__name__}: {type(e).__name__}: {e}")
+            failures += 1
+    print(f"\n{len(tests) - failures}/{len(tests)} passed")
+    sys.exit(0 if failures == 0 else 1)
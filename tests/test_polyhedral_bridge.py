@@ -9,19 +9,48 @@ or:
 
 from __future__ import annotations
 
+import importlib.util
+import io
 import json
+import os
+import pickle
+import shutil
+import socket
 import sys
+import tempfile
+import threading
 from pathlib import Path
 
 ROOT = Path(__file__).resolve().parents[1]
 sys.path.insert(0, str(ROOT))
 
+HAS_NUMPY = importlib.util.find_spec("numpy") is not None
+
+import bridge_index  # noqa: E402
+import bridge_service  # noqa: E402
 import polyhedral_bridge  # noqa: E402
+from bridge_archive import EncodingArchive, EncodingArchiveWriter, archive_to_jsonl, jsonl_to_archive  # noqa: E402
+from bridge_index import VectorIndex  # noqa: E402
+from bridge_reencode import ReencodePlan, SnapshotStore, plan_reencode, reencode  # noqa: E402
 from polyhedral_bridge import (  # noqa: E402
+    EncodeCache,
+    KeywordMatcher,
+    PayloadColumns,
+    PolyhedralEncoder,
     PolyhedralEncoding,
+    StageProfiler,
+    build_precompiled,
     encode,
+    encode_batch,
+    encode_file,
+    encode_jsonl,
+    encode_parallel,
+    encode_thresholds,
     generate_mandala_insight,
+    generate_mandala_insights,
     noise_to_insight,
+    profiled,
+    register_adapter,
 )
 
 
@@ -171,6 +200,717 @@ def test_generate_mandala_insight_no_signal_flags_nothing():
     assert entry["noise_to_insight"] == {}
 
 
+def _without_timestamp(enc: PolyhedralEncoding) -> dict:
+    d = enc.to_json()
+    d["provenance"].pop("timestamp")
+    return d
+
+
+def test_encoder_instance_matches_module_encode():
+    """A standalone PolyhedralEncoder produces the same encoding as encode()."""
+    encoder = PolyhedralEncoder()
+    for payload in (
+        "turbulent flow with quantum uncertainty in the resonance frequency",
+        {"intent": "self-healing crystalline lattice", "tags": ["FAM:MATTER"]},
+        "xyzzy plugh foobar",
+    ):
+        assert _without_timestamp(encoder.encode(payload)) == _without_timestamp(encode(payload))
+    assert polyhedral_bridge.get_default_encoder() is polyhedral_bridge.get_default_encoder()
+
+
+def test_encoder_recompiles_when_sources_change():
+    """Editing families.json on disk is picked up via mtime; reload() forces it."""
+    with tempfile.TemporaryDirectory() as tmp:
+        fam_path = Path(tmp) / "families.json"
+        shutil.copy(polyhedral_bridge.FAMILIES_PATH, fam_path)
+        encoder = PolyhedralEncoder(families_path=fam_path)
+        assert not encoder.is_stale()
+        before = encoder.encode("harmonic resonance").glyph_signature
+
+        doc = json.loads(fam_path.read_text(encoding="utf-8"))
+        for fam in doc["families"]:
+            if fam["id"] == "FAM:RESONANCE":
+                fam["glyph"] = "RR"
+        fam_path.write_text(json.dumps(doc), encoding="utf-8")
+        st = fam_path.stat()
+        os.utime(fam_path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+
+        assert encoder.is_stale()
+        after = encoder.encode("harmonic resonance").glyph_signature
+        assert before != after and after.startswith("RR")
+
+        pinned = PolyhedralEncoder(families_path=fam_path, check_mtime=False)
+        doc["families"][0]["glyph"] = "QQ"
+        fam_path.write_text(json.dumps(doc), encoding="utf-8")
+        os.utime(fam_path, ns=(st.st_atime_ns, st.st_mtime_ns + 2_000_000_000))
+        assert pinned.encode("harmonic resonance").glyph_signature.startswith("RR")
+        pinned.reload()
+        assert pinned.encode("harmonic resonance").glyph_signature.startswith("QQ")
+
+
+def test_keyword_matcher_matches_naive_scan():
+    """KeywordMatcher counts equal _scan_keywords on both maps, phrases included."""
+    fam_map = polyhedral_bridge._FAMILY_KEYWORDS
+    prin_map = polyhedral_bridge._PRINCIPLE_KEYWORDS
+    matcher = KeywordMatcher(fam_map, prin_map)
+    texts = [
+        "A standing wave in a golden ratio lattice; phase change at criticality.",
+        "standing  wave, golden\nratio, in-tune topology of the self-organizing hive",
+        "Transformation TRANSFORMS the conserved, unconserved dualities of spacetime",
+        "frame of reference + field theory + equivalence principle " * 50,
+        "xyzzy plugh foobar",
+        "",
+    ]
+    for text in texts:
+        fam, prin, matches = matcher.scan(text)
+        assert matches is None
+        assert fam == polyhedral_bridge._scan_keywords(text, fam_map)
+        assert prin == polyhedral_bridge._scan_keywords(text, prin_map)
+
+
+def test_keyword_matcher_offsets_point_at_first_occurrence():
+    """offsets=True lists each matched keyword once, at its first lowercased offset."""
+    matcher = KeywordMatcher(polyhedral_bridge._FAMILY_KEYWORDS, polyhedral_bridge._PRINCIPLE_KEYWORDS)
+    text = "Tidal FLOW meets a Standing Wave; tidal flow again"
+    _fam, _prin, matches = matcher.scan(text, offsets=True)
+    assert matches == sorted(matches)
+    keywords = [kw for _off, kw in matches]
+    assert len(keywords) == len(set(keywords))
+    assert (0, "tidal") in matches
+    assert (6, "flow") in matches
+    assert (19, "standing wave") in matches
+    for off, kw in matches:
+        assert text.lower()[off:off + len(kw)] == kw
+
+
+def test_encode_batch_rows_match_encode():
+    """encode_batch matrices reproduce encode() row by row (skipped without numpy)."""
+    if not HAS_NUMPY:
+        return
+    payloads = [
+        "a hexagonal mesh under tidal load",
+        {"intent": "self-healing crystalline lattice", "tags": ["FAM:MATTER", "FAM:NETWORKS"], "glyph": "◇⬡"},
+        "turbulent flow with quantum uncertainty in the resonance frequency",
+        "xyzzy plugh foobar",
+        "a colony that grows through reaction-diffusion pattern formation",
+    ]
+    batch = encode_batch(payloads, threshold=0.1)
+    assert len(batch) == len(payloads)
+    assert batch.family_counts.shape == (5, 20)
+    assert batch.principle_amplitudes_l1.shape == (5, 12)
+    assert batch.family_order == polyhedral_bridge.get_default_encoder().fam_order
+    for i, payload in enumerate(payloads):
+        enc = encode(payload, threshold=0.1)
+        assert batch.family_amplitudes_l1[i].tolist() == enc.family_vector
+        assert batch.principle_amplitudes_l1[i].tolist() == enc.principle_vector
+        assert batch.family_counts[i].tolist() == [enc.family_raw_counts[f] for f in batch.family_order]
+        assert batch.glyph_signatures[i] == enc.glyph_signature
+        assert list(batch.equation_hashes[i]) == enc.equation_hashes
+        assert _without_timestamp(batch.row(i))["family_amplitudes_l1"] == enc.family_amplitudes_l1
+    # Zero-count row behaves like _l1_normalize: all zeros, fallback glyph, no equations.
+    assert batch.family_amplitudes_l1[3].sum() == 0.0
+    assert batch.glyph_signatures[3] == "◯"
+    assert batch.equation_hashes[3] == ()
+
+
+def test_encode_jsonl_streams_in_input_order():
+    """--jsonl mode: str and dict lines in, one encoding per line out, same order."""
+    src = io.StringIO(
+        '"a hexagonal mesh under tidal load"\n'
+        "\n"
+        '{"intent": "self-healing crystalline lattice", "tags": ["FAM:MATTER"]}\n'
+        '"xyzzy plugh foobar"\n'
+    )
+    dst = io.StringIO()
+    assert encode_jsonl(src, dst) == 3
+    rows = [json.loads(line) for line in dst.getvalue().splitlines()]
+    assert [r["provenance"]["input_type"] for r in rows] == ["text", "dict", "text"]
+    assert rows[0]["glyph_signature"] == encode("a hexagonal mesh under tidal load").glyph_signature
+    assert rows[2]["glyph_signature"] == "◯"
+
+
+def test_main_jsonl_files_and_bad_line():
+    """main(['--jsonl', IN, OUT]) writes OUT; a non-str/dict line is reported with its line number."""
+    with tempfile.TemporaryDirectory() as tmp:
+        src = Path(tmp) / "in.jsonl"
+        dst = Path(tmp) / "out.jsonl"
+        src.write_text('"tidal flow"\n"resonance"\n', encoding="utf-8")
+        assert polyhedral_bridge.main(["polyhedral_bridge.py", "--jsonl", str(src), str(dst)]) == 0
+        assert len(dst.read_text(encoding="utf-8").splitlines()) == 2
+
+        src.write_text('"tidal flow"\n[1, 2]\n', encoding="utf-8")
+        assert polyhedral_bridge.main(["polyhedral_bridge.py", "--jsonl", str(src), str(dst)]) == 1
+
+
+def test_encode_parallel_preserves_order_and_output():
+    """encode_parallel over a 2-process pool returns encode()'s results in input order."""
+    payloads = [f"tidal flow {i} with resonance" if i % 3 else {"intent": "lattice", "tags": ["FAM:FLOW"]}
+                for i in range(40)]
+    serial = [_without_timestamp(encode(p)) for p in payloads]
+    pooled = [_without_timestamp(e) for e in encode_parallel(payloads, workers=2, chunk_size=3)]
+    inline = [_without_timestamp(e) for e in encode_parallel(payloads, workers=1, chunk_size=7)]
+    assert pooled == serial
+    assert inline == serial
+
+
+def test_frozen_timestamp_gives_byte_identical_json():
+    """timestamp=None omits the field; a fixed string is stamped verbatim."""
+    payload = {"intent": "tidal lattice", "tags": ["FAM:FLOW"]}
+    omit = PolyhedralEncoder(timestamp=None)
+    first = json.dumps(omit.encode(payload).to_json(), ensure_ascii=False)
+    assert first == json.dumps(omit.encode(payload).to_json(), ensure_ascii=False)
+    assert "timestamp" not in omit.encode(payload).provenance
+    frozen = PolyhedralEncoder(timestamp="1970-01-01T00:00:00Z")
+    assert frozen.encode(payload).provenance["timestamp"] == "1970-01-01T00:00:00Z"
+
+
+def test_encode_cache_hits_evicts_and_persists():
+    """Cached encodings equal fresh ones; the LRU evicts, the disk store survives restarts."""
+    payloads = ["tidal flow", "harmonic resonance", {"intent": "lattice", "tags": ["FAM:FLOW"]}]
+    plain = PolyhedralEncoder(timestamp=None)
+    with tempfile.TemporaryDirectory() as tmp:
+        cached = PolyhedralEncoder(timestamp=None, cache=EncodeCache(maxsize=2, directory=tmp))
+        for p in payloads * 2:
+            assert cached.encode(p).to_json() == plain.encode(p).to_json()
+        stats = cached.cache.stats()
+        assert stats["misses"] == 3 and stats["evictions"] >= 1 and stats["size"] == 2
+        assert stats["hits"] + stats["disk_hits"] == 3
+
+        # Hits hand out copies and keep the caller's threshold in provenance.
+        hit = cached.encode("tidal flow")
+        hit.family_raw_counts["FAM:FLOW"] = 99
+        assert cached.encode("tidal flow").to_json() == plain.encode("tidal flow").to_json()
+        assert cached.encode("tidal flow", threshold=0.5).provenance["threshold"] == 0.5
+
+        fresh = PolyhedralEncoder(timestamp=None, cache=EncodeCache(directory=tmp))
+        assert fresh.encode("harmonic resonance").to_json() == plain.encode("harmonic resonance").to_json()
+        assert fresh.cache.stats()["disk_hits"] == 1 and fresh.cache.stats()["misses"] == 0
+
+        # Case and tag order normalize away; threshold and ontology changes do not.
+        key = cached.cache_key("Tidal Flow", ["fam:flow", "PRIN:UNITY"], "dict", 0.05)
+        assert key == cached.cache_key("tidal flow", ["PRIN:UNITY", "FAM:FLOW"], "dict", 0.05)
+        assert key != cached.cache_key("tidal flow", ["PRIN:UNITY", "FAM:FLOW"], "dict", 0.1)
+        fam_path = Path(tmp) / "families.json"
+        shutil.copy(polyhedral_bridge.FAMILIES_PATH, fam_path)
+        fam_path.write_text(fam_path.read_text(encoding="utf-8") + "\n", encoding="utf-8")
+        edited = PolyhedralEncoder(families_path=fam_path)
+        assert edited.fingerprints["ontology"] != cached.fingerprints["ontology"]
+        assert key != edited.cache_key("tidal flow", ["PRIN:UNITY", "FAM:FLOW"], "dict", 0.05)
+
+
+def test_encoding_is_array_backed_with_fresh_dict_views():
+    """Counts/amplitudes live in arrays; dict views, to_json and pickling agree with them."""
+    enc = encode({"intent": "tidal lattice resonance", "tags": ["FAM:FLOW"]})
+    assert not hasattr(enc, "__dict__")
+    n_fam = len(enc.family_order)
+    assert list(enc.amplitudes) == enc.family_vector + enc.principle_vector
+    assert list(enc.counts[:n_fam]) == list(enc.family_raw_counts.values())
+    assert enc.family_order is encode("flow").family_order
+
+    view = enc.family_amplitudes_l1
+    view["FAM:FLOW"] = -1.0
+    assert enc.family_amplitudes_l1["FAM:FLOW"] > 0
+
+    doc = enc.to_json()
+    assert list(doc) == [
+        "family_vector", "principle_vector", "family_amplitudes_l1", "principle_amplitudes_l1",
+        "family_raw_counts", "principle_raw_counts", "equation_hashes", "glyph_signature", "provenance",
+    ]
+    assert PolyhedralEncoding(**doc) == enc
+    assert pickle.loads(pickle.dumps(enc)) == enc
+    doc["provenance"]["input_type"] = "changed"
+    assert enc.provenance["input_type"] == "dict"
+
+
+def test_archive_round_trips_jsonl_with_random_access():
+    """JSONL -> binary archive -> JSONL is byte-identical; rows decode independently."""
+    payloads = ["tidal flow", "", {"intent": "harmonic lattice", "tags": ["FAM:FLOW", "PRIN:UNITY"]}] * 4
+    src = io.StringIO()
+    encode_jsonl(io.StringIO("\n".join(json.dumps(p) for p in payloads)), src)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "enc.pbarc"
+        assert jsonl_to_archive(io.StringIO(src.getvalue()), path) == len(payloads)
+        assert path.stat().st_size < len(src.getvalue()) / 2
+        out = io.StringIO()
+        assert archive_to_jsonl(path, out) == len(payloads)
+        assert out.getvalue() == src.getvalue()
+
+        lines = src.getvalue().splitlines()
+        with EncodingArchive(path) as archive:
+            assert archive[2].to_json() == json.loads(lines[2])
+            assert archive[-1].to_json() == json.loads(lines[-1])
+            assert archive.glyph_signature(0) == json.loads(lines[0])["glyph_signature"]
+            if HAS_NUMPY:
+                amps = archive.amplitudes()
+                assert amps.shape == (len(payloads), 32) and str(amps.dtype) == "float32"
+                assert abs(float(amps[2].sum()) - 2.0) < 1e-5
+                assert archive.counts()[0].tolist() == list(archive[0].counts)
+
+        big = PolyhedralEncoding(**json.loads(lines[0]))
+        big.counts[0] = 70_000
+        try:
+            with EncodingArchiveWriter(Path(tmp) / "big.pbarc") as writer:
+                writer.write(big)
+            raise AssertionError("uint16 overflow not rejected")
+        except ValueError:
+            pass
+        assert not (Path(tmp) / "big.pbarc").exists()
+        with EncodingArchiveWriter(Path(tmp) / "big.pbarc", count_dtype="uint32") as writer:
+            writer.write(big)
+        with EncodingArchive(Path(tmp) / "big.pbarc") as archive:
+            assert archive[0].counts[0] == 70_000
+
+
+def test_equation_bitsets_keep_first_seen_order_and_batch_matrix():
+    """Bitset resolution matches the per-id walk even when families share equations."""
+    with tempfile.TemporaryDirectory() as tmp:
+        fam_path = Path(tmp) / "families.json"
+        doc = json.loads(polyhedral_bridge.FAMILIES_PATH.read_text(encoding="utf-8"))
+        by_id = {f["id"]: f for f in doc["families"]}
+        by_id["FAM:RESONANCE"]["equation_ids"] = ["EQ:001"]
+        by_id["FAM:FLOW"]["equation_ids"] = ["EQ:005", "EQ:001", "EQ:005"]
+        fam_path.write_text(json.dumps(doc), encoding="utf-8")
+        encoder = PolyhedralEncoder(families_path=fam_path, timestamp=None)
+        h = {eq_id: hsh for eq_id, hsh in encoder.eq_id_to_hash.items() if eq_id in ("EQ:001", "EQ:005")}
+
+        assert encoder.encode("tidal flow").equation_hashes == [h["EQ:005"], h["EQ:001"]]
+        assert encoder.encode("resonance and flow").equation_hashes == [h["EQ:001"], h["EQ:005"]]
+
+        if HAS_NUMPY:
+            payloads = ["tidal flow", "resonance and flow", "", "fractal lattice with feedback"]
+            batch = encoder.encode_batch(payloads)
+            matrix = batch.equation_matrix()
+            assert matrix.shape == (len(payloads), len(encoder.equation_order))
+            for i, p in enumerate(payloads):
+                invoked = {encoder.equation_order[j] for j in matrix[i].nonzero()[0]}
+                assert invoked == set(encoder.encode(p).equation_hashes)
+                assert list(batch.equation_hashes[i]) == encoder.encode(p).equation_hashes
+
+
+def test_encode_thresholds_matches_encode_per_threshold():
+    """One scan resolves every threshold exactly like separate encode() calls."""
+    thresholds = [0.3, 0.0, 0.05, 1.0, 0.1]
+    payloads = ["tidal flow resonance", "harmonic lattice with feedback and tidal flow", "", {"intent": "x", "tags": ["FAM:FLOW"]}]
+    for p in payloads:
+        sweep = encode_thresholds(p, thresholds)
+        assert [e.provenance["threshold"] for e in sweep] == thresholds
+        for t, enc in zip(thresholds, sweep):
+            assert _without_timestamp(enc) == _without_timestamp(encode(p, threshold=t))
+
+    out = io.StringIO()
+    encode_jsonl(io.StringIO('"tidal flow"\n"lattice"\n'), out, threshold=[0.0, 0.5])
+    rows = [json.loads(line) for line in out.getvalue().splitlines()]
+    assert len(rows) == 2 and [e["provenance"]["threshold"] for e in rows[0]] == [0.0, 0.5]
+    assert polyhedral_bridge.parse_thresholds(["0.05,0.1", "0.2"]) == [0.05, 0.1, 0.2]
+
+
+def test_generate_mandala_insights_streams_same_drafts():
+    """The batch entry point yields generate_mandala_insight()'s drafts, in order, inline or pooled."""
+    payloads = ["tidal flow under turbulent resonance", {"intent": "lattice", "tags": ["FAM:FLOW"]}, ""] * 3
+    names = [f"Draft {i}" for i in range(len(payloads))]
+
+    def strip(entry: dict) -> dict:
+        entry["_encoding"]["provenance"].pop("timestamp")
+        return entry
+
+    single = [strip(generate_mandala_insight(p, name=n)) for p, n in zip(payloads, names)]
+    assert [strip(e) for e in generate_mandala_insights(payloads, names)] == single
+    assert [strip(e) for e in generate_mandala_insights(payloads, names, workers=2, chunk_size=2)] == single
+    try:
+        list(generate_mandala_insights(payloads, names[:-1]))
+        raise AssertionError("length mismatch not rejected")
+    except ValueError:
+        pass
+
+
+def test_vector_index_exact_blocked_ivf_and_persistence():
+    """Blocked exact search equals brute force; full-probe IVF and a reload give the same hits."""
+    if not HAS_NUMPY:
+        return
+    import numpy as np
+
+    words = ["tidal", "flow", "resonance", "lattice", "feedback", "fractal", "harmonic", "entropy", "wave", "mesh"]
+    payloads = [" ".join(words[(i * 7 + j * 3) % len(words)] for j in range(1 + i % 5)) for i in range(60)] + [""]
+    index = VectorIndex.from_payloads([f"p{i}" for i in range(len(payloads))], payloads)
+    index.block_rows = 7
+    queries = index.vectors[[0, 13, 60]] + np.float32(0.01)
+
+    unit = index.vectors / np.maximum(np.linalg.norm(index.vectors, axis=1, keepdims=True), 1e-12)
+    qn = queries / np.linalg.norm(queries, axis=1, keepdims=True)
+    for metric, brute in (("cosine", qn @ unit.T), ("l1", np.abs(queries[:, None] - index.vectors[None]).sum(2))):
+        hits = index.search(queries, k=4, metric=metric)
+        for q, row_hits in enumerate(hits):
+            expected = sorted(brute[q], reverse=metric == "cosine")[:4]
+            assert np.allclose([score for _, score in row_hits], expected, atol=1e-5)
+
+    index.build_ivf(nlist=4)
+    exact = index.search(queries, k=5)
+    approx = index.search(queries, k=5, approximate=True, nprobe=4)
+    # Different matmul shapes can round tied scores apart, so compare scores here.
+    assert [[score for _, score in hits] for hits in approx] == [[score for _, score in hits] for hits in exact]
+    with tempfile.TemporaryDirectory() as tmp:
+        index.save(tmp)
+        loaded = VectorIndex.load(tmp)
+        assert loaded.ids == index.ids and loaded.centroids is not None
+        assert loaded.search(queries, k=5) == exact  # default block size, same tie-broken rows
+
+        encoder = PolyhedralEncoder(timestamp=None)
+        with EncodingArchiveWriter(Path(tmp) / "p.pbarc") as writer:
+            for p in payloads:
+                writer.write(encoder.encode(p))
+        mapped = VectorIndex.from_archive(Path(tmp) / "p.pbarc")
+        assert isinstance(mapped.vectors, np.memmap) and np.array_equal(mapped.vectors, index.vectors)
+        assert mapped.search(queries, k=5) == index.search(queries, k=5)
+        del mapped
+
+    hits = bridge_index.nearest("a hexagonal honeycomb mesh under tidal load", k=3)
+    assert len(hits) == 3 and all(h["kind"] in ("entry", "seed") for h in hits)
+    assert hits[0]["score"] >= hits[-1]["score"]
+
+
+def test_atlas_index_stats_its_sources_at_most_once_per_interval():
+    """nearest() reuses the atlas index without touching the filesystem until the recheck interval or refresh=True."""
+    calls = []
+    key, interval = bridge_index._atlas_sources_key, bridge_index.ATLAS_RECHECK_SECONDS
+    bridge_index._atlas_sources_key = lambda enc: calls.append(1) or key(enc)
+    bridge_index.ATLAS_RECHECK_SECONDS = 3600.0
+    try:
+        index = bridge_index.get_atlas_index(refresh=True)
+        for _ in range(5):
+            bridge_index.nearest("tidal mesh", k=2)
+        assert len(calls) == 1 and bridge_index.get_atlas_index() is index
+        assert bridge_index.get_atlas_index(refresh=True) is index and len(calls) == 2  # unchanged sources
+        bridge_index.ATLAS_RECHECK_SECONDS = 0.0
+        bridge_index.nearest("tidal mesh", k=2)
+        assert len(calls) == 3
+    finally:
+        bridge_index._atlas_sources_key = key
+        bridge_index.ATLAS_RECHECK_SECONDS = interval
+
+
+def test_plan_reencode_touches_only_affected_records():
+    """A new keyword, an edited equation list and a new glyph re-encode only the records they reach."""
+    with tempfile.TemporaryDirectory() as tmp:
+        fam_path = Path(tmp) / "families.json"
+        shutil.copy(polyhedral_bridge.FAMILIES_PATH, fam_path)
+        old = PolyhedralEncoder(families_path=fam_path, timestamp=None)
+        payloads = [
+            "eddy currents in a tidal channel",
+            "tidal flow",
+            "hexagonal mesh",
+            "conscious attention",
+            "",
+        ]
+        records = [old.encode(p, threshold=0.1) for p in payloads]
+        assert records[0].provenance["fingerprints"] == old.fingerprints
+        store = SnapshotStore(Path(tmp) / "snapshots")
+        store.save(old)
+
+        doc = json.loads(fam_path.read_text(encoding="utf-8"))
+        for fam in doc["families"]:
+            if fam["id"] == "FAM:FLOW":
+                fam["equation_ids"] = fam["equation_ids"][:2]
+            if fam["id"] == "FAM:NETWORKS":
+                fam["glyph"] = "NN"
+        fam_path.write_text(json.dumps(doc), encoding="utf-8")
+        keywords = {nid: list(kws) for nid, kws in polyhedral_bridge._FAMILY_KEYWORDS.items()}
+        keywords["FAM:FLOW"].append("eddy")
+        new = PolyhedralEncoder(families_path=fam_path, timestamp=None, family_keywords=keywords)
+        assert new.fingerprints["keywords"] != old.fingerprints["keywords"]
+
+        plan = plan_reencode(payloads, records, store, encoder=new)
+        assert plan.actions == ["full", "derive", "derive", "restamp", "restamp"]
+        assert plan.summary() == {"keep": 0, "restamp": 2, "derive": 2, "full": 1}
+        updated = list(reencode(payloads, records, plan, encoder=new))
+        assert updated == [new.encode(p, threshold=0.1) for p in payloads]
+
+        # derive labels the input type from the payload, as a fresh encode() would.
+        unlabelled = records[1].to_json()
+        del unlabelled["provenance"]["input_type"]
+        derived = next(reencode(payloads[1:2], [PolyhedralEncoding(**unlabelled)], ReencodePlan(["derive"], [None]), encoder=new))
+        assert derived == updated[1] and derived.provenance["input_type"] == "text"
+
+        # Current records are kept; unknown tables or missing fingerprints force a rescan.
+        assert plan_reencode(payloads, updated, store, encoder=new).actions == ["keep"] * len(payloads)
+        bare = records[3].to_json()
+        del bare["provenance"]["fingerprints"]
+        assert plan_reencode(payloads[3:4], [PolyhedralEncoding(**bare)], store, encoder=new).actions == ["full"]
+        empty = SnapshotStore(Path(tmp) / "empty")
+        assert plan_reencode(payloads[3:4], records[3:4], empty, encoder=new).actions == ["full"]
+        assert old.fingerprints["index"] is not None
+        shutil.rmtree(Path(tmp) / "snapshots" / "index")
+        no_index = plan_reencode(payloads, records, SnapshotStore(Path(tmp) / "snapshots"), encoder=new)
+        assert no_index.actions == ["full"] * len(payloads) and "index" in no_index.reasons[0]
+
+        # Listing a keyword twice doubles its count, so it is a keyword change too.
+        keywords["FAM:FLOW"].append("tidal")
+        doubled = PolyhedralEncoder(families_path=fam_path, timestamp=None, family_keywords=keywords)
+        store.save(new)
+        plan = plan_reencode(payloads, updated, SnapshotStore(Path(tmp) / "snapshots"), encoder=doubled)
+        assert plan.actions == ["full", "full", "restamp", "restamp", "restamp"]
+        assert "'tidal'" in plan.reasons[1]
+
+
+def test_encode_service_micro_batches_concurrent_requests():
+    """Concurrent socket clients get encode() output back, served in fewer batches than requests."""
+    if not HAS_NUMPY or not hasattr(socket, "AF_UNIX"):
+        return
+    import asyncio
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bridge.sock")
+        service = bridge_service.EncodeService(PolyhedralEncoder(timestamp=None), window_ms=50, max_line=1 << 20)
+        loop = asyncio.new_event_loop()
+        thread = threading.Thread(target=loop.run_forever, daemon=True)
+        thread.start()
+        ready = threading.Event()
+        serving = asyncio.run_coroutine_threadsafe(service.serve(path, ready=ready.set), loop)
+        assert ready.wait(10)
+        try:
+            payloads = [f"tidal flow through a hexagonal mesh, take {i}" for i in range(12)]
+            payloads += [{"intent": "self-healing lattice", "tags": ["FAM:MATTER"]}, ""]
+            results: list = [None] * len(payloads)
+            barrier = threading.Barrier(len(payloads))
+
+            def call(i):
+                barrier.wait()
+                results[i] = bridge_service.encode_via_service(payloads[i], threshold=0.1, socket_path=path)
+
+            clients = [threading.Thread(target=call, args=(i,)) for i in range(len(payloads))]
+            for c in clients:
+                c.start()
+            for c in clients:
+                c.join()
+            local = PolyhedralEncoder(timestamp=None)
+            assert results == [local.encode(p, threshold=0.1).to_json() for p in payloads]
+
+            try:
+                bridge_service.encode_via_service({"intent": "x", "tags": 3}, socket_path=path)
+                raise AssertionError("bad payload should be rejected")
+            except ValueError:
+                pass
+            metrics = bridge_service.request({"op": "metrics"}, socket_path=path)["metrics"]
+            assert metrics["requests"] == len(payloads) + 1 and metrics["errors"] == 1
+            assert metrics["batches"] < metrics["requests"] and metrics["max_batch"] > 1
+            assert metrics["latency_ms"]["p50"] <= metrics["latency_ms"]["p99"]
+
+            # Past asyncio's 64 KiB default line limit, and past max_line.
+            big = "tidal flow through a hexagonal mesh " * 6000
+            assert len(big) > 1 << 16
+            assert bridge_service.encode_via_service(big, threshold=0.1, socket_path=path) == local.encode(
+                big, threshold=0.1
+            ).to_json()
+            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+                sock.settimeout(10)
+                sock.connect(path)
+                too_long = json.dumps({"id": 1, "payload": "x" * (2 << 20)})
+                sock.sendall((too_long + "\n" + json.dumps({"id": 2, "op": "metrics"}) + "\n").encode())
+                sock.shutdown(socket.SHUT_WR)
+                buf = b""
+                while chunk := sock.recv(1 << 16):
+                    buf += chunk
+            replies = {r["id"]: r for r in map(json.loads, buf.splitlines())}
+            assert set(replies) == {None, 2}
+            assert "longer than" in replies[None]["error"] and "metrics" in replies[2]
+        finally:
+            serving.cancel()
+            for _ in range(500):
+                if not os.path.exists(path):
+                    break
+                threading.Event().wait(0.01)
+            loop.call_soon_threadsafe(loop.stop)
+            thread.join(5)
+            loop.close()
+        assert not os.path.exists(path)
+        assert bridge_service.encode_via_service("tidal", socket_path=path) is None
+
+
+def test_payload_adapters_and_columns_match_row_extraction():
+    """Registered adapters, duck-typed objects and PayloadColumns give the row-wise text, tags and input types."""
+
+    class Reading:
+        def __init__(self, quantity):
+            self.quantity = quantity
+
+    class Constraint:
+        __slots__ = ("name", "variables", "tags")
+
+        def __init__(self, name, variables, tags):
+            self.name, self.variables, self.tags = name, variables, tags
+
+    register_adapter(Reading, lambda r: (f"{r.quantity} calibration", ["PRIN:UNITY"], "reading"))
+    enc = encode(Reading("tidal flow"))
+    assert enc.provenance["input_type"] == "reading"
+    assert enc.family_raw_counts["FAM:FLOW"] == 2 and enc.principle_raw_counts["PRIN:UNITY"] == 1
+
+    seeds = [
+        {"intent": "standing", "tags": ["wave", "FAM:FLOW"], "glyph": "⬡"},
+        {"name": "honeycomb lattice", "domain": 0, "tags": [""]},
+        {"description": "entropy in a heat engine"},
+        {},
+    ]
+    columns = {key: [seed.get(key) for seed in seeds] for key in ("intent", "name", "description", "domain", "tags")}
+    columns["glyph"] = [seed.get("glyph") for seed in seeds]
+    rows = [polyhedral_bridge._payload_to_text_and_tags(seed) for seed in seeds]
+    assert list(zip(*PayloadColumns(columns).extract())) == rows
+    assert list(zip(*PayloadColumns.from_records(seeds).extract())) == rows
+    assert rows[0][0] == "standing wave FAM:FLOW ⬡"
+
+    objects = [Constraint("heat flow", ["T", "k"], ["PRIN:CONSERVATION"]), Constraint("", None, None)]
+    rows = [polyhedral_bridge._payload_to_text_and_tags(o) for o in objects]
+    assert rows[0] == ("heat flow T k PRIN:CONSERVATION", ["PRIN:CONSERVATION"], "object")
+    assert list(zip(*PayloadColumns.from_objects(objects).extract())) == rows
+
+    try:
+        PayloadColumns({"intent": ["a", "b"], "tags": [[]]})
+        raise AssertionError("ragged columns should be rejected")
+    except ValueError:
+        pass
+    if HAS_NUMPY:
+        by_rows, by_columns = encode_batch(seeds), encode_batch(PayloadColumns.from_records(seeds))
+        assert (by_rows.family_counts == by_columns.family_counts).all()
+        assert list(by_rows.glyph_signatures) == list(by_columns.glyph_signatures)
+
+
+def test_precompiled_tables_used_only_while_sources_match():
+    """A build_precompiled() file restores identical tables; any source edit falls back to JSON."""
+    with tempfile.TemporaryDirectory() as tmp:
+        fam_path = Path(tmp) / "families.json"
+        shutil.copy(polyhedral_bridge.FAMILIES_PATH, fam_path)
+        path = Path(tmp) / "tables.marshal"
+        compiled = PolyhedralEncoder(families_path=fam_path, timestamp=None, precompiled=None)
+        assert build_precompiled(path, encoder=compiled) == path
+
+        warm = PolyhedralEncoder(families_path=fam_path, timestamp=None, precompiled=path)
+        assert warm.loaded_from == "precompiled" and compiled.loaded_from == "json"
+        assert warm.equation_order == compiled.equation_order
+        assert warm.fingerprints == compiled.fingerprints
+        texts = ["a hexagonal mesh under tidal load", "standing wave in a crystal lattice", ""]
+        for text in texts:
+            assert warm.encode(text).to_json() == compiled.encode(text).to_json()
+        if HAS_NUMPY:
+            assert list(warm.encode_batch(texts).equation_hashes) == list(compiled.encode_batch(texts).equation_hashes)
+
+        keywords = {nid: list(kws) for nid, kws in polyhedral_bridge._FAMILY_KEYWORDS.items()}
+        keywords["FAM:FLOW"].append("eddy")
+        other = PolyhedralEncoder(families_path=fam_path, family_keywords=keywords, precompiled=path)
+        assert other.loaded_from == "json"
+
+        doc = json.loads(fam_path.read_text(encoding="utf-8"))
+        doc["families"][0]["glyph"] = "RR"
+        fam_path.write_text(json.dumps(doc), encoding="utf-8")
+        os.utime(fam_path, ns=(0, 0))
+        assert "RR" in warm.encode("resonance").glyph_signature
+        assert warm.loaded_from == "json"
+
+        path.write_bytes(b"not marshal")
+        assert PolyhedralEncoder(families_path=fam_path, precompiled=path).loaded_from == "json"
+
+
+def test_stage_profiler_records_every_stage_without_changing_output():
+    """Profiled encodes match plain ones; stage histograms and counters add up and merge."""
+    payloads = ["a hexagonal mesh under tidal load", {"intent": "crystal lattice", "tags": ["FAM:FLOW"]}, ""]
+    plain = PolyhedralEncoder(timestamp=None)
+    prof = StageProfiler()
+    enc = PolyhedralEncoder(timestamp=None, profiler=prof, cache=EncodeCache())
+    for p in payloads + payloads[:1]:
+        assert enc.encode(p).to_json() == plain.encode(p).to_json()
+    counters = prof.counters
+    assert counters["encodes"] == 4 and counters["cache_hits"] == 1 and counters["reloads"] == 1
+    assert counters["tag_hits"] == 1
+    assert counters["keyword_hits"] + counters["tag_hits"] == sum(sum(plain.encode(p).counts) for p in payloads)
+    summary = prof.summary()["stages"]
+    assert summary["load"]["count"] == 5  # construction + one freshness check per encode
+    assert summary["cache"]["count"] == 4
+    assert all(summary[stage]["count"] == 3 for stage in ("scan", "tags", "normalize", "glyph", "equations", "build"))
+    assert abs(sum(r["share"] for r in summary.values()) - 1.0) < 1e-9
+    assert "scan" in prof.report()
+
+    total = StageProfiler()
+    total.merge(prof)
+    total.merge(prof)
+    assert total.counters["encodes"] == 8
+    scan = total.stages["scan"]
+    assert scan.count == 6 and scan.total_ns == 2 * prof.stages["scan"].total_ns
+    assert scan.min_ns <= scan.percentile(0.5) <= scan.max_ns
+
+    # Threshold sweeps go through the same stages and cache, one scan per call.
+    sweep = StageProfiler()
+    enc = PolyhedralEncoder(timestamp=None, profiler=sweep, cache=EncodeCache())
+    want = [plain.encode("tidal flow", threshold=t).to_json() for t in (0.1, 0.5)]
+    assert [e.to_json() for e in enc.encode_thresholds("tidal flow", [0.1, 0.5])] == want
+    assert [e.to_json() for e in enc.encode_thresholds("tidal flow", [0.5, 0.1])] == want[::-1]
+    assert enc.encode("tidal flow", threshold=0.5).to_json() == want[1]
+    assert sweep.counters["encodes"] == 3 and sweep.counters["cache_hits"] == 3
+    assert sweep.stages["scan"].count == 1 and sweep.stages["cache"].count == 3
+
+    # encode_file is profiled too (it never consults the cache).
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "doc.txt"
+        path.write_text("a hexagonal mesh under tidal load", encoding="utf-8")
+        before = sweep.counters["encodes"]
+        assert enc.encode_file(path).to_json() == plain.encode(path.read_text(encoding="utf-8")).to_json()
+    assert sweep.counters["encodes"] == before + 1 and sweep.stages["scan"].count == 2
+    assert sweep.counters["chars"] == 3 * len("tidal flow") + len("a hexagonal mesh under tidal load")
+
+    # profiled() attaches for the with-block only.
+    with profiled(plain) as block:
+        plain.encode("tidal flow")
+    assert plain.profiler is None and block.counters["encodes"] == 1
+
+
+def test_encode_file_matches_in_memory_across_chunk_boundaries():
+    """Chunked mmap encoding equals encode(read_text()), phrases and multi-byte chars straddling chunks included."""
+    enc = PolyhedralEncoder(timestamp=None)
+    text = (
+        "Ünïcode prelude ΟΔΟΣ İstanbul 😀\n" * 3
+        + "the GOLDEN RATIO of a standing wave,\r\nfield theory; golden  ratio "
+        + "x" * 40 + " honeycomb\n" + "frame of reference ΣΟΦΙΑΣ equivalence principle"
+    )
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "doc.txt"
+        path.write_bytes(text.encode("utf-8"))
+        want = enc.encode(path.read_text(encoding="utf-8")).to_json()
+        assert want["principle_raw_counts"]["PRIN:PROPORTION"] >= 1
+        for chunk_bytes in (1, 2, 5, 13, 64, 1 << 20):
+            assert enc.encode_file(path, chunk_bytes=chunk_bytes).to_json() == want, chunk_bytes
+        assert "".join(polyhedral_bridge.iter_file_text(path, chunk_bytes=7)) == text
+
+        empty = Path(tmp) / "empty.txt"
+        empty.write_bytes(b"")
+        assert encode_file(empty).glyph_signature == encode("").glyph_signature == "◯"
+
+
+def test_resonance_profile_windows_match_encoding_each_slice():
+    """Every sliding window (chars, tokens, lines) carries the counts and glyph encode() gives its slice."""
+    if not HAS_NUMPY:
+        return
+    text = (
+        "A hexagonal mesh under tidal load.\nThe GOLDEN RATIO of a standing wave\n"
+        "quantum field theory, then calm prose\n\nthermal entropy and golden\nratio with lattice growth\n"
+    )
+    enc = PolyhedralEncoder(timestamp=None)
+    text_l = text.lower()
+    for unit, size, step in (("chars", 24, 7), ("chars", 500, 500), ("tokens", 3, 1), ("tokens", 4, 6), ("lines", 2, 1)):
+        prof = enc.resonance_profile(text, size, step, unit=unit)
+        assert len(prof) == prof.family_counts.shape[0] == len(prof.glyph_signatures) > 0
+        for w, (a, b) in enumerate(prof.spans.tolist()):
+            want = enc.encode(text_l[a:b])
+            got = prof.family_counts[w].tolist() + prof.principle_counts[w].tolist()
+            assert got == want.counts.tolist(), (unit, size, step, text_l[a:b])
+            assert prof.glyph_signatures[w] == want.glyph_signature
+            assert prof.family_amplitudes_l1[w].tolist() == want.family_vector
+    # "golden ratio" counts only where the whole phrase is inside one line.
+    lines = enc.resonance_profile(text, 1, unit="lines")
+    prop = lines.principle_order.index("PRIN:PROPORTION")
+    assert lines.principle_counts[:, prop].tolist() == [0, 2, 0, 0, 0, 1]
+    try:
+        enc.resonance_profile(text, 10, unit="pages")
+        raise AssertionError("unknown unit should be rejected")
+    except ValueError:
+        pass
+
+
 if __name__ == "__main__":
     tests = [
         test_text_input_networks_and_flow,
@@ -185,6 +925,30 @@ if __name__ == "__main__":
         test_generate_mandala_insight_schema_matches_atlas_entry,
         test_generate_mandala_insight_deterministic,
         test_generate_mandala_insight_no_signal_flags_nothing,
+        test_encoder_instance_matches_module_encode,
+        test_encoder_recompiles_when_sources_change,
+        test_keyword_matcher_matches_naive_scan,
+        test_keyword_matcher_offsets_point_at_first_occurrence,
+        test_encode_batch_rows_match_encode,
+        test_encode_jsonl_streams_in_input_order,
+        test_main_jsonl_files_and_bad_line,
+        test_encode_parallel_preserves_order_and_output,
+        test_frozen_timestamp_gives_byte_identical_json,
+        test_encode_cache_hits_evicts_and_persists,
+        test_encoding_is_array_backed_with_fresh_dict_views,
+        test_archive_round_trips_jsonl_with_random_access,
+        test_equation_bitsets_keep_first_seen_order_and_batch_matrix,
+        test_encode_thresholds_matches_encode_per_threshold,
+        test_generate_mandala_insights_streams_same_drafts,
+        test_vector_index_exact_blocked_ivf_and_persistence,
+        test_atlas_index_stats_its_sources_at_most_once_per_interval,
+        test_plan_reencode_touches_only_affected_records,
+        test_encode_service_micro_batches_concurrent_requests,
+        test_payload_adapters_and_columns_match_row_extraction,
+        test_precompiled_tables_used_only_while_sources_match,
+        test_stage_profiler_records_every_stage_without_changing_output,
+        test_encode_file_matches_in_memory_across_chunk_boundaries,
+        test_resonance_profile_windows_match_encoding_each_slice,
     ]
     failures = 0
     for t in tests:
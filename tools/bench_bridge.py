@@ -0,0 +1,338 @@
+# SPDX-License-Identifier: CC0-1.0
+"""Micro-benchmarks for polyhedral_bridge.
+
+Keyword scan: compares the naive per-keyword substring scan
+(_scan_keywords over both maps) against the compiled KeywordMatcher on
+payloads from seed-sized text up to ~1 MB documents. Payloads are built
+from the repo's own prose (entries, equation notes, README) so the token
+distribution looks like real atlas text. "prose" keeps every word;
+"sparse" drops words containing any keyword, so only a few keywords are
+present (logs, transcripts). Every case is checked for identical counts
+before it is timed.
+
+Parallel: encodes a fixed corpus of short payloads through
+encode_parallel at 1, 2, 4, ... workers (up to the CPUs available) and
+reports throughput and speedup over the single-process run.
+
+Nearest: builds a VectorIndex over synthetic 32-d amplitude rows and
+times exact top-k search (one query and a batch), the IVF build, and
+IVF search, reporting IVF recall against the exact hits.
+
+Service: starts bridge_service in a subprocess per batching window and
+drives it with concurrent socket clients, reporting throughput, the
+service's own latency percentiles and mean batch size; the baseline is
+one `polyhedral_bridge.py "<text>"` process per request.
+
+Startup: runs fresh interpreters that import the bridge and encode one
+payload, reporting median import, first-encode (table load + encode) and
+process wall time, with tables compiled from JSON and restored from a
+build_precompiled() file.
+
+Run:
+    python tools/bench_bridge.py
+    python tools/bench_bridge.py scan --sizes 200 100000 --repeat 5
+    python tools/bench_bridge.py parallel --records 50000 --chunk-size 512
+    python tools/bench_bridge.py nearest --rows 1000000 --nprobe 16
+    python tools/bench_bridge.py service --clients 32 --requests 200 --windows 0 2 5
+    python tools/bench_bridge.py startup --runs 20
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+import bridge_index  # noqa: E402
+import polyhedral_bridge as pb  # noqa: E402
+
+DEFAULT_SIZES = [200, 2_000, 20_000, 200_000, 1_000_000]
+
+
+def corpus_words() -> list[str]:
+    """Whitespace tokens from the repo's atlas prose, in file order."""
+    words: list[str] = []
+    for path in sorted((ROOT / "entries").glob("*.md")) + sorted((ROOT / "equations").glob("*.md")):
+        words.extend(path.read_text(encoding="utf-8").split())
+    words.extend((ROOT / "README.md").read_text(encoding="utf-8").split())
+    return words
+
+
+def sparse_words(words: list[str]) -> list[str]:
+    """Corpus words with every keyword-bearing word removed, plus a few seeds back in."""
+    kws = [kw for m in (pb._FAMILY_KEYWORDS, pb._PRINCIPLE_KEYWORDS) for v in m.values() for kw in v]
+    plain = [w for w in words if not any(kw in w.lower() for kw in kws)]
+    return plain + ["tidal", "flow", "resonance", "lattice"]
+
+
+def make_payload(words: list[str], size: int, seed: int = 0) -> str:
+    """Random walk over corpus words until the text reaches `size` chars."""
+    rng = random.Random(seed)
+    out: list[str] = []
+    n = 0
+    while n < size:
+        w = rng.choice(words)
+        out.append(w)
+        n += len(w) + 1
+    return " ".join(out)[:size]
+
+
+def best_of(fn, repeat: int) -> float:
+    """Best wall-clock seconds of `repeat` calls (first call is a warm-up)."""
+    fn()
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def bench_keyword_scan(sizes: list[int], repeat: int) -> list[dict]:
+    words = corpus_words()
+    kinds = {"prose": words, "sparse": sparse_words(words)}
+    fam_map, prin_map = pb._FAMILY_KEYWORDS, pb._PRINCIPLE_KEYWORDS
+    matcher = pb.KeywordMatcher(fam_map, prin_map)
+    rows = []
+    for kind, pool in kinds.items():
+        for size in sizes:
+            text = make_payload(pool, size)
+            naive = (pb._scan_keywords(text, fam_map), pb._scan_keywords(text, prin_map))
+            fam, prin, _ = matcher.scan(text)
+            if naive != (fam, prin):
+                raise SystemExit(f"count mismatch at {kind} size {size}")
+            t_naive = best_of(lambda: (pb._scan_keywords(text, fam_map), pb._scan_keywords(text, prin_map)), repeat)
+            t_matcher = best_of(lambda: matcher.scan(text), repeat)
+            rows.append({
+                "kind": kind,
+                "size": size,
+                "naive_us": t_naive * 1e6,
+                "matcher_us": t_matcher * 1e6,
+                "speedup": t_naive / t_matcher if t_matcher else float("inf"),
+            })
+    return rows
+
+
+def bench_parallel(records: int, chunk_size: int, max_workers: int) -> list[dict]:
+    words = corpus_words()
+    payloads = [make_payload(words, 160, seed=i) for i in range(records)]
+    expected = None
+    rows = []
+    workers = 1
+    while workers <= max_workers:
+        t0 = time.perf_counter()
+        sigs = [e.glyph_signature for e in pb.encode_parallel(payloads, workers=workers, chunk_size=chunk_size)]
+        elapsed = time.perf_counter() - t0
+        if expected is None:
+            expected = sigs
+        elif sigs != expected:
+            raise SystemExit(f"output differs at {workers} workers")
+        rows.append({"workers": workers, "seconds": elapsed, "records_per_s": records / elapsed})
+        workers *= 2
+    for r in rows:
+        r["speedup"] = rows[0]["seconds"] / r["seconds"]
+    return rows
+
+
+def bench_nearest(rows: int, queries: int, k: int, nprobe: int) -> dict:
+    import numpy as np
+
+    rng = np.random.default_rng(0)
+    vectors = rng.random((rows, len(pb._FAMILY_KEYWORDS) + len(pb._PRINCIPLE_KEYWORDS)), dtype=np.float32) ** 4
+    vectors /= vectors.sum(axis=1, keepdims=True)
+    ids = [str(i) for i in range(rows)]
+    index = bridge_index.VectorIndex(vectors, ids, [""] * rows, ["synthetic"] * rows, "bench")
+    q = vectors[rng.choice(rows, size=queries, replace=False)] + np.float32(0.01)
+
+    t_one = best_of(lambda: index.search(q[:1], k=k), 3)
+    t0 = time.perf_counter()
+    exact = index.search(q, k=k)
+    t_batch = (time.perf_counter() - t0) / queries
+    t0 = time.perf_counter()
+    index.build_ivf()
+    t_build = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    approx = index.search(q, k=k, approximate=True, nprobe=nprobe)
+    t_ivf = (time.perf_counter() - t0) / queries
+    recall = sum(len({r for r, _ in a} & {r for r, _ in e}) for a, e in zip(approx, exact)) / (k * queries)
+    return {
+        "rows": rows,
+        "exact_single_ms": t_one * 1e3,
+        "exact_batched_ms": t_batch * 1e3,
+        "ivf_build_s": t_build,
+        "ivf_ms": t_ivf * 1e3,
+        "ivf_recall": recall,
+    }
+
+
+def bench_service(clients: int, requests: int, windows: list[float]) -> list[dict]:
+    import bridge_service
+
+    words = corpus_words()
+    payloads = [make_payload(words, 160, seed=i) for i in range(clients * requests)]
+    t0 = time.perf_counter()
+    for p in payloads[:3]:
+        subprocess.run([sys.executable, str(ROOT / "polyhedral_bridge.py"), p], capture_output=True, check=True)
+    rows = [{"mode": "process per request", "requests_per_s": 3 / (time.perf_counter() - t0)}]
+    for window in windows:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "bridge.sock")
+            server = subprocess.Popen(
+                [sys.executable, str(ROOT / "bridge_service.py"), "--socket", path, "--window-ms", str(window)],
+                stderr=subprocess.DEVNULL,
+            )
+            try:
+                while bridge_service.request({"op": "metrics"}, socket_path=path) is None:
+                    time.sleep(0.05)
+                bridge_service.encode_via_service("warm up", socket_path=path)
+
+                def run(c: int) -> None:
+                    for p in payloads[c * requests:(c + 1) * requests]:
+                        bridge_service.encode_via_service(p, socket_path=path)
+
+                threads = [threading.Thread(target=run, args=(c,)) for c in range(clients)]
+                t0 = time.perf_counter()
+                for t in threads:
+                    t.start()
+                for t in threads:
+                    t.join()
+                elapsed = time.perf_counter() - t0
+                metrics = bridge_service.request({"op": "metrics"}, socket_path=path)["metrics"]
+            finally:
+                server.terminate()
+                server.wait()
+        rows.append({
+            "mode": f"service, window {window:g} ms",
+            "requests_per_s": clients * requests / elapsed,
+            "mean_batch": metrics["mean_batch"],
+            **metrics["latency_ms"],
+        })
+    return rows
+
+
+_STARTUP_SNIPPET = """
+import time
+t0 = time.perf_counter()
+import polyhedral_bridge
+t1 = time.perf_counter()
+enc = polyhedral_bridge.encode("a hexagonal mesh under tidal load")
+t2 = time.perf_counter()
+print(t1 - t0, t2 - t1, polyhedral_bridge.get_default_encoder().loaded_from)
+"""
+
+
+def bench_startup(runs: int) -> list[dict]:
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp:
+        precompiled = pb.build_precompiled(Path(tmp) / "tables.marshal")
+        for mode, path in (("json", Path(tmp) / "missing"), ("precompiled", precompiled)):
+            env = {**os.environ, "POLYHEDRAL_BRIDGE_PRECOMPILED": str(path), "PYTHONPATH": str(ROOT)}
+            imports, firsts, walls = [], [], []
+            for _ in range(runs):
+                t0 = time.perf_counter()
+                out = subprocess.run(
+                    [sys.executable, "-c", _STARTUP_SNIPPET], env=env, capture_output=True, text=True, check=True,
+                ).stdout.split()
+                walls.append(time.perf_counter() - t0)
+                assert out[2] == mode, out
+                imports.append(float(out[0]))
+                firsts.append(float(out[1]))
+            rows.append({
+                "mode": mode,
+                "import_ms": statistics.median(imports) * 1e3,
+                "first_encode_ms": statistics.median(firsts) * 1e3,
+                "wall_ms": statistics.median(walls) * 1e3,
+            })
+    return rows
+
+
+def main(argv: list[str] | None = None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("bench", nargs="?", choices=["scan", "parallel", "nearest", "service", "startup"], default="scan")
+    ap.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="scan: payload sizes in chars")
+    ap.add_argument("--repeat", type=int, default=7, help="scan: timed repetitions per case (best is kept)")
+    ap.add_argument("--records", type=int, default=20_000, help="parallel: payloads in the corpus")
+    ap.add_argument("--chunk-size", type=int, default=256, help="parallel: payloads per worker task")
+    ap.add_argument("--max-workers", type=int, default=pb.default_workers(), help="parallel: largest pool size")
+    ap.add_argument("--rows", type=int, default=1_000_000, help="nearest: indexed vectors")
+    ap.add_argument("--queries", type=int, default=50, help="nearest: query batch size")
+    ap.add_argument("--k", type=int, default=10, help="nearest: hits per query")
+    ap.add_argument("--nprobe", type=int, default=16, help="nearest: inverted lists probed")
+    ap.add_argument("--clients", type=int, default=32, help="service: concurrent socket clients")
+    ap.add_argument("--requests", type=int, default=100, help="service: requests per client")
+    ap.add_argument("--windows", type=float, nargs="+", default=[0, 2, 5], help="service: batching windows in ms")
+    ap.add_argument("--runs", type=int, default=15, help="startup: fresh interpreters per mode (median is kept)")
+    ap.add_argument("--json", action="store_true", help="emit rows as JSON instead of a table")
+    args = ap.parse_args(argv)
+
+    if args.bench == "parallel":
+        rows = bench_parallel(args.records, args.chunk_size, args.max_workers)
+        if args.json:
+            print(json.dumps({"parallel": rows}, indent=2))
+            return 0
+        print(f"parallel encode ({args.records} payloads, chunk {args.chunk_size})")
+        print(f"  {'workers':>7}  {'seconds':>9}  {'records/s':>11}  {'speedup':>8}")
+        for r in rows:
+            print(f"  {r['workers']:>7}  {r['seconds']:>9.2f}  {r['records_per_s']:>11.0f}  {r['speedup']:>7.2f}x")
+        return 0
+
+    if args.bench == "service":
+        rows = bench_service(args.clients, args.requests, args.windows)
+        if args.json:
+            print(json.dumps({"service": rows}, indent=2))
+            return 0
+        print(f"encode service ({args.clients} clients × {args.requests} requests)")
+        print(f"  {'mode':<24}  {'req/s':>8}  {'batch':>6}  {'p50 ms':>7}  {'p95 ms':>7}  {'p99 ms':>7}")
+        for r in rows:
+            extra = "".join(f"  {r[key]:>7.2f}" for key in ("p50", "p95", "p99")) if "p50" in r else ""
+            batch = f"{r['mean_batch']:>6.1f}" if "mean_batch" in r else f"{'-':>6}"
+            print(f"  {r['mode']:<24}  {r['requests_per_s']:>8.1f}  {batch}{extra}")
+        return 0
+
+    if args.bench == "startup":
+        rows = bench_startup(args.runs)
+        if args.json:
+            print(json.dumps({"startup": rows}, indent=2))
+            return 0
+        print(f"cold start (median of {args.runs} interpreters)")
+        print(f"  {'tables':<12}  {'import ms':>9}  {'first encode ms':>15}  {'wall ms':>8}")
+        for r in rows:
+            print(f"  {r['mode']:<12}  {r['import_ms']:>9.1f}  {r['first_encode_ms']:>15.1f}  {r['wall_ms']:>8.1f}")
+        return 0
+
+    if args.bench == "nearest":
+        result = bench_nearest(args.rows, args.queries, args.k, args.nprobe)
+        if args.json:
+            print(json.dumps({"nearest": result}, indent=2))
+            return 0
+        print(f"nearest ({result['rows']} rows, k={args.k}, nprobe={args.nprobe})")
+        print(f"  exact, one query     {result['exact_single_ms']:>9.1f} ms")
+        print(f"  exact, batched       {result['exact_batched_ms']:>9.1f} ms/query")
+        print(f"  ivf build            {result['ivf_build_s']:>9.2f} s")
+        print(f"  ivf search           {result['ivf_ms']:>9.1f} ms/query  recall {result['ivf_recall']:.2f}")
+        return 0
+
+    rows = bench_keyword_scan(args.sizes, args.repeat)
+    if args.json:
+        print(json.dumps({"keyword_scan": rows}, indent=2))
+        return 0
+    print("keyword scan (both maps)")
+    print(f"  {'kind':<7}  {'chars':>10}  {'naive µs':>12}  {'matcher µs':>12}  {'speedup':>8}")
+    for r in rows:
+        print(f"  {r['kind']:<7}  {r['size']:>10}  {r['naive_us']:>12.1f}  {r['matcher_us']:>12.1f}  {r['speedup']:>7.1f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
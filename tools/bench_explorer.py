@@ -0,0 +1,346 @@
+# SPDX-License-Identifier: CC0-1.0
+"""Benchmarks for the MRP explorers (polyhedral_explorer_v3.MRPExplorer).
+
+Depth: drives one explorer through a single deep session (seed, sweeps,
+seed glyph, then a repeating cycle of annotate / entropy_event /
+mandala_spin_test / save_glyph_to_library / detect_glyph_conflicts; no
+step that lengthens the glyph, so every step does the same work) and
+reports, at each checkpoint depth, the mean select() latency and the
+traced memory added per node, both over the steps since the previous
+checkpoint. "cow" is the copy-on-write BranchState; "copy" swaps in the old
+clone() that copied the history, annotation and glyph-library lists and
+deep-copied the dict fields on every step.
+
+Tree: grows one bushy tree of --nodes nodes (the same step cycle, with
+a random 1-3 step backtrack before 30% of the steps) and reports select()
+latency, traced memory per node, node lookup by id and a full depth-first
+walk, plus (for the table) total_entropy_cost() on random nodes and a
+frontier() query at the median cumulative cost. "table" is the NodeTable
+the explorers use; "objects" swaps in the
+old TreeNode class (uuid-derived id, parent pointer, children list and
+float per node), whose tree has no id lookup.
+
+Save: grows the same tree, then times save_branch() and the nested,
+recursive json.dump it replaced ("nested"), with peak traced memory and
+file size, and load_branch() ("load"), which indexes the file and leaves
+states on disk, followed by reading the deepest node's state ("read deep"). The nested save runs with a raised recursion limit
+and only up to 500 nodes: it repeats every ancestor's annotations in each
+node and its indented json.dump passes every chunk up one generator per
+level, so it slows down with nodes x depth.
+
+Run:
+    python tools/bench_explorer.py
+    python tools/bench_explorer.py depth --depths 1000 4000 16000
+    python tools/bench_explorer.py tree --nodes 200000
+    python tools/bench_explorer.py save --nodes 100000
+"""
+
+from __future__ import annotations
+
+import argparse
+import copy
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+import uuid
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+import polyhedral_explorer_v3 as ex  # noqa: E402
+from explorer_state import PersistentList  # noqa: E402
+
+ATLAS = ROOT / "protocols.json"
+DEFAULT_DEPTHS = [1_000, 2_000, 4_000, 8_000]
+DEFAULT_NODES = 100_000
+NESTED_MAX_NODES = 500  # the nested save's time and size grow with nodes x depth
+CYCLE = [
+    "annotate:checkpoint",
+    "entropy_event:0.01",
+    "mandala_spin_test",
+    "save_glyph_to_library:g:◇⚙➝〰",
+    "detect_glyph_conflicts",
+]
+
+
+def copying_clone(self):
+    """BranchState.clone() as it was before copy-on-write."""
+    s = object.__new__(type(self))
+    for name, value in self.__dict__.items():
+        if isinstance(value, PersistentList):
+            value = list(value)
+        elif isinstance(value, list):
+            value = value.copy()
+        else:
+            value = copy.deepcopy(value)
+        setattr(s, name, value)
+    return s
+
+
+class ObjectTreeNode:
+    """TreeNode as it was before the node table: one Python object per node."""
+
+    def __init__(self, state, choice="root", parent=None, entropy_cost=0.0):
+        self.id = str(uuid.uuid4())[:8]
+        self.state = state
+        self.choice = choice
+        self.parent = parent
+        self.children = []
+        self.entropy_cost = entropy_cost
+
+    @property
+    def annotations(self):
+        return self.state.annotations
+
+    def add_child(self, child):
+        child.parent = self
+        self.children.append(child)
+
+
+def _object_walk(root):
+    stack = [root]
+    while stack:
+        node = stack.pop()
+        yield node
+        stack.extend(reversed(node.children))
+
+
+def session(depths: list[int], trace: bool) -> list[tuple[int, float, float]]:
+    """(depth, mean select() µs, traced bytes per node) rows, each over the steps since the previous checkpoint."""
+    exp = ex.MRPExplorer(str(ATLAS))
+    exp.budget_mode = None  # sessions run far past the default budget
+    for choice in ("set_seed_concept:hexagonal mesh under tidal load", "run_family_sweep",
+                   "run_principle_sweep", "generate_seed_glyph"):
+        exp.select(choice)
+    base = 0
+    if trace:
+        tracemalloc.start()
+        base = tracemalloc.get_traced_memory()[0]
+    rows = []
+    depth, t = 4, 0.0
+    for target in sorted(depths):
+        start = depth
+        while depth < target:
+            choice = CYCLE[depth % len(CYCLE)]
+            t0 = time.perf_counter()
+            exp.select(choice)
+            t += time.perf_counter() - t0
+            depth += 1
+        traced = tracemalloc.get_traced_memory()[0] if trace else 0
+        steps = max(1, depth - start)
+        rows.append((depth, t / steps * 1e6, (traced - base) / steps if trace else 0.0))
+        base, t = traced, 0.0
+    if trace:
+        tracemalloc.stop()
+    return rows
+
+
+def bench_depth(depths: list[int]) -> list[dict]:
+    out = []
+    original = ex.BranchState.clone
+    for mode in ("cow", "copy"):
+        ex.BranchState.clone = original if mode == "cow" else copying_clone
+        try:
+            timed = session(depths, trace=False)
+            traced = session(depths, trace=True)
+        finally:
+            ex.BranchState.clone = original
+        for (depth, us, _), (_, _, per_node) in zip(timed, traced):
+            out.append({"mode": mode, "depth": depth, "us_per_step": us, "bytes_per_node": per_node})
+    return out
+
+
+def grow_tree(nodes: int, mode: str, trace: bool) -> tuple[ex.MRPExplorer, float, float]:
+    """The grown explorer, mean select() µs and traced bytes per node (0 unless trace)."""
+    exp = ex.MRPExplorer(str(ATLAS))
+    exp.budget_mode = None
+    table_node = ex.TreeNode
+    if mode == "objects":
+        exp.root = exp.current = ObjectTreeNode(ex.BranchState(), "root")
+        ex.TreeNode = ObjectTreeNode
+    try:
+        for choice in ("set_seed_concept:hexagonal mesh under tidal load", "run_family_sweep",
+                       "run_principle_sweep", "generate_seed_glyph"):
+            exp.select(choice)
+        rng = random.Random(0)
+        if trace:
+            tracemalloc.start()
+        base = tracemalloc.get_traced_memory()[0]
+        t = 0.0
+        for i in range(nodes - 5):
+            if rng.random() < 0.3:
+                exp.backtrack(rng.randint(1, 3))
+                if exp.current.parent is None:
+                    exp.select("set_seed_concept:hexagonal mesh under tidal load")
+            t0 = time.perf_counter()
+            exp.select(CYCLE[i % len(CYCLE)])
+            t += time.perf_counter() - t0
+        traced = tracemalloc.get_traced_memory()[0] - base
+        tracemalloc.stop()
+    finally:
+        ex.TreeNode = table_node
+    return exp, t / (nodes - 5) * 1e6, traced / nodes
+
+
+def bench_tree(nodes: int) -> list[dict]:
+    rows = []
+    for mode in ("table", "objects"):
+        _, _, per_node = grow_tree(nodes, mode, trace=True)
+        exp, select_us, _ = grow_tree(nodes, mode, trace=False)
+        rows.append(walk_and_lookup(exp, mode, {"mode": mode, "nodes": nodes, "select_us": select_us, "bytes_per_node": per_node}))
+    return rows
+
+
+def walk_and_lookup(exp: ex.MRPExplorer, mode: str, row: dict) -> dict:
+    rng = random.Random(1)
+    t0 = time.perf_counter()
+    walked = sum(1 for _ in (exp.tree.walk() if mode == "table" else _object_walk(exp.root)))
+    row["walk_ms"] = (time.perf_counter() - t0) * 1e3
+    assert walked >= row["nodes"] - 5
+    if mode == "table":
+        ids = [rng.randrange(len(exp.tree)) for _ in range(100_000)]
+        t0 = time.perf_counter()
+        for node_id in ids:
+            exp.node(node_id)
+        row["lookup_ns"] = (time.perf_counter() - t0) / len(ids) * 1e9
+        t0 = time.perf_counter()
+        for node_id in ids:
+            exp.node(node_id).total_entropy_cost()
+        row["cost_ns"] = (time.perf_counter() - t0) / len(ids) * 1e9
+        budget = sorted(exp.tree.cumulative)[len(exp.tree) // 2]
+        exp.tree.frontier(budget)  # imports numpy when it is available
+        t0 = time.perf_counter()
+        row["frontier"] = len(exp.frontier(budget))
+        row["frontier_ms"] = (time.perf_counter() - t0) * 1e3
+    return row
+
+
+def nested_save(exp: ex.MRPExplorer, filepath: str) -> None:
+    """save_branch() as it was before streaming: one nested dict per node, built recursively."""
+    def node_to_dict(node):
+        return {
+            "id": node.id,
+            "choice": node.choice,
+            "annotations": list(node.state.annotations),
+            "entropy_cost": node.entropy_cost,
+            "children": [node_to_dict(c) for c in node.children]
+        }
+    with open(filepath, "w") as f:
+        json.dump(node_to_dict(exp.root), f, indent=2)
+
+
+def _deep_stack(fn, *args):
+    """fn(*args) on a thread with a large stack and recursion limit, for the recursive baseline."""
+    result = {}
+
+    def run():
+        try:
+            result["out"] = fn(*args)
+        except BaseException as e:  # re-raised on the calling thread
+            result["error"] = e
+
+    limit, size = sys.getrecursionlimit(), threading.stack_size(1 << 30)
+    sys.setrecursionlimit(1_000_000)
+    try:
+        thread = threading.Thread(target=run)
+        thread.start()
+        thread.join()
+    finally:
+        sys.setrecursionlimit(limit)
+        threading.stack_size(size)
+    if "error" in result:
+        raise result["error"]
+    return result.get("out")
+
+
+def _timed(fn, *args) -> tuple[object, float, float]:
+    """fn(*args), seconds taken, and peak traced MB (traced in a second call)."""
+    t0 = time.perf_counter()
+    out = fn(*args)
+    seconds = time.perf_counter() - t0
+    tracemalloc.start()
+    fn(*args)
+    peak = tracemalloc.get_traced_memory()[1] / 1e6
+    tracemalloc.stop()
+    return out, seconds, peak
+
+
+def bench_save(nodes: int) -> list[dict]:
+    exp, _, _ = grow_tree(nodes, "table", trace=False)
+    depth = [1]
+    for parent in exp.tree.parent[1:]:  # parents precede their children
+        depth.append(depth[parent] + 1)
+    deepest = max(range(len(depth)), key=depth.__getitem__)
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for mode, save in (("nested", lambda *a: _deep_stack(nested_save, *a)), ("stream", ex.MRPExplorer.save_branch)):
+            path = os.path.join(tmp, mode)
+            row = {"mode": mode, "nodes": len(exp.tree), "depth": depth[deepest]}
+            if mode == "nested" and nodes > NESTED_MAX_NODES:
+                row["error"] = f"skipped above {NESTED_MAX_NODES} nodes"
+                rows.append(row)
+                continue
+            try:
+                _, row["seconds"], row["peak_mb"] = _timed(save, exp, path)
+                row["file_mb"] = os.path.getsize(path) / 1e6
+            except RecursionError:
+                row["error"] = "RecursionError"
+            rows.append(row)
+        loaded, seconds, peak = _timed(ex.MRPExplorer.load_branch, os.path.join(tmp, "stream"))
+        rows.append({"mode": "load", "nodes": len(loaded.tree), "depth": rows[-1]["depth"], "seconds": seconds, "peak_mb": peak})
+        t0 = time.perf_counter()
+        loaded.node(deepest).state
+        rows.append({"mode": "read deep", "nodes": rows[-1]["depth"], "depth": rows[-1]["depth"], "seconds": time.perf_counter() - t0})
+    return rows
+
+
+def main(argv: list[str] | None = None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("bench", nargs="?", choices=["depth", "tree", "save"], default="depth")
+    ap.add_argument("--depths", type=int, nargs="+", default=DEFAULT_DEPTHS, help="depth: checkpoint depths")
+    ap.add_argument("--nodes", type=int, default=DEFAULT_NODES, help="tree, save: nodes to grow")
+    ap.add_argument("--json", action="store_true", help="emit rows as JSON instead of a table")
+    args = ap.parse_args(argv)
+
+    # record_atlas_entry is not in the cycle, but keep any staging out of the tree
+    os.environ.setdefault("FIELDLINK_PATH", tempfile.mkdtemp(prefix="bench_explorer_"))
+    rows = {"depth": lambda: bench_depth(args.depths), "tree": lambda: bench_tree(args.nodes),
+            "save": lambda: bench_save(args.nodes)}[args.bench]()
+    if args.json:
+        print(json.dumps(rows, indent=2))
+        return 0
+    if args.bench == "save":
+        print(f"  {'mode':<9}  {'nodes':>7}  {'depth':>6}  {'seconds':>8}  {'peak MB':>8}  {'file MB':>8}")
+        for r in rows:
+            if "error" in r:
+                print(f"  {r['mode']:<9}  {r['nodes']:>7}  {r['depth']:>6}  {r['error']}")
+                continue
+            extra = "".join(f"  {r[k]:>8.2f}" if k in r else f"  {'-':>8}" for k in ("peak_mb", "file_mb"))
+            print(f"  {r['mode']:<9}  {r['nodes']:>7}  {r['depth']:>6}  {r['seconds']:>8.3f}{extra}")
+        return 0
+    if args.bench == "tree":
+        print(
+            f"  {'mode':<8}  {'nodes':>7}  {'select µs':>9}  {'bytes/node':>10}  {'walk ms':>8}"
+            f"  {'lookup ns':>9}  {'cost ns':>8}  {'frontier':>8}  {'frontier ms':>11}"
+        )
+        for r in rows:
+            extra = "".join(
+                f"  {r[k]:>{w}.{p}f}" if k in r else f"  {'-':>{w}}"
+                for k, w, p in (("lookup_ns", 9, 0), ("cost_ns", 8, 0), ("frontier", 8, 0), ("frontier_ms", 11, 1))
+            )
+            print(f"  {r['mode']:<8}  {r['nodes']:>7}  {r['select_us']:>9.1f}  {r['bytes_per_node']:>10.0f}  {r['walk_ms']:>8.1f}{extra}")
+        return 0
+    print(f"  {'mode':<5}  {'depth':>7}  {'µs/step':>9}  {'bytes/node':>10}")
+    for r in rows:
+        print(f"  {r['mode']:<5}  {r['depth']:>7}  {r['us_per_step']:>9.1f}  {r['bytes_per_node']:>10.0f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,263 @@
+# SPDX-License-Identifier: CC0-1.0
+"""Benchmark suite for polyhedral_bridge with baseline regression gates.
+
+Cases: single encode(), generate_mandala_insight(), encode_batch() and
+encode_jsonl() streaming, each over payload sizes from seed-sized text to
+1 MB documents and over keyword maps scaled 1× and 4× (extra keywords
+are drawn from the corpus vocabulary, so they match real text). Payloads
+come from the same atlas prose as tools/bench_bridge.py.
+
+Every case reports throughput (payloads/s and MB/s), per-call latency
+percentiles and the peak traced memory of one call (tracemalloc, in a
+separate untimed pass). For batch and stream cases a call is the whole
+batch. p99 is printed but not gated: a few calls per large case are too
+few samples for a stable tail. Cases that fail the gate are rerun once
+and keep the better value of each metric, so one noisy run does not
+fail the check.
+
+Baselines: --save writes the results to a JSON file; --check reruns the
+suite, compares it with that file and exits 1 when throughput, p50 or p95
+latency regresses by more than --tolerance (default 25%) or peak memory
+by more than --memory-tolerance (default 10%). Baselines are
+machine-specific: save one on the reference machine (e.g. from main)
+and check branches against it on the same machine.
+
+Run:
+    python tools/bench_suite.py
+    python tools/bench_suite.py --save
+    python tools/bench_suite.py --check --tolerance 0.3
+    python tools/bench_suite.py --cases encode batch --sizes 200 20000 --keyword-scales 1
+"""
+
+from __future__ import annotations
+
+import argparse
+import io
+import json
+import os
+import platform
+import random
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from bench_bridge import ROOT, corpus_words, make_payload, pb  # noqa: E402
+
+DEFAULT_BASELINE = ROOT / "tools" / "bench_baseline.json"
+DEFAULT_SIZES = [200, 20_000, 1_000_000]
+DEFAULT_SCALES = [1, 4]
+CASES = ("encode", "insight", "batch", "stream")
+# Metric -> +1 when higher is better, -1 when lower is better.
+GATES = {"throughput": 1, "p50_ms": -1, "p95_ms": -1, "peak_kib": -1}
+CHAR_BUDGET = 4_000_000  # payload chars per case, so small payloads get more calls
+MIN_CALLS, MAX_CALLS = 5, 400
+BULK_REPEAT = 5
+
+
+def scaled_keywords(words: list[str], scale: int) -> tuple[dict, dict]:
+    """The module keyword maps with (scale - 1)× as many corpus words appended, round-robin over ids."""
+    fam = {nid: list(kws) for nid, kws in pb._FAMILY_KEYWORDS.items()}
+    prin = {nid: list(kws) for nid, kws in pb._PRINCIPLE_KEYWORDS.items()}
+    if scale <= 1:
+        return fam, prin
+    taken = {kw for m in (fam, prin) for kws in m.values() for kw in kws}
+    vocab = sorted({w.lower().strip(".,;:()[]*`'\"") for w in words} - taken)
+    vocab = [w for w in vocab if w.isalpha() and len(w) >= 5]
+    total = sum(len(kws) for m in (fam, prin) for kws in m.values())
+    extra = random.Random(scale).sample(vocab, min(len(vocab), (scale - 1) * total))
+    slots = [kws for m in (fam, prin) for kws in m.values()]
+    for i, kw in enumerate(extra):
+        slots[i % len(slots)].append(kw)
+    return fam, prin
+
+
+def _percentile(sorted_values: list[float], q: float) -> float:
+    return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))]
+
+
+def _peak_kib(fn) -> float:
+    tracemalloc.start()
+    try:
+        fn()
+        return tracemalloc.get_traced_memory()[1] / 1024
+    finally:
+        tracemalloc.stop()
+
+
+def _summarize(latencies: list[float], items: int, chars: int, peak_kib: float) -> dict:
+    lat = sorted(latencies)
+    seconds = sum(lat)
+    return {
+        "calls": len(lat),
+        "throughput": items / seconds,
+        "mb_per_s": chars / seconds / 1e6,
+        "p50_ms": _percentile(lat, 0.50) * 1e3,
+        "p95_ms": _percentile(lat, 0.95) * 1e3,
+        "p99_ms": _percentile(lat, 0.99) * 1e3,
+        "peak_kib": peak_kib,
+    }
+
+
+def run_case(kind: str, encoder: pb.PolyhedralEncoder, payloads: list[str]) -> dict:
+    """Time one case; payloads[0] warms the encoder and is measured for memory."""
+    chars = sum(map(len, payloads))
+    if kind in ("encode", "insight"):
+        if kind == "encode":
+            def call(p):
+                return encoder.encode(p)
+        else:
+            def call(p):
+                return pb.generate_mandala_insight(p, name="bench", encoder=encoder)
+        call(payloads[0])
+        peak = _peak_kib(lambda: call(payloads[0]))
+        latencies = []
+        for p in payloads:
+            t0 = time.perf_counter()
+            call(p)
+            latencies.append(time.perf_counter() - t0)
+        return _summarize(latencies, len(payloads), chars, peak)
+
+    if kind == "batch":
+        def call():
+            return encoder.encode_batch(payloads)
+    else:
+        lines = "".join(json.dumps(p) + "\n" for p in payloads)
+
+        def call():
+            return pb.encode_jsonl(io.StringIO(lines), io.StringIO(), encoder=encoder)
+    call()
+    peak = _peak_kib(call)
+    latencies = []
+    for _ in range(BULK_REPEAT):
+        t0 = time.perf_counter()
+        call()
+        latencies.append(time.perf_counter() - t0)
+    return _summarize(latencies, len(payloads) * BULK_REPEAT, chars * BULK_REPEAT, peak)
+
+
+def run_suite(cases: list[str], sizes: list[int], scales: list[int], only: set[str] | None = None) -> dict[str, dict]:
+    """Results keyed "<case>/size=<chars>/kw=<scale>x"; only restricts to those keys."""
+    words = corpus_words()
+    if "batch" in cases:
+        try:
+            pb._require_numpy()
+        except ImportError:
+            print("numpy not installed: skipping batch cases", file=sys.stderr)
+            cases = [c for c in cases if c != "batch"]
+    results: dict[str, dict] = {}
+    for scale in scales:
+        wanted = [(size, kind) for size in sizes for kind in cases if only is None or _key(kind, size, scale) in only]
+        if not wanted:
+            continue
+        fam, prin = scaled_keywords(words, scale)
+        encoder = pb.PolyhedralEncoder(timestamp=None, family_keywords=fam, principle_keywords=prin)
+        for size in dict.fromkeys(size for size, _kind in wanted):
+            n = max(MIN_CALLS, min(MAX_CALLS, CHAR_BUDGET // size))
+            payloads = [make_payload(words, size, seed=i) for i in range(n)]
+            for p in payloads:  # warm the token-mask cache so results don't depend on case order
+                encoder.matcher.scan(p)
+            for kind in (kind for s, kind in wanted if s == size):
+                results[_key(kind, size, scale)] = run_case(kind, encoder, payloads)
+    return results
+
+
+def _key(kind: str, size: int, scale: int) -> str:
+    return f"{kind}/size={size}/kw={scale}x"
+
+
+def _better(a: dict, b: dict) -> dict:
+    """a with every gated metric replaced by b's where b is better."""
+    out = dict(a)
+    for metric, direction in GATES.items():
+        if direction * (b[metric] - a[metric]) > 0:
+            out[metric] = b[metric]
+    return out
+
+
+def compare(baseline: dict[str, dict], current: dict[str, dict], tolerance: float, memory_tolerance: float) -> list[str]:
+    """One message per gated metric that regressed past its tolerance."""
+    failures = []
+    for case, metrics in current.items():
+        old = baseline.get(case)
+        if old is None:
+            continue
+        for metric, direction in GATES.items():
+            if metric not in old or not old[metric]:
+                continue
+            tol = memory_tolerance if metric == "peak_kib" else tolerance
+            change = (metrics[metric] - old[metric]) / old[metric]
+            if direction * change < -tol:
+                failures.append(f"{case}: {metric} {old[metric]:.4g} -> {metrics[metric]:.4g} ({change:+.0%})")
+    return failures
+
+
+def machine() -> dict:
+    return {"python": platform.python_version(), "platform": platform.platform(), "cpus": os.cpu_count()}
+
+
+def main(argv: list[str] | None = None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--cases", nargs="+", choices=CASES, default=list(CASES))
+    ap.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="payload sizes in chars")
+    ap.add_argument("--keyword-scales", type=int, nargs="+", default=DEFAULT_SCALES, help="keyword map multipliers")
+    ap.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE, help="baseline JSON path")
+    mode = ap.add_mutually_exclusive_group()
+    mode.add_argument("--save", action="store_true", help="write the results as the new baseline")
+    mode.add_argument("--check", action="store_true", help="exit 1 when a metric regresses past tolerance")
+    ap.add_argument("--tolerance", type=float, default=0.25, help="allowed throughput/latency regression")
+    ap.add_argument("--memory-tolerance", type=float, default=0.10, help="allowed peak-memory regression")
+    ap.add_argument("--json", action="store_true", help="emit results as JSON instead of a table")
+    args = ap.parse_args(argv)
+
+    baseline = None
+    if args.check:
+        try:
+            baseline = json.loads(args.baseline.read_text(encoding="utf-8"))
+        except (OSError, ValueError) as e:
+            print(f"error: {args.baseline}: {e} (create one with --save)", file=sys.stderr)
+            return 2
+
+    results = run_suite(args.cases, args.sizes, args.keyword_scales)
+    if args.json:
+        print(json.dumps({"machine": machine(), "results": results}, indent=2))
+    else:
+        print(f"  {'case':<30}  {'calls':>5}  {'items/s':>10}  {'MB/s':>7}  {'p50 ms':>8}  {'p95 ms':>8}  {'p99 ms':>8}  {'peak KiB':>9}")
+        for case, r in results.items():
+            print(
+                f"  {case:<30}  {r['calls']:>5}  {r['throughput']:>10.1f}  {r['mb_per_s']:>7.2f}"
+                f"  {r['p50_ms']:>8.2f}  {r['p95_ms']:>8.2f}  {r['p99_ms']:>8.2f}  {r['peak_kib']:>9.1f}"
+            )
+
+    if args.save:
+        args.baseline.parent.mkdir(parents=True, exist_ok=True)
+        args.baseline.write_text(json.dumps({"machine": machine(), "results": results}, indent=2) + "\n", encoding="utf-8")
+        print(f"saved baseline to {args.baseline}", file=sys.stderr)
+        return 0
+    if baseline is None:
+        return 0
+
+    if baseline.get("machine") != machine():
+        print(f"warning: baseline was recorded on {baseline.get('machine')}", file=sys.stderr)
+    missing = sorted(set(results) - set(baseline.get("results", {})))
+    if missing:
+        print(f"note: no baseline for {', '.join(missing)}", file=sys.stderr)
+    failures = compare(baseline.get("results", {}), results, args.tolerance, args.memory_tolerance)
+    if failures:
+        failed = {line.split(":", 1)[0] for line in failures}
+        rerun = run_suite(args.cases, args.sizes, args.keyword_scales, only=failed)
+        for case, metrics in rerun.items():
+            results[case] = _better(results[case], metrics)
+        failures = compare(baseline.get("results", {}), results, args.tolerance, args.memory_tolerance)
+    for line in failures:
+        print(f"REGRESSION {line}", file=sys.stderr)
+    if failures:
+        return 1
+    print(f"no regressions against {args.baseline} ({len(results) - len(missing)} cases)", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())